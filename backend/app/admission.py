@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class ServiceOverloadedError(RuntimeError):
+    """Raised without queueing when a service's admission queue is full."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is at capacity; retry in {math.ceil(retry_after)}s")
+        self.retry_after = retry_after
+
+
+class ServicePool:
+    """Bounded admission for one service class, plus threads for its blocking work.
+
+    At most ``workers`` requests run at once; up to ``max_queue`` more wait for
+    a slot in arrival order and anything beyond that is rejected straight away,
+    so a burst of slow AI calls cannot pile up behind the event loop. Blocking
+    calls made while admitted run on the pool's own ``workers`` threads rather
+    than the loop's shared default executor.
+    """
+
+    def __init__(self, name: str, *, workers: int = 8, max_queue: int = 32):
+        self.name = name
+        self._workers = max(1, workers)
+        self._max_queue = max(0, max_queue)
+        self._slots = asyncio.Semaphore(self._workers)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queued_seconds = 0.0
+        self.max_queued_seconds = 0.0
+        # Moving average of how long a request holds its slot, for Retry-After.
+        self._service_seconds = 1.0
+
+    def check(self) -> None:
+        """Raise :class:`ServiceOverloadedError` if a new request would be rejected."""
+        if self.in_flight >= self._workers and self.waiting >= self._max_queue:
+            with self._lock:
+                self.rejected += 1
+            raise ServiceOverloadedError(self.name, self.retry_after())
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold one of the service's slots, waiting in the bounded queue if needed."""
+        self.check()
+        started = time.perf_counter()
+        if self._slots.locked():
+            # Only requests that actually have to wait count towards the queue.
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            try:
+                await self._slots.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        admitted_at = time.perf_counter()
+        with self._lock:
+            waited = admitted_at - started
+            self.in_flight += 1
+            self.admitted += 1
+            self.queued_seconds += waited
+            self.max_queued_seconds = max(self.max_queued_seconds, waited)
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - admitted_at
+            with self._lock:
+                self.in_flight -= 1
+                self._service_seconds += 0.2 * (held - self._service_seconds)
+            self._slots.release()
+
+    async def run(self, fn: Callable[..., T], *args: object) -> T:
+        """Run blocking ``fn(*args)`` on this pool's threads, keeping the caller's deadline."""
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, context.run, fn, *args)
+
+    def retry_after(self) -> float:
+        """Rough time until the queue ahead of a new request has drained."""
+        return max(1.0, self._service_seconds * (self.waiting + 1) / self._workers)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "workers": self._workers,
+            "max_queue": self._max_queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queued_seconds": round(self.queued_seconds, 3),
+            "avg_queued_seconds": round(self.queued_seconds / self.admitted, 4) if self.admitted else 0.0,
+            "max_queued_seconds": round(self.max_queued_seconds, 3),
+        }
@@ -1,34 +1,109 @@
 from __future__ import annotations
 
 import json
-from typing import Iterable, List, Sequence
+from typing import AsyncIterator, Iterable, List, Sequence
 
-from openai import APIError, AzureOpenAI
-import httpx
+from openai import APIError, APITimeoutError, AsyncAzureOpenAI, AzureOpenAI
 
-from .config import Settings
+from .config import AzureDeploymentConfig, Settings
+from .rate_limit import DeploymentLimiter
+from .resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    ResilientCaller,
+    RetryPolicy,
+    remaining_budget,
+)
+from .singleflight import AsyncSingleFlight, SingleFlight, request_key
+from .tokens import estimate_message_tokens, estimate_tokens
+from .transport import (
+    DEFAULT_TIMEOUT,
+    create_async_http_client,
+    create_http_client,
+    request_timeout,
+)
+
+# Completion allowance charged against the token budget when max_tokens is unset.
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+def create_limiter(label: str, config: AzureDeploymentConfig) -> DeploymentLimiter:
+    return DeploymentLimiter(
+        f"{label}:{config.deployment}",
+        max_concurrency=config.max_concurrency,
+        requests_per_minute=config.requests_per_minute,
+        tokens_per_minute=config.tokens_per_minute,
+    )
+
+
+def create_breaker(label: str, config: AzureDeploymentConfig, settings: Settings) -> CircuitBreaker:
+    return CircuitBreaker(
+        f"{label}:{config.deployment}",
+        failure_threshold=settings.openai_breaker_failures,
+        recovery_time=settings.openai_breaker_recovery,
+    )
+
+
+def create_retry_policy(settings: Settings) -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=max(1, settings.openai_max_attempts),
+        base_delay=settings.openai_retry_base_delay,
+        max_delay=settings.openai_retry_max_delay,
+    )
+
+
+def _raise_if_deadline(error: APIError) -> None:
+    """Report a timeout under an active deadline as the deadline running out."""
+    if isinstance(error, APITimeoutError) and remaining_budget() is not None:
+        raise DeadlineExceededError(f"Deadline exceeded waiting for OpenAI: {error}") from error
+
+
+def _chat_token_cost(messages: Sequence[dict], max_tokens: int | None) -> int:
+    return estimate_message_tokens(messages) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
 
 
 class OpenAIClient:
     """Thin wrapper around the Azure OpenAI SDK for independent chat and embedding calls."""
 
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        chat_limiter: DeploymentLimiter | None = None,
+        embed_limiter: DeploymentLimiter | None = None,
+        chat_breaker: CircuitBreaker | None = None,
+        embed_breaker: CircuitBreaker | None = None,
+    ):
         chat = settings.chat
         embed = settings.embedding
 
         self.chat_model = chat.deployment
         self.embedding_model = embed.deployment
+        self.chat_limiter = chat_limiter or create_limiter("chat", chat)
+        self.embed_limiter = embed_limiter or create_limiter("embedding", embed)
+        # Retries happen here, under the breaker and request deadline, not inside the SDK.
+        retry_policy = create_retry_policy(settings)
+        self._chat_caller = ResilientCaller(
+            chat_breaker or create_breaker("chat", chat, settings), retry_policy
+        )
+        self._embed_caller = ResilientCaller(
+            embed_breaker or create_breaker("embedding", embed, settings), retry_policy
+        )
+        # Identical concurrent requests share one upstream call and its result.
+        self.in_flight = SingleFlight()
+
+        # One pooled keep-alive transport serves both deployments.
+        self._http_client = create_http_client(settings)
 
-        # 配置超时时间
-        timeout = httpx.Timeout(30.0, connect=10.0)
-        
         # Chat client
         self._chat_client = AzureOpenAI(
             api_key=chat.api_key,
             api_version=chat.api_version,
             azure_endpoint=chat.endpoint,
-            timeout=timeout,
-            max_retries=3,
+            timeout=DEFAULT_TIMEOUT,
+            max_retries=0,
+            http_client=self._http_client,
         )
 
         # Embedding client
@@ -36,8 +111,9 @@ class OpenAIClient:
             api_key=embed.api_key,
             api_version=embed.api_version,
             azure_endpoint=embed.endpoint,
-            timeout=timeout,
-            max_retries=3,
+            timeout=DEFAULT_TIMEOUT,
+            max_retries=0,
+            http_client=self._http_client,
         )
 
     def create_chat_completion(
@@ -46,14 +122,25 @@ class OpenAIClient:
         temperature: float = 0.2,
         max_tokens: int | None = None,
     ) -> str:
+        cost = _chat_token_cost(messages, max_tokens)
+
+        def attempt(budget: float | None):
+            with self.chat_limiter.acquire(cost):
+                return self._chat_client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=list(messages),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=request_timeout(budget),
+                )
+
+        key = request_key("chat", self.chat_model, list(messages), temperature, max_tokens)
         try:
-            response = self._chat_client.chat.completions.create(
-                model=self.chat_model,
-                messages=list(messages),
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
+            response = self.in_flight.do(key, lambda: self._chat_caller.call(attempt))
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except APIError as error:
+            _raise_if_deadline(error)
             print(f"OpenAI chat completion failed: {error}")
             raise RuntimeError(f"OpenAI chat completion failed: {error}") from error
         except Exception as error:
@@ -67,13 +154,24 @@ class OpenAIClient:
         if not payload:
             return []
 
+        cost = sum(estimate_tokens(text) for text in payload)
+
+        def attempt(budget: float | None):
+            with self.embed_limiter.acquire(cost):
+                return self._embed_client.embeddings.create(
+                    model=self.embedding_model,
+                    input=payload,
+                    timeout=request_timeout(budget),
+                )
+
+        key = request_key("embedding", self.embedding_model, payload)
         try:
-            response = self._embed_client.embeddings.create(
-                model=self.embedding_model,
-                input=payload,
-            )
+            response = self.in_flight.do(key, lambda: self._embed_caller.call(attempt))
             print(f"Successfully created embeddings for {len(payload)} texts")
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except APIError as error:
+            _raise_if_deadline(error)
             print(f"OpenAI embedding request failed: {error}")
             raise RuntimeError(f"OpenAI embedding request failed: {error}") from error
         except Exception as error:
@@ -102,4 +200,191 @@ class OpenAIClient:
         try:
             return json.loads(text)
         except json.JSONDecodeError as error:
-            raise ValueError("The model returned an invalid JSON payload.") from error
\ No newline at end of file
+            raise ValueError("The model returned an invalid JSON payload.") from error
+
+    @property
+    def chat_breaker(self) -> CircuitBreaker:
+        return self._chat_caller.breaker
+
+    @property
+    def embed_breaker(self) -> CircuitBreaker:
+        return self._embed_caller.breaker
+
+    def close(self) -> None:
+        self._http_client.close()
+
+
+class AsyncOpenAIClient:
+    """Asyncio counterpart of :class:`OpenAIClient` built on ``AsyncAzureOpenAI``.
+
+    Calls await the network instead of blocking the event loop, so a single worker
+    can keep many chat and embedding requests in flight at once.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        chat_limiter: DeploymentLimiter | None = None,
+        embed_limiter: DeploymentLimiter | None = None,
+        chat_breaker: CircuitBreaker | None = None,
+        embed_breaker: CircuitBreaker | None = None,
+    ):
+        chat = settings.chat
+        embed = settings.embedding
+
+        self.chat_model = chat.deployment
+        self.embedding_model = embed.deployment
+        self.chat_limiter = chat_limiter or create_limiter("chat", chat)
+        self.embed_limiter = embed_limiter or create_limiter("embedding", embed)
+        # Retries happen here, under the breaker and request deadline, not inside the SDK.
+        retry_policy = create_retry_policy(settings)
+        self._chat_caller = ResilientCaller(
+            chat_breaker or create_breaker("chat", chat, settings), retry_policy
+        )
+        self._embed_caller = ResilientCaller(
+            embed_breaker or create_breaker("embedding", embed, settings), retry_policy
+        )
+        self.in_flight = AsyncSingleFlight()
+
+        self._http_client = create_async_http_client(settings)
+
+        self._chat_client = AsyncAzureOpenAI(
+            api_key=chat.api_key,
+            api_version=chat.api_version,
+            azure_endpoint=chat.endpoint,
+            timeout=DEFAULT_TIMEOUT,
+            max_retries=0,
+            http_client=self._http_client,
+        )
+        self._embed_client = AsyncAzureOpenAI(
+            api_key=embed.api_key,
+            api_version=embed.api_version,
+            azure_endpoint=embed.endpoint,
+            timeout=DEFAULT_TIMEOUT,
+            max_retries=0,
+            http_client=self._http_client,
+        )
+
+    async def create_chat_completion(
+        self,
+        messages: Sequence[dict],
+        temperature: float = 0.2,
+        max_tokens: int | None = None,
+    ) -> str:
+        cost = _chat_token_cost(messages, max_tokens)
+
+        async def attempt(budget: float | None):
+            async with self.chat_limiter.acquire_async(cost):
+                return await self._chat_client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=list(messages),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=request_timeout(budget),
+                )
+
+        key = request_key("chat", self.chat_model, list(messages), temperature, max_tokens)
+        try:
+            response = await self.in_flight.do(key, lambda: self._chat_caller.call_async(attempt))
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
+        except APIError as error:
+            _raise_if_deadline(error)
+            print(f"OpenAI chat completion failed: {error}")
+            raise RuntimeError(f"OpenAI chat completion failed: {error}") from error
+        except Exception as error:
+            print(f"Unexpected error in chat completion: {error}")
+            raise RuntimeError(f"Unexpected error in chat completion: {error}") from error
+
+        return response.choices[0].message.content or ""
+
+    async def stream_chat_completion(
+        self,
+        messages: Sequence[dict],
+        temperature: float = 0.2,
+        max_tokens: int | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield completion text deltas as the deployment streams them back."""
+        async def attempt(budget: float | None):
+            return await self._chat_client.chat.completions.create(
+                model=self.chat_model,
+                messages=list(messages),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                timeout=request_timeout(budget),
+            )
+
+        try:
+            # The slot is held for the whole stream: the connection stays busy until it ends.
+            # Only opening the stream is retried; once text has been yielded it cannot be.
+            async with self.chat_limiter.acquire_async(_chat_token_cost(messages, max_tokens)):
+                stream = await self._chat_caller.call_async(attempt)
+                async for event in stream:
+                    # Azure sends content-filter results as chunks without choices.
+                    if not event.choices:
+                        continue
+                    delta = event.choices[0].delta.content
+                    if delta:
+                        yield delta
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
+        except APIError as error:
+            _raise_if_deadline(error)
+            print(f"OpenAI chat completion failed: {error}")
+            raise RuntimeError(f"OpenAI chat completion failed: {error}") from error
+        except Exception as error:
+            print(f"Unexpected error in chat completion: {error}")
+            raise RuntimeError(f"Unexpected error in chat completion: {error}") from error
+
+    async def create_embedding(self, texts: Iterable[str]) -> List[List[float]]:
+        payload = list(texts)
+        if not payload:
+            return []
+
+        cost = sum(estimate_tokens(text) for text in payload)
+
+        async def attempt(budget: float | None):
+            async with self.embed_limiter.acquire_async(cost):
+                return await self._embed_client.embeddings.create(
+                    model=self.embedding_model,
+                    input=payload,
+                    timeout=request_timeout(budget),
+                )
+
+        key = request_key("embedding", self.embedding_model, payload)
+        try:
+            response = await self.in_flight.do(key, lambda: self._embed_caller.call_async(attempt))
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
+        except APIError as error:
+            _raise_if_deadline(error)
+            print(f"OpenAI embedding request failed: {error}")
+            raise RuntimeError(f"OpenAI embedding request failed: {error}") from error
+        except Exception as error:
+            print(f"Unexpected error in embedding request: {error}")
+            raise RuntimeError(f"Unexpected error in embedding request: {error}") from error
+
+        return [item.embedding for item in response.data]
+
+    async def structured_completion(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        *,
+        temperature: float = 0.0,
+    ) -> str:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        return await self.create_chat_completion(messages, temperature=temperature)
+
+    chat_breaker = OpenAIClient.chat_breaker
+    embed_breaker = OpenAIClient.embed_breaker
+
+    async def aclose(self) -> None:
+        await self._http_client.aclose()
+
+    to_json = staticmethod(OpenAIClient.to_json)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, List
 
 from dotenv import load_dotenv
 
@@ -25,6 +25,10 @@ class AzureDeploymentConfig:
     endpoint: str
     api_version: str
     deployment: str
+    # Client-side throttling; 0 disables the corresponding limit.
+    max_concurrency: int = 0
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
 
     def ensure_valid(self, label: str) -> None:
         missing = []
@@ -41,6 +45,12 @@ class AzureDeploymentConfig:
             fields = ", ".join(missing)
             raise RuntimeError(f"Missing Azure {label} configuration: {fields}")
 
+    def fill_placeholders(self, endpoint: str) -> None:
+        """Supply dummy credentials so the offline backend needs no Azure settings."""
+        self.api_key = self.api_key or "fake-key"
+        self.endpoint = self.endpoint or endpoint
+        self.api_version = self.api_version or "2024-06-01"
+
 
 def create_chat_config() -> AzureDeploymentConfig:
     return AzureDeploymentConfig(
@@ -52,6 +62,9 @@ def create_chat_config() -> AzureDeploymentConfig:
             "AZURE_OPENAI_CHAT_API_VERSION", os.getenv("OPENAI_API_VERSION", "")
         ),
         deployment=os.getenv("OPENAI_CHAT_MODEL", "gpt-4.1-nano"),
+        max_concurrency=int(os.getenv("OPENAI_CHAT_MAX_CONCURRENCY", "16")),
+        requests_per_minute=int(os.getenv("OPENAI_CHAT_RPM", "0")),
+        tokens_per_minute=int(os.getenv("OPENAI_CHAT_TPM", "0")),
     )
 
 
@@ -67,6 +80,9 @@ def create_embedding_config() -> AzureDeploymentConfig:
             "AZURE_OPENAI_EMBED_API_VERSION", os.getenv("OPENAI_API_VERSION", "")
         ),
         deployment=os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small"),
+        max_concurrency=int(os.getenv("OPENAI_EMBED_MAX_CONCURRENCY", "8")),
+        requests_per_minute=int(os.getenv("OPENAI_EMBED_RPM", "0")),
+        tokens_per_minute=int(os.getenv("OPENAI_EMBED_TPM", "0")),
     )
 
 
@@ -76,6 +92,94 @@ class Settings:
 
     chat: AzureDeploymentConfig = field(default_factory=create_chat_config)
     embedding: AzureDeploymentConfig = field(default_factory=create_embedding_config)
+    # "azure" talks to the configured deployments; "fake" answers in-process (see fake_openai.py).
+    openai_backend: str = field(
+        default_factory=lambda: os.getenv("OPENAI_BACKEND", "azure").strip().lower()
+    )
+    fake_openai_latency_ms: float = field(
+        default_factory=lambda: float(os.getenv("OPENAI_FAKE_LATENCY_MS", "300"))
+    )
+    fake_openai_latency_sigma: float = field(
+        default_factory=lambda: float(os.getenv("OPENAI_FAKE_LATENCY_SIGMA", "0.5"))
+    )
+    fake_openai_token_ms: float = field(
+        default_factory=lambda: float(os.getenv("OPENAI_FAKE_TOKEN_MS", "15"))
+    )
+    fake_openai_error_rate: float = field(
+        default_factory=lambda: float(os.getenv("OPENAI_FAKE_ERROR_RATE", "0"))
+    )
+    fake_openai_throttle_rate: float = field(
+        default_factory=lambda: float(os.getenv("OPENAI_FAKE_429_RATE", "0"))
+    )
+    fake_openai_embedding_dim: int = field(
+        default_factory=lambda: int(os.getenv("OPENAI_FAKE_EMBED_DIM", "1536"))
+    )
+    fake_openai_seed: int = field(
+        default_factory=lambda: int(os.getenv("OPENAI_FAKE_SEED", "0"))
+    )
+    openai_max_connections: int = field(
+        default_factory=lambda: int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    )
+    openai_max_keepalive: int = field(
+        default_factory=lambda: int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+    )
+    openai_keepalive_expiry: float = field(
+        default_factory=lambda: float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+    )
+    openai_http2: bool = field(
+        default_factory=lambda: os.getenv("OPENAI_HTTP2", "true").lower() in {"1", "true", "yes"}
+    )
+    openai_max_attempts: int = field(
+        default_factory=lambda: int(os.getenv("OPENAI_MAX_ATTEMPTS", "3"))
+    )
+    openai_retry_base_delay: float = field(
+        default_factory=lambda: float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5"))
+    )
+    openai_retry_max_delay: float = field(
+        default_factory=lambda: float(os.getenv("OPENAI_RETRY_MAX_DELAY", "8"))
+    )
+    openai_breaker_failures: int = field(
+        default_factory=lambda: int(os.getenv("OPENAI_BREAKER_FAILURES", "5"))
+    )
+    openai_breaker_recovery: float = field(
+        default_factory=lambda: float(os.getenv("OPENAI_BREAKER_RECOVERY", "30"))
+    )
+    chatbot_deadline: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_DEADLINE", "20"))
+    )
+    community_deadline: float = field(
+        default_factory=lambda: float(os.getenv("COMMUNITY_DEADLINE", "20"))
+    )
+    career_deadline: float = field(
+        default_factory=lambda: float(os.getenv("CAREER_DEADLINE", "45"))
+    )
+    learning_deadline: float = field(
+        default_factory=lambda: float(os.getenv("LEARNING_DEADLINE", "45"))
+    )
+    chatbot_workers: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_WORKERS", "16"))
+    )
+    chatbot_max_queue: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_MAX_QUEUE", "64"))
+    )
+    community_workers: int = field(
+        default_factory=lambda: int(os.getenv("COMMUNITY_WORKERS", "8"))
+    )
+    community_max_queue: int = field(
+        default_factory=lambda: int(os.getenv("COMMUNITY_MAX_QUEUE", "32"))
+    )
+    career_workers: int = field(
+        default_factory=lambda: int(os.getenv("CAREER_WORKERS", "8"))
+    )
+    career_max_queue: int = field(
+        default_factory=lambda: int(os.getenv("CAREER_MAX_QUEUE", "16"))
+    )
+    learning_workers: int = field(
+        default_factory=lambda: int(os.getenv("LEARNING_WORKERS", "8"))
+    )
+    learning_max_queue: int = field(
+        default_factory=lambda: int(os.getenv("LEARNING_MAX_QUEUE", "16"))
+    )
     rag_source_path: Path = field(
         default_factory=lambda: Path(
             os.getenv(
@@ -100,6 +204,9 @@ class Settings:
             )
         )
     )
+    prompt_check_interval: float = field(
+        default_factory=lambda: float(os.getenv("PROMPT_CHECK_INTERVAL", "2"))
+    )
     rag_top_k: int = field(
         default_factory=lambda: int(os.getenv("CHATBOT_TOP_K", "3"))
     )
@@ -109,12 +216,167 @@ class Settings:
     rag_chunk_overlap: int = field(
         default_factory=lambda: int(os.getenv("CHATBOT_CHUNK_OVERLAP", "200"))
     )
+    rag_structured_sources: List[str] = field(
+        default_factory=lambda: [
+            name.strip()
+            for name in os.getenv(
+                "CHATBOT_STRUCTURED_SOURCES",
+                "Job.csv,Online_course.csv,well-being_event.csv,Community.csv",
+            ).split(",")
+            if name.strip()
+        ]
+    )
+    rag_embed_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_EMBED_BATCH_SIZE", "64"))
+    )
+    rag_embed_batch_tokens: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_EMBED_BATCH_TOKENS", "32000"))
+    )
+    rag_embed_concurrency: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_EMBED_CONCURRENCY", "4"))
+    )
+    rag_embed_checkpoint_interval: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_EMBED_CHECKPOINT_INTERVAL", "30"))
+    )
+    rag_index_type: str = field(
+        default_factory=lambda: os.getenv("CHATBOT_INDEX_TYPE", "auto")
+    )
+    rag_ann_threshold: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_ANN_THRESHOLD", "50000"))
+    )
+    rag_ivf_nlist: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_IVF_NLIST", "0"))
+    )
+    # 0 probes about 3.5% of the lists (at least 16); see IVFIndex for the recall trade-off.
+    rag_ivf_nprobe: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_IVF_NPROBE", "0"))
+    )
+    rag_index_dtype: str = field(
+        default_factory=lambda: os.getenv("CHATBOT_INDEX_DTYPE", "float32")
+    )
+    rag_retrieval_mode: str = field(
+        default_factory=lambda: os.getenv("CHATBOT_RETRIEVAL_MODE", "hybrid")
+    )
+    rag_rrf_k: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_RRF_K", "60"))
+    )
+    rag_hybrid_candidates: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_HYBRID_CANDIDATES", "20"))
+    )
+    rag_query_embed_timeout: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_QUERY_EMBED_TIMEOUT", "3"))
+    )
+    rag_mmr_lambda: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_MMR_LAMBDA", "0.7"))
+    )
+    rag_mmr_candidates: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_MMR_CANDIDATES", "12"))
+    )
+    rag_query_cache_size: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_QUERY_CACHE_SIZE", "1024"))
+    )
+    rag_query_cache_ttl: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_QUERY_CACHE_TTL", "3600"))
+    )
+    chatbot_context_tokens: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_CONTEXT_TOKENS", "1200"))
+    )
+    chatbot_history_tokens: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_HISTORY_TOKENS", "1500"))
+    )
+    chatbot_history_recent_messages: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_HISTORY_RECENT_MESSAGES", "6"))
+    )
+    chatbot_history_summary_tokens: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_HISTORY_SUMMARY_TOKENS", "300"))
+    )
+    chatbot_history_cache_size: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_HISTORY_CACHE_SIZE", "512"))
+    )
+    chatbot_history_cache_ttl: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_HISTORY_CACHE_TTL", "3600"))
+    )
+    chatbot_session_max: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_SESSION_MAX", "10000"))
+    )
+    chatbot_session_ttl: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_SESSION_TTL", "86400"))
+    )
+    chatbot_session_sqlite_path: Path | None = field(
+        default_factory=lambda: (
+            Path(os.environ["CHATBOT_SESSION_SQLITE"])
+            if os.getenv("CHATBOT_SESSION_SQLITE")
+            else None
+        )
+    )
+    chatbot_answer_cache_size: int = field(
+        default_factory=lambda: int(os.getenv("CHATBOT_ANSWER_CACHE_SIZE", "512"))
+    )
+    chatbot_answer_cache_threshold: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_ANSWER_CACHE_THRESHOLD", "0.95"))
+    )
+    chatbot_answer_cache_ttl: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_ANSWER_CACHE_TTL", "3600"))
+    )
+    response_cache_size: int = field(
+        default_factory=lambda: int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    )
+    response_cache_ttl: float = field(
+        default_factory=lambda: float(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+    )
+    response_cache_sqlite_path: Path | None = field(
+        default_factory=lambda: (
+            Path(os.environ["RESPONSE_CACHE_SQLITE"])
+            if os.getenv("RESPONSE_CACHE_SQLITE")
+            else None
+        )
+    )
+    response_cache_sqlite_max_entries: int = field(
+        default_factory=lambda: int(os.getenv("RESPONSE_CACHE_SQLITE_MAX_ENTRIES", "50000"))
+    )
+    rag_watch_interval: float = field(
+        default_factory=lambda: float(os.getenv("CHATBOT_WATCH_INTERVAL", "30"))
+    )
+    rag_embedding_store_path: Path | None = field(
+        default_factory=lambda: (
+            Path(os.environ["CHATBOT_EMBEDDING_STORE"])
+            if os.getenv("CHATBOT_EMBEDDING_STORE")
+            else None
+        )
+    )
+
+    @property
+    def rag_structured_paths(self) -> List[Path]:
+        """Structured data files (resolved against ``data_dir``) fed into the chatbot corpus."""
+        return [self.data_dir / name for name in self.rag_structured_sources]
+
+    def __post_init__(self) -> None:
+        if self.rag_embedding_store_path is None:
+            # Keep cached embeddings next to the corpus they were computed from.
+            suffix = ".fake.embeddings" if self.uses_fake_openai else ".embeddings"
+            self.rag_embedding_store_path = self.rag_source_path.with_name(
+                f"{self.rag_source_path.stem}{suffix}"
+            )
+
+    @property
+    def uses_fake_openai(self) -> bool:
+        return self.openai_backend == "fake"
 
 
 def get_settings() -> Settings:
     """Factory that returns validated settings."""
     settings = Settings()
 
+    if settings.openai_backend not in {"azure", "fake"}:
+        raise RuntimeError(
+            f"Unknown OPENAI_BACKEND {settings.openai_backend!r}; expected 'azure' or 'fake'."
+        )
+    if settings.uses_fake_openai:
+        from .fake_openai import FAKE_ENDPOINT
+
+        settings.chat.fill_placeholders(FAKE_ENDPOINT)
+        settings.embedding.fill_placeholders(FAKE_ENDPOINT)
+
     settings.chat.ensure_valid("chat deployment")
     settings.embedding.ensure_valid("embedding deployment")
 
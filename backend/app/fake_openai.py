@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
+
+import httpx
+import numpy as np
+
+from .config import Settings
+
+# Endpoint used for the fake backend when no Azure endpoint is configured.
+FAKE_ENDPOINT = "https://fake-openai.local"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+_PLAIN_REPLY = (
+    "This answer was produced by the offline OpenAI stand-in. It has no access to "
+    "the PSA knowledge base, so treat it as filler text of a realistic length for "
+    "load testing the chat, caching and streaming paths end to end."
+)
+
+
+@dataclass(frozen=True)
+class FakeOpenAIOptions:
+    """Behaviour of the in-process Azure OpenAI stand-in."""
+
+    # Median time to first byte and the spread of its log-normal distribution.
+    latency_ms: float = 300.0
+    latency_sigma: float = 0.5
+    # Delay between streamed chunks, roughly one token each.
+    token_ms: float = 15.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after_ms: int = 1000
+    embedding_dim: int = 1536
+    seed: int = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "FakeOpenAIOptions":
+        return cls(
+            latency_ms=settings.fake_openai_latency_ms,
+            latency_sigma=settings.fake_openai_latency_sigma,
+            token_ms=settings.fake_openai_token_ms,
+            error_rate=settings.fake_openai_error_rate,
+            throttle_rate=settings.fake_openai_throttle_rate,
+            embedding_dim=settings.fake_openai_embedding_dim,
+            seed=settings.fake_openai_seed,
+        )
+
+
+def pseudo_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic unit vector from hashed word features.
+
+    Texts sharing words get a positive cosine similarity, so retrieval over the
+    fake backend still ranks overlapping passages first.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in _WORD.findall(text.casefold()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        vector[value % dim] += 1.0 if value & (1 << 63) else -1.0
+    norm = float(np.linalg.norm(vector))
+    if norm == 0:
+        vector[0] = 1.0
+        norm = 1.0
+    return (vector / norm).tolist()
+
+
+def _schema_value(schema: Dict[str, Any], name: str, seed: str) -> Any:
+    kind = schema.get("type")
+    if kind == "object":
+        properties = schema.get("properties") or {}
+        return {key: _schema_value(value, key, seed) for key, value in properties.items()}
+    if kind == "array":
+        items = schema.get("items") or {"type": "string"}
+        return [_schema_value(items, f"{name} {index + 1}", seed) for index in range(3)]
+    if kind in {"number", "integer"}:
+        digest = hashlib.sha256(f"{seed}:{name}".encode("utf-8")).digest()
+        return 50 + digest[0] % 46
+    if kind == "boolean":
+        return True
+    label = name.replace("_", " ")
+    return f"Synthetic {label} written by the offline OpenAI stand-in for load testing."
+
+
+def _response_schema(messages: List[Dict[str, Any]]) -> Dict[str, Any] | None:
+    """Find the JSON schema the services embed in their user message, if any."""
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        try:
+            payload = json.loads(message.get("content") or "")
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(payload, dict):
+            return None
+        schema = payload.get("response_schema")
+        if schema is None and isinstance(payload.get("response"), dict):
+            schema = payload["response"].get("schema")
+        return schema if isinstance(schema, dict) else None
+    return None
+
+
+def fake_completion_text(messages: List[Dict[str, Any]]) -> str:
+    """Reply text: a schema-shaped JSON object when one was requested, prose otherwise."""
+    schema = _response_schema(messages)
+    if schema is None:
+        return _PLAIN_REPLY
+    seed = json.dumps(messages[-1].get("content", ""), ensure_ascii=False)
+    return json.dumps(_schema_value(schema, "response", seed), ensure_ascii=False)
+
+
+class FakeOpenAITransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """httpx transport answering Azure OpenAI chat and embedding calls in-process.
+
+    Plug it into the SDK's ``http_client`` to exercise the whole stack with
+    realistic latency, streaming and injected faults but no network or tokens.
+    """
+
+    def __init__(self, options: FakeOpenAIOptions | None = None):
+        self.options = options or FakeOpenAIOptions()
+        self._random = random.Random(self.options.seed)
+        self._lock = threading.Lock()
+        self._created = 0
+        self.requests = 0
+        self.injected_errors = 0
+        self.injected_throttles = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        delay, response, chunks = self._plan(request)
+        timeout = _read_timeout(request)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise httpx.ReadTimeout("Fake backend response exceeded the read timeout.", request=request)
+        time.sleep(delay)
+        if chunks is not None:
+            return _event_stream_response(_SyncEventStream(chunks, self.options.token_ms / 1000.0))
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        delay, response, chunks = self._plan(request)
+        timeout = _read_timeout(request)
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise httpx.ReadTimeout("Fake backend response exceeded the read timeout.", request=request)
+        await asyncio.sleep(delay)
+        if chunks is not None:
+            return _event_stream_response(_AsyncEventStream(chunks, self.options.token_ms / 1000.0))
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "injected_errors": self.injected_errors,
+            "injected_throttles": self.injected_throttles,
+        }
+
+    def _plan(self, request: httpx.Request) -> Tuple[float, httpx.Response | None, List[bytes] | None]:
+        """Pick this request's latency and outcome; streamed bodies are returned as chunks."""
+        with self._lock:
+            self.requests += 1
+            self._created += 1
+            request_id = self._created
+            roll = self._random.random()
+            delay = self.options.latency_ms / 1000.0 * math.exp(
+                self.options.latency_sigma * self._random.gauss(0.0, 1.0)
+            )
+            if roll < self.options.throttle_rate:
+                self.injected_throttles += 1
+            elif roll < self.options.throttle_rate + self.options.error_rate:
+                self.injected_errors += 1
+
+        if roll < self.options.throttle_rate:
+            return delay / 4, self._error(
+                429,
+                "Rate limit injected by the fake backend.",
+                {"retry-after-ms": str(self.options.retry_after_ms)},
+            ), None
+        if roll < self.options.throttle_rate + self.options.error_rate:
+            return delay, self._error(500, "Server error injected by the fake backend."), None
+
+        body = json.loads(request.content or b"{}")
+        path = request.url.path
+        if path.endswith("/embeddings"):
+            return delay, self._embeddings(body), None
+        if path.endswith("/chat/completions"):
+            if body.get("stream"):
+                return delay, None, self._chat_chunks(body, request_id)
+            return delay, self._chat(body, request_id), None
+        return 0.0, self._error(404, f"Route {path} is not implemented by the fake backend."), None
+
+    def _embeddings(self, body: Dict[str, Any]) -> httpx.Response:
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        data = [
+            {
+                "object": "embedding",
+                "index": index,
+                "embedding": pseudo_embedding(str(text), self.options.embedding_dim),
+            }
+            for index, text in enumerate(inputs)
+        ]
+        tokens = sum(len(str(text)) // 4 + 1 for text in inputs)
+        return httpx.Response(
+            200,
+            json={
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "fake-embedding"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+        )
+
+    def _chat(self, body: Dict[str, Any], request_id: int) -> httpx.Response:
+        text = fake_completion_text(body.get("messages") or [])
+        completion_tokens = len(text) // 4 + 1
+        return httpx.Response(
+            200,
+            json={
+                "id": f"chatcmpl-fake-{request_id}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake-chat"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": text},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 0,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": completion_tokens,
+                },
+            },
+        )
+
+    def _chat_chunks(self, body: Dict[str, Any], request_id: int) -> List[bytes]:
+        text = fake_completion_text(body.get("messages") or [])
+        base = {
+            "id": f"chatcmpl-fake-{request_id}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-chat"),
+        }
+        chunks = []
+        for start in range(0, len(text), 4):
+            choice = {"index": 0, "delta": {"content": text[start : start + 4]}, "finish_reason": None}
+            chunks.append({**base, "choices": [choice]})
+        chunks.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        frames = [f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8") for chunk in chunks]
+        frames.append(b"data: [DONE]\n\n")
+        return frames
+
+    @staticmethod
+    def _error(status: int, message: str, headers: Dict[str, str] | None = None) -> httpx.Response:
+        return httpx.Response(
+            status,
+            headers=headers,
+            json={"error": {"message": message, "type": "fake_backend_error", "code": str(status)}},
+        )
+
+
+def _read_timeout(request: httpx.Request) -> float | None:
+    """The per-request read timeout, which a real network transport would enforce."""
+    return (request.extensions.get("timeout") or {}).get("read")
+
+
+def _event_stream_response(stream: httpx.SyncByteStream | httpx.AsyncByteStream) -> httpx.Response:
+    return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream)
+
+
+class _SyncEventStream(httpx.SyncByteStream):
+    def __init__(self, chunks: List[bytes], interval: float):
+        self._chunks = chunks
+        self._interval = interval
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            time.sleep(self._interval)
+            yield chunk
+
+
+class _AsyncEventStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: List[bytes], interval: float):
+        self._chunks = chunks
+        self._interval = interval
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self._chunks:
+            await asyncio.sleep(self._interval)
+            yield chunk
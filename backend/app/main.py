@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+import math
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, List, Tuple
+
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
-from .clients import OpenAIClient
+from .admission import ServiceOverloadedError, ServicePool
+from .cache import TTLCache
+from .clients import AsyncOpenAIClient, OpenAIClient, create_breaker, create_limiter
 from .config import get_settings
 from .models import (
     CareerNavigatorRequest,
     CareerNavigatorResponse,
     ChatbotRequest,
     ChatbotResponse,
+    ChatbotSource,
     CommunityBoardResponse,
     CommunityPolishRequest,
     CommunityPolishResponse,
@@ -26,19 +36,76 @@ from .models import (
     WellnessEvent,
     WellnessEventsResponse,
 )
+from .response_cache import MemoryResponseStore, ResponseCache, SQLiteResponseStore
+from .resilience import CircuitOpenError, DeadlineExceededError, deadline
+from .services.answer_cache import SemanticAnswerCache
 from .services.career_navigator import CareerNavigatorService
+from .services.chat_history import HistoryManager
 from .services.chatbot import ChatHistoryMessage, ChatbotService
 from .services.community import CommunityPolishService
 from .services.data_repository import DataRepository
+from .services.embedding_store import EmbeddingStore
+from .services.kb_watcher import KnowledgeBaseWatcher
 from .services.learning_hub import LearningHubService
-from .services.rag import RAGService
+from .services.prompts import PromptRegistry
+from .services.rag import RAGService, RetrievedChunk
 from .services.recommended_questions import RecommendedQuestionsService
+from .services.sessions import ChatSession, ChatSessions, MemorySessionStore, SQLiteSessionStore
+from .streaming import EVENT_STREAM_HEADERS, sse_event
+
+
+def _to_sources(retrieved: List[RetrievedChunk]) -> List[ChatbotSource]:
+    return [
+        ChatbotSource(
+            content=chunk.content,
+            similarity=chunk.similarity,
+            source=chunk.source,
+            offset=chunk.offset,
+        )
+        for chunk in retrieved
+    ]
+
+
+# Errors that mean "try again later" rather than a bad request or a bug.
+UNAVAILABLE_ERRORS = (CircuitOpenError, DeadlineExceededError, ServiceOverloadedError)
+
+
+def _unavailable(
+    error: CircuitOpenError | DeadlineExceededError | ServiceOverloadedError,
+) -> HTTPException:
+    """503 with ``Retry-After`` while a breaker is open or a service is at capacity, 504 on a blown deadline."""
+    if isinstance(error, (CircuitOpenError, ServiceOverloadedError)):
+        return HTTPException(
+            status_code=503,
+            detail=str(error),
+            headers={"Retry-After": str(math.ceil(error.retry_after))},
+        )
+    return HTTPException(status_code=504, detail=str(error))
+
+
+async def _hold(pool: ServicePool) -> AsyncExitStack:
+    """Take a slot in ``pool`` that outlives the handler, for streamed responses."""
+    admission = AsyncExitStack()
+    await admission.enter_async_context(pool.admit())
+    return admission
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
+    # Limits and breakers are per deployment, so the sync and async clients share them.
+    chat_limiter = create_limiter("chat", settings.chat)
+    embed_limiter = create_limiter("embedding", settings.embedding)
+    chat_breaker = create_breaker("chat", settings.chat, settings)
+    embed_breaker = create_breaker("embedding", settings.embedding, settings)
+    deployment_controls = dict(
+        chat_limiter=chat_limiter,
+        embed_limiter=embed_limiter,
+        chat_breaker=chat_breaker,
+        embed_breaker=embed_breaker,
+    )
     try:
-        client = OpenAIClient(settings)
+        client = OpenAIClient(settings, **deployment_controls)
+        async_client = AsyncOpenAIClient(settings, **deployment_controls)
     except RuntimeError as error:
         raise RuntimeError(
             f"Failed to initialise OpenAI client: {error}"
@@ -51,27 +118,141 @@ def create_app() -> FastAPI:
         chunk_size=settings.rag_chunk_size,
         chunk_overlap=settings.rag_chunk_overlap,
         top_k=settings.rag_top_k,
+        structured_paths=settings.rag_structured_paths,
+        embed_batch_size=settings.rag_embed_batch_size,
+        embed_batch_tokens=settings.rag_embed_batch_tokens,
+        embed_concurrency=settings.rag_embed_concurrency,
+        embed_checkpoint_interval=settings.rag_embed_checkpoint_interval,
+        index_type=settings.rag_index_type,
+        ann_threshold=settings.rag_ann_threshold,
+        ivf_nlist=settings.rag_ivf_nlist or None,
+        ivf_nprobe=settings.rag_ivf_nprobe,
+        index_dtype=settings.rag_index_dtype,
+        retrieval_mode=settings.rag_retrieval_mode,
+        rrf_k=settings.rag_rrf_k,
+        hybrid_candidates=settings.rag_hybrid_candidates,
+        query_embed_timeout=settings.rag_query_embed_timeout,
+        mmr_lambda=settings.rag_mmr_lambda,
+        mmr_candidates=settings.rag_mmr_candidates,
+        query_cache=TTLCache(
+            settings.rag_query_cache_size,
+            ttl=settings.rag_query_cache_ttl,
+        ),
+        store=EmbeddingStore(
+            settings.rag_embedding_store_path,
+            model=client.embedding_model,
+            chunk_size=settings.rag_chunk_size,
+            chunk_overlap=settings.rag_chunk_overlap,
+        ),
+        async_client=async_client,
     )
 
-    chatbot_service = ChatbotService(client=client, rag_service=rag_service)
+    kb_watcher = KnowledgeBaseWatcher(rag_service, interval=settings.rag_watch_interval)
+
+    history_manager = HistoryManager(
+        client,
+        async_client,
+        token_budget=settings.chatbot_history_tokens,
+        recent_messages=settings.chatbot_history_recent_messages,
+        summary_tokens=settings.chatbot_history_summary_tokens,
+        cache_size=settings.chatbot_history_cache_size,
+        cache_ttl=settings.chatbot_history_cache_ttl,
+    )
+    chatbot_service = ChatbotService(
+        client=client,
+        rag_service=rag_service,
+        answer_cache=SemanticAnswerCache(
+            threshold=settings.chatbot_answer_cache_threshold,
+            max_entries=settings.chatbot_answer_cache_size,
+            ttl=settings.chatbot_answer_cache_ttl,
+        ),
+        async_client=async_client,
+        context_token_budget=settings.chatbot_context_tokens,
+        history_manager=history_manager,
+    )
+    chat_sessions = ChatSessions(
+        (
+            SQLiteSessionStore(
+                settings.chatbot_session_sqlite_path,
+                max_entries=settings.chatbot_session_max,
+                ttl=settings.chatbot_session_ttl,
+            )
+            if settings.chatbot_session_sqlite_path is not None
+            else MemorySessionStore(settings.chatbot_session_max, ttl=settings.chatbot_session_ttl)
+        ),
+        history_manager=history_manager,
+    )
+    response_cache = ResponseCache(
+        MemoryResponseStore(settings.response_cache_size, ttl=settings.response_cache_ttl),
+        shared=(
+            SQLiteResponseStore(
+                settings.response_cache_sqlite_path,
+                max_entries=settings.response_cache_sqlite_max_entries,
+                ttl=settings.response_cache_ttl,
+            )
+            if settings.response_cache_sqlite_path is not None
+            else None
+        ),
+    )
+    prompt_registry = PromptRegistry(
+        settings.prompt_dir, check_interval=settings.prompt_check_interval
+    )
+    prompt_registry.preload()
     community_service = CommunityPolishService(
         client=client,
         prompt_path=settings.prompt_dir / "Connect@PSA_AIPolish.md",
+        async_client=async_client,
+        response_cache=response_cache,
+        prompts=prompt_registry,
     )
     career_service = CareerNavigatorService(
         client=client,
         prompt_path=settings.prompt_dir / "Career_Navigator.md",
+        async_client=async_client,
+        response_cache=response_cache,
+        prompts=prompt_registry,
     )
     learning_service = LearningHubService(
         client=client,
         prompt_path=settings.prompt_dir / "Learning_Hub_course_recommend.md",
+        async_client=async_client,
+        response_cache=response_cache,
+        prompts=prompt_registry,
     )
     
     recommended_questions_service = RecommendedQuestionsService(
         questions_path=settings.rag_source_path.parent / "recommend_query.md"
     )
 
-    app = FastAPI(title="PSA AI Backend", version="1.0.0")
+    # Bounded admission per service class, so slow AI calls queue (or get a 503)
+    # instead of crowding out the cheap data endpoints.
+    chatbot_pool = ServicePool(
+        "chatbot", workers=settings.chatbot_workers, max_queue=settings.chatbot_max_queue
+    )
+    community_pool = ServicePool(
+        "community", workers=settings.community_workers, max_queue=settings.community_max_queue
+    )
+    career_pool = ServicePool(
+        "career", workers=settings.career_workers, max_queue=settings.career_max_queue
+    )
+    learning_pool = ServicePool(
+        "learning", workers=settings.learning_workers, max_queue=settings.learning_max_queue
+    )
+    service_pools = (chatbot_pool, community_pool, career_pool, learning_pool)
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI):
+        kb_watcher.start()
+        try:
+            yield
+        finally:
+            kb_watcher.stop()
+            await async_client.aclose()
+            client.close()
+            for pool in service_pools:
+                pool.shutdown()
+
+    app = FastAPI(title="PSA AI Backend", version="1.0.0", lifespan=lifespan)
 
     # Enable CORS for frontend clients
     app.add_middleware(
@@ -94,30 +275,117 @@ def create_app() -> FastAPI:
         allow_headers=["*"],  # 允许所有 headers
     )
 
+    def open_session(
+        payload: ChatbotRequest,
+    ) -> Tuple[ChatSession | None, List[ChatHistoryMessage] | None]:
+        """The conversation's session, if any, and the history to answer with."""
+        history = None
+        if payload.history:
+            history = [
+                ChatHistoryMessage(role=item.role, content=item.content)
+                for item in payload.history
+            ]
+        if payload.session_id is None and payload.history is not None:
+            # Stateless client sending the whole conversation itself.
+            return None, history
+        session = chat_sessions.open(payload.session_id, seed=history)
+        return session, session.history()
+
     @app.post("/api/chatbot", response_model=ChatbotResponse)
     async def chatbot_endpoint(payload: ChatbotRequest) -> ChatbotResponse:
         try:
-            history = None
-            if payload.history:
-                history = [
-                    ChatHistoryMessage(role=item.role, content=item.content)
-                    for item in payload.history
-                ]
-            answer, _ = chatbot_service.answer(
-                payload.query,
-                history=history,
+            async with chatbot_pool.admit():
+                # Session stores may hit SQLite, so they run on the service's threads.
+                session, history = await chatbot_pool.run(open_session, payload)
+                with deadline(settings.chatbot_deadline):
+                    answer, retrieved = await chatbot_service.answer_async(
+                        payload.query,
+                        history=history,
+                    )
+                answer = answer.strip()
+                if session is not None:
+                    await chatbot_pool.run(
+                        chat_sessions.record, session, payload.query, answer, retrieved
+                    )
+            return ChatbotResponse(
+                answer=answer,
+                sources=_to_sources(retrieved),
+                session_id=session.session_id if session is not None else None,
             )
-            return ChatbotResponse(answer=answer.strip())
+        except UNAVAILABLE_ERRORS as error:
+            raise _unavailable(error) from error
         except Exception as error:
             raise HTTPException(status_code=500, detail=str(error)) from error
 
+    @app.post(
+        "/api/chatbot/stream",
+        summary="Stream a chatbot answer as Server-Sent Events.",
+        response_class=StreamingResponse,
+    )
+    async def chatbot_stream_endpoint(payload: ChatbotRequest) -> StreamingResponse:
+        """Emit ``delta`` events with answer text, then one ``done`` event with the sources."""
+        try:
+            admission = await _hold(chatbot_pool)
+        except ServiceOverloadedError as error:
+            raise _unavailable(error) from error
+        try:
+            try:
+                session, history = await chatbot_pool.run(open_session, payload)
+                with deadline(settings.chatbot_deadline):
+                    retrieved, deltas = await chatbot_service.stream_answer_async(
+                        payload.query,
+                        history=history,
+                    )
+            except UNAVAILABLE_ERRORS as error:
+                raise _unavailable(error) from error
+            except Exception as error:
+                raise HTTPException(status_code=500, detail=str(error)) from error
+        except BaseException:
+            # Cancellation included: the stream that would release the slot never starts.
+            await admission.aclose()
+            raise
+
+        async def events() -> AsyncIterator[str]:
+            parts: List[str] = []
+            try:
+                with deadline(settings.chatbot_deadline):
+                    async for delta in deltas:
+                        parts.append(delta)
+                        yield sse_event("delta", {"content": delta})
+            except Exception as error:
+                yield sse_event("error", {"detail": str(error)})
+                return
+            answer = "".join(parts).strip()
+            if session is not None:
+                await chatbot_pool.run(
+                    chat_sessions.record, session, payload.query, answer, retrieved
+                )
+            response = ChatbotResponse(
+                answer=answer,
+                sources=_to_sources(retrieved),
+                session_id=session.session_id if session is not None else None,
+            )
+            yield sse_event("done", response.model_dump())
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers=EVENT_STREAM_HEADERS,
+            # Runs once the stream ends or the client goes away.
+            background=BackgroundTask(admission.aclose),
+        )
+
     @app.post("/api/community/polish", response_model=CommunityPolishResponse)
     async def community_polish_endpoint(
         payload: CommunityPolishRequest,
     ) -> CommunityPolishResponse:
         try:
-            polished = community_service.polish(payload.content, payload.tone)
+            async with community_pool.admit():
+                with deadline(settings.community_deadline):
+                    polished = await community_service.polish_async(payload.content, payload.tone)
             return CommunityPolishResponse(polished_content=polished.strip())
+        except UNAVAILABLE_ERRORS as error:
+            raise _unavailable(error) from error
         except Exception as error:
             raise HTTPException(status_code=500, detail=str(error)) from error
 
@@ -126,31 +394,120 @@ def create_app() -> FastAPI:
         payload: CareerNavigatorRequest,
     ) -> CareerNavigatorResponse:
         try:
-            fit_percentage, scores, narrative = career_service.analyse(
-                payload.job_information, payload.employee_information
-            )
+            async with career_pool.admit():
+                with deadline(settings.career_deadline):
+                    fit_percentage, scores, narrative = await career_service.analyse_async(
+                        payload.job_information, payload.employee_information
+                    )
             return CareerNavigatorResponse(
                 fit_percentage=round(fit_percentage, 2),
                 dimension_scores=scores,
                 narrative=narrative,
             )
+        except UNAVAILABLE_ERRORS as error:
+            raise _unavailable(error) from error
         except ValueError as error:
             raise HTTPException(status_code=400, detail=str(error)) from error
         except Exception as error:
             raise HTTPException(status_code=500, detail=str(error)) from error
 
+    @app.post(
+        "/api/career/navigator/stream",
+        summary="Stream a career fit analysis section by section as Server-Sent Events.",
+        response_class=StreamingResponse,
+    )
+    async def career_navigator_stream_endpoint(
+        payload: CareerNavigatorRequest,
+    ) -> StreamingResponse:
+        """Emit a ``section`` event per completed 【section】, then ``done`` with the full response."""
+
+        async def events() -> AsyncIterator[str]:
+            try:
+                with deadline(settings.career_deadline):
+                    async for event, data in career_service.stream_analyse_async(
+                        payload.job_information, payload.employee_information
+                    ):
+                        if event == "section":
+                            yield sse_event("section", data)
+                            continue
+                        fit_percentage, scores, narrative = data
+                        response = CareerNavigatorResponse(
+                            fit_percentage=round(fit_percentage, 2),
+                            dimension_scores=scores,
+                            narrative=narrative,
+                        )
+                        yield sse_event("done", response.model_dump())
+            except Exception as error:
+                yield sse_event("error", {"detail": str(error)})
+
+        # Taken last, so nothing can fail between taking the slot and the stream owning it.
+        try:
+            admission = await _hold(career_pool)
+        except ServiceOverloadedError as error:
+            raise _unavailable(error) from error
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers=EVENT_STREAM_HEADERS,
+            # Runs once the stream ends or the client goes away.
+            background=BackgroundTask(admission.aclose),
+        )
+
     @app.post("/api/learning/recommendation", response_model=LearningHubResponse)
     async def learning_hub_endpoint(
         payload: LearningHubRequest,
     ) -> LearningHubResponse:
         try:
-            recommendation = learning_service.recommend(
-                payload.course_information, payload.employee_profile
-            )
+            async with learning_pool.admit():
+                with deadline(settings.learning_deadline):
+                    recommendation = await learning_service.recommend_async(
+                        payload.course_information, payload.employee_profile
+                    )
             return LearningHubResponse(recommendation=recommendation)
+        except UNAVAILABLE_ERRORS as error:
+            raise _unavailable(error) from error
         except Exception as error:
             raise HTTPException(status_code=500, detail=str(error)) from error
 
+    @app.post(
+        "/api/learning/recommendation/stream",
+        summary="Stream a course recommendation section by section as Server-Sent Events.",
+        response_class=StreamingResponse,
+    )
+    async def learning_hub_stream_endpoint(
+        payload: LearningHubRequest,
+    ) -> StreamingResponse:
+        """Emit a ``section`` event per completed 【section】, then ``done`` with the full response."""
+
+        async def events() -> AsyncIterator[str]:
+            try:
+                with deadline(settings.learning_deadline):
+                    async for event, data in learning_service.stream_recommend_async(
+                        payload.course_information, payload.employee_profile
+                    ):
+                        if event == "section":
+                            yield sse_event("section", data)
+                            continue
+                        response = LearningHubResponse(recommendation=data)
+                        yield sse_event("done", response.model_dump())
+            except Exception as error:
+                yield sse_event("error", {"detail": str(error)})
+
+        # Taken last, so nothing can fail between taking the slot and the stream owning it.
+        try:
+            admission = await _hold(learning_pool)
+        except ServiceOverloadedError as error:
+            raise _unavailable(error) from error
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers=EVENT_STREAM_HEADERS,
+            # Runs once the stream ends or the client goes away.
+            background=BackgroundTask(admission.aclose),
+        )
+
     @app.get("/api/chatbot/recommended-questions", response_model=RecommendedQuestionsResponse)
     async def get_recommended_questions() -> RecommendedQuestionsResponse:
         """Get a list of recommended questions for the chatbot."""
@@ -238,6 +595,28 @@ def create_app() -> FastAPI:
         except Exception as error:
             raise HTTPException(status_code=500, detail=str(error)) from error
 
+    @app.get("/api/metrics", summary="Cache and index metrics.")
+    async def metrics_endpoint() -> dict[str, Any]:
+        # SQLite-backed stores count their rows; keep that off the event loop.
+        responses = await run_in_threadpool(response_cache.stats)
+        sessions = await run_in_threadpool(chat_sessions.stats)
+        return {
+            "rag": rag_service.metrics(),
+            "chatbot": chatbot_service.metrics(),
+            "sessions": sessions,
+            "admission": {pool.name: pool.stats() for pool in service_pools},
+            "responses": responses,
+            "prompts": prompt_registry.versions(),
+            "openai": {
+                "chat": {**chat_limiter.stats(), "circuit": chat_breaker.stats()},
+                "embedding": {**embed_limiter.stats(), "circuit": embed_breaker.stats()},
+                "coalescing": {
+                    "sync": client.in_flight.stats(),
+                    "async": async_client.in_flight.stats(),
+                },
+            },
+        }
+
     @app.get("/healthz")
     async def healthcheck() -> dict[str, str]:
         """Render health-check endpoint."""
@@ -28,12 +28,18 @@ class ChatbotSource(BaseModel):
 
     content: str
     similarity: float
+    source: Optional[str] = None
+    offset: Optional[int] = None
 
 
 class ChatbotRequest(BaseModel):
     """Request payload for the chatbot endpoint."""
 
     query: str
+    # Continues a server-side conversation; omit it and ``history`` to start one.
+    session_id: Optional[str] = Field(default=None, max_length=128)
+    # Stateless mode: the full prior conversation. With ``session_id`` it only
+    # seeds a session the server no longer has.
     history: Optional[List[ChatHistoryMessage]] = None
 
 
@@ -42,6 +48,7 @@ class ChatbotResponse(BaseModel):
 
     answer: str
     sources: List[ChatbotSource] = Field(default_factory=list)
+    session_id: Optional[str] = None
 
 
 class CommunityPolishRequest(BaseModel):
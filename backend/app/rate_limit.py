@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator
+
+
+class TokenBucket:
+    """Continuously refilling budget of ``rate_per_minute`` units.
+
+    Callers reserve units up front and are told how long to wait for them; the
+    balance may go negative, so concurrent callers queue behind one another in
+    arrival order instead of failing.
+    """
+
+    def __init__(self, rate_per_minute: float, *, clock: Callable[[], float] = time.monotonic):
+        self._rate = rate_per_minute / 60.0
+        self._capacity = float(rate_per_minute)
+        self._clock = clock
+        self._balance = self._capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._rate > 0
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` units and return the seconds to wait before using them."""
+        if not self.enabled:
+            return 0.0
+        # A single request larger than the bucket can never fit; charge it one full bucket.
+        amount = min(float(amount), self._capacity)
+        with self._lock:
+            now = self._clock()
+            self._balance = min(self._capacity, self._balance + (now - self._updated) * self._rate)
+            self._updated = now
+            self._balance -= amount
+            if self._balance >= 0:
+                return 0.0
+            return -self._balance / self._rate
+
+
+class ConcurrencySlots:
+    """Counting semaphore shared by worker threads and event loops.
+
+    Waiters of both kinds queue in one line in arrival order; a release hands its
+    slot straight to the next one, so threads and coroutines together never hold
+    more than ``limit`` slots.
+    """
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._used = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque[Callable[[], None]] = deque()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._used < self._limit and not self._waiters:
+                self._used += 1
+                return
+            granted = threading.Event()
+            self._waiters.append(granted.set)
+        granted.wait()
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._used < self._limit and not self._waiters:
+                self._used += 1
+                return
+            waiter = loop.create_future()
+
+            def grant() -> None:
+                loop.call_soon_threadsafe(_resolve, waiter)
+
+            self._waiters.append(grant)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = grant in self._waiters
+                if queued:
+                    self._waiters.remove(grant)
+            if not queued:
+                # The slot was handed over just as the wait was cancelled; pass it on.
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._used -= 1
+                return
+            grant = self._waiters.popleft()
+        try:
+            grant()
+        except RuntimeError:
+            # The waiter's event loop has closed; nobody is left to use the slot.
+            self.release()
+
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class DeploymentLimiter:
+    """Concurrency cap plus request and token rate limits for one Azure deployment.
+
+    The sync and asyncio paths share the ``max_concurrency`` slots and the rate
+    buckets, so mixing them never exceeds the deployment's limits.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_concurrency: int = 0,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+    ):
+        self.name = name
+        self._max_concurrency = max(0, max_concurrency)
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._slots = ConcurrencySlots(self._max_concurrency) if self._max_concurrency else None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.acquired = 0
+        self.queued_seconds = 0.0
+
+    @contextmanager
+    def acquire(self, tokens: int = 0) -> Iterator[None]:
+        started = time.perf_counter()
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            delay = self._reserve(tokens)
+            if delay > 0:
+                time.sleep(delay)
+            self._enter(time.perf_counter() - started)
+            try:
+                yield
+            finally:
+                self._exit()
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    @asynccontextmanager
+    async def acquire_async(self, tokens: int = 0) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        if self._slots is not None:
+            await self._slots.acquire_async()
+        try:
+            delay = self._reserve(tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._enter(time.perf_counter() - started)
+            try:
+                yield
+            finally:
+                self._exit()
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_concurrency": self._max_concurrency,
+            "in_flight": self.in_flight,
+            "acquired": self.acquired,
+            "queued_seconds": round(self.queued_seconds, 3),
+        }
+
+    def _reserve(self, tokens: int) -> float:
+        return max(self._requests.reserve(1), self._tokens.reserve(tokens))
+
+    def _enter(self, waited: float) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.acquired += 1
+            self.queued_seconds += waited
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterator, TypeVar
+
+import httpx
+from openai import APIConnectionError, APIStatusError
+
+T = TypeVar("T")
+
+# Status codes worth another attempt: timeouts, conflicts, throttling and server faults.
+RETRYABLE_STATUS = frozenset({408, 409, 429})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the deployment while its circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when the request's time budget runs out before the call can finish."""
+
+
+_deadline: ContextVar[float | None] = ContextVar("openai_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float | None) -> Iterator[None]:
+    """Bound every OpenAI call made inside the block by ``seconds`` of wall time.
+
+    Nested budgets never extend an outer one. ``None`` lifts any inherited
+    deadline, for background work started from within a request.
+    """
+    if seconds is None or seconds <= 0:
+        value = None
+    else:
+        value = time.monotonic() + seconds
+        current = _deadline.get()
+        if current is not None:
+            value = min(value, current)
+    token = _deadline.set(value)
+    try:
+        yield
+    finally:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            # Closed from another context, e.g. a streaming generator torn down on disconnect.
+            pass
+
+
+def remaining_budget() -> float | None:
+    """Seconds left before the current deadline, or None when unbounded."""
+    value = _deadline.get()
+    return None if value is None else value - time.monotonic()
+
+
+def _status_code(error: BaseException) -> int | None:
+    return error.status_code if isinstance(error, APIStatusError) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (APIConnectionError, httpx.TransportError)):
+        return True
+    status = _status_code(error)
+    return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+
+def is_outage(error: BaseException) -> bool:
+    """Whether ``error`` says the deployment itself is unhealthy.
+
+    Throttling is excluded: a 429 means the service is up but over quota, which
+    the retry delay already handles.
+    """
+    return is_retryable(error) and _status_code(error) != 429
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Server-requested delay from ``retry-after-ms`` or ``retry-after`` headers."""
+    if not isinstance(error, APIStatusError):
+        return None
+    headers = error.response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter, deferring to ``Retry-After`` when sent."""
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Seconds to wait after failed attempt number ``attempt`` (starting at 1)."""
+        requested = retry_after(error)
+        if requested is not None:
+            return max(0.0, requested)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Per-deployment breaker: closed, open after repeated outages, then half-open.
+
+    While open every call fails immediately. Once ``recovery_time`` has passed a
+    single probe is let through; its success closes the circuit and its failure
+    re-opens it for another ``recovery_time``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        recovery_time: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self._failure_threshold = max(0, failure_threshold)
+        self._recovery_time = recovery_time
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: float | None = None
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._failure_threshold > 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self._recovery_time:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """Admit a call or raise :class:`CircuitOpenError`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            now = self._clock()
+            wait = self._opened_at + self._recovery_time - now
+            if self._state == self.OPEN and wait <= 0:
+                self._state = self.HALF_OPEN
+                self._probe_started = None
+            if self._state == self.HALF_OPEN:
+                # A probe that never reported back (e.g. cancelled) must not wedge the breaker.
+                stale = (
+                    self._probe_started is not None
+                    and now - self._probe_started >= self._recovery_time
+                )
+                if self._probe_started is None or stale:
+                    self._probe_started = now
+                    return
+                wait = self._recovery_time
+            self.rejected += 1
+            raise CircuitOpenError(self.name, max(wait, 1.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                    print(f"Circuit breaker for {self.name} opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_started = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class ResilientCaller:
+    """Runs a deployment call under its breaker, retry policy and the current deadline.
+
+    ``operation`` receives the seconds left in the deadline (or None) so it can
+    cap its own request timeout.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, policy: RetryPolicy):
+        self.breaker = breaker
+        self.policy = policy
+
+    def call(self, operation: Callable[[float | None], T]) -> T:
+        attempt = 0
+        while True:
+            attempt += 1
+            budget = self._admit()
+            try:
+                result = operation(budget)
+            except Exception as error:
+                delay = self._after_failure(attempt, error)
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def call_async(self, operation: Callable[[float | None], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            attempt += 1
+            budget = self._admit()
+            try:
+                result = await operation(budget)
+            except Exception as error:
+                delay = self._after_failure(attempt, error)
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _admit(self) -> float | None:
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            raise DeadlineExceededError(f"Deadline exceeded before calling {self.breaker.name}")
+        self.breaker.before_call()
+        return budget
+
+    def _after_failure(self, attempt: int, error: Exception) -> float:
+        """Record ``error`` and return the delay before retrying.
+
+        Re-raises ``error`` once it cannot be retried, or raises
+        :class:`DeadlineExceededError` when the deadline leaves no time for another attempt.
+        """
+        if is_outage(error):
+            self.breaker.record_failure()
+        elif not is_retryable(error):
+            # The deployment answered, so it is healthy even though the request was bad.
+            self.breaker.record_success()
+        if not is_retryable(error):
+            raise error
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            raise DeadlineExceededError(f"Deadline exceeded calling {self.breaker.name}") from error
+        if attempt >= self.policy.max_attempts:
+            raise error
+        delay = self.policy.backoff(attempt, error)
+        if budget is not None and delay >= budget:
+            raise DeadlineExceededError(
+                f"Deadline leaves no time to retry {self.breaker.name}"
+            ) from error
+        return delay
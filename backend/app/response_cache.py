@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Protocol
+
+from .cache import TTLCache
+from .singleflight import request_key
+
+
+def canonicalise(value: Any) -> Any:
+    """Normalise a request payload so equivalent bodies hash identically.
+
+    Strings lose surrounding whitespace and empty values are dropped; key order
+    is handled by the sorted JSON encoding in :func:`request_key`.
+    """
+    if isinstance(value, Mapping):
+        items = ((str(key), canonicalise(item)) for key, item in value.items())
+        return {key: item for key, item in items if item not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        return [canonicalise(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+class ResponseStore(Protocol):
+    """Storage tier behind :class:`ResponseCache`; values are response strings."""
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def stats(self) -> Dict[str, float]: ...
+
+
+class MemoryResponseStore:
+    """Per-process LRU tier."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float | None = None):
+        self._cache: TTLCache[str, str] = TTLCache(max_entries, ttl=ttl)
+
+    def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self._cache.set(key, value)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+
+class SQLiteResponseStore:
+    """On-disk tier shared by every worker process on the host.
+
+    Rows expire after ``ttl`` seconds of wall-clock time; once the table grows
+    past ``max_entries`` the least recently read rows are deleted.
+    """
+
+    # Trim the table every this many writes instead of on each one.
+    PRUNE_EVERY = 64
+
+    def __init__(self, path: Path, *, max_entries: int = 50_000, ttl: float | None = None):
+        self._path = path
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl if ttl and ttl > 0 else None
+        self._lock = threading.Lock()
+        self._writes = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path), check_same_thread=False, timeout=5.0)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        try:
+            with self._lock, self._connection:
+                row = self._connection.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, expires_at = row
+                if expires_at is not None and expires_at < now:
+                    self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+                self._connection.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                return value
+        except sqlite3.Error as error:
+            print(f"Response cache read failed: {error}")
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        expires_at = now + self._ttl if self._ttl else None
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune(now)
+        except sqlite3.Error as error:
+            print(f"Response cache write failed: {error}")
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            (size,) = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return {
+            "size": size,
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl or 0,
+        }
+
+    def _prune(self, now: float) -> None:
+        self._connection.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+        )
+        self._connection.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+
+class ResponseCache:
+    """Caches raw model replies for endpoints that are pure functions of their input.
+
+    Keys combine the endpoint name, the prompt version and a canonical hash of
+    the request payload. Reads try the in-memory tier first, then the optional
+    shared tier, promoting shared hits into memory. The ``*_async`` methods reach
+    the shared tier from a worker thread, so a busy SQLite file never stalls the
+    event loop.
+    """
+
+    def __init__(self, memory: ResponseStore, shared: ResponseStore | None = None):
+        self._memory = memory
+        self._shared = shared
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(endpoint: str, payload: Mapping[str, Any], version: str) -> str:
+        return request_key(endpoint, version, canonicalise(payload))
+
+    @classmethod
+    def disabled(cls) -> "ResponseCache":
+        """A cache that stores nothing, for services built without one."""
+        return cls(MemoryResponseStore(0))
+
+    @property
+    def enabled(self) -> bool:
+        return self._shared is not None or bool(self._memory.stats().get("max_entries"))
+
+    def get(self, endpoint: str, key: str | None) -> str | None:
+        if key is None:
+            return None
+        value = self._memory.get(key)
+        if value is not None or self._shared is None:
+            return self._counted(endpoint, "memory_hits", value)
+        return self._promote(endpoint, key, self._shared.get(key))
+
+    async def get_async(self, endpoint: str, key: str | None) -> str | None:
+        """Asyncio variant of :meth:`get`."""
+        if key is None:
+            return None
+        value = self._memory.get(key)
+        if value is not None or self._shared is None:
+            return self._counted(endpoint, "memory_hits", value)
+        return self._promote(endpoint, key, await asyncio.to_thread(self._shared.get, key))
+
+    def remember(
+        self,
+        endpoint: str,
+        key: str | None,
+        value: str,
+        *,
+        validate: Callable[[str], Any] | None = None,
+    ) -> None:
+        """Store a model reply unless it is empty or ``validate`` raises ``ValueError``."""
+        if not self._worth_keeping(key, value, validate):
+            return
+        self._memory.set(key, value)
+        if self._shared is not None:
+            self._shared.set(key, value)
+
+    async def remember_async(
+        self,
+        endpoint: str,
+        key: str | None,
+        value: str,
+        *,
+        validate: Callable[[str], Any] | None = None,
+    ) -> None:
+        """Asyncio variant of :meth:`remember`."""
+        if not self._worth_keeping(key, value, validate):
+            return
+        self._memory.set(key, value)
+        if self._shared is not None:
+            await asyncio.to_thread(self._shared.set, key, value)
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._shared is not None:
+            self._shared.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {
+                name: {
+                    **counters,
+                    "hit_rate": round(
+                        (counters["memory_hits"] + counters["shared_hits"])
+                        / max(1, sum(counters.values())),
+                        4,
+                    ),
+                }
+                for name, counters in self._counters.items()
+            }
+        return {
+            "endpoints": endpoints,
+            "memory": self._memory.stats(),
+            "shared": self._shared.stats() if self._shared is not None else None,
+        }
+
+    @staticmethod
+    def _worth_keeping(
+        key: str | None, value: str, validate: Callable[[str], Any] | None
+    ) -> bool:
+        if key is None or not value.strip():
+            return False
+        if validate is not None:
+            # Only well-formed replies are worth replaying.
+            try:
+                validate(value)
+            except ValueError:
+                return False
+        return True
+
+    def _counted(self, endpoint: str, tier: str, value: str | None) -> str | None:
+        self._count(endpoint, tier if value is not None else "misses")
+        return value
+
+    def _promote(self, endpoint: str, key: str, value: str | None) -> str | None:
+        if value is not None:
+            self._memory.set(key, value)
+        return self._counted(endpoint, "shared_hits", value)
+
+    def _count(self, endpoint: str, field: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(
+                endpoint, {"memory_hits": 0, "shared_hits": 0, "misses": 0}
+            )
+            counters[field] += 1
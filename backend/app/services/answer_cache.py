@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    query: str
+    vector: np.ndarray
+    chunk_ids: FrozenSet[str]
+    answer: str
+    # Seconds the original completion took, credited as saved on every hit.
+    latency: float
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """Reuses chatbot answers for paraphrased questions.
+
+    A cached answer is returned when a new query's unit embedding is within
+    ``threshold`` cosine similarity of a cached one *and* retrieval produced the
+    same chunk set. The whole cache is dropped when the knowledge base index
+    version changes.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.95,
+        max_entries: int = 512,
+        ttl: float | None = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._threshold = threshold
+        self._max_entries = max(0, max_entries)
+        self._ttl = ttl if ttl and ttl > 0 else None
+        self._clock = clock
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_id = 0
+        self._index_version: str | None = None
+        self._lock = threading.Lock()
+        # Stacked vectors of ``_entries`` in iteration order, rebuilt lazily.
+        self._matrix: np.ndarray | None = None
+        self._matrix_ids: list[int] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.latency_saved = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    def lookup(
+        self,
+        vector: np.ndarray,
+        chunk_ids: Iterable[str],
+        index_version: str,
+    ) -> CachedAnswer | None:
+        chunk_set = frozenset(chunk_ids)
+        with self._lock:
+            self._check_version(index_version)
+            self._expire()
+            match = self._best_match(vector, chunk_set)
+            if match is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            entry = self._entries[match]
+            self.hits += 1
+            self.latency_saved += entry.latency
+            return entry
+
+    def store(
+        self,
+        *,
+        query: str,
+        vector: np.ndarray,
+        chunk_ids: Iterable[str],
+        answer: str,
+        latency: float,
+        index_version: str,
+    ) -> None:
+        if not self.enabled or not answer.strip():
+            return
+        with self._lock:
+            self._check_version(index_version)
+            self._entries[self._next_id] = CachedAnswer(
+                query=query,
+                vector=vector,
+                chunk_ids=frozenset(chunk_ids),
+                answer=answer,
+                latency=latency,
+                created_at=self._clock(),
+            )
+            self._next_id += 1
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self._max_entries,
+            "threshold": self._threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "latency_saved_seconds": round(self.latency_saved, 3),
+        }
+
+    def _best_match(self, vector: np.ndarray, chunk_set: FrozenSet[str]) -> int | None:
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix_ids = list(self._entries)
+            self._matrix = np.vstack([self._entries[key].vector for key in self._matrix_ids])
+        scores = self._matrix @ vector
+        for position in np.argsort(-scores):
+            if scores[position] < self._threshold:
+                break
+            key = self._matrix_ids[position]
+            if self._entries[key].chunk_ids == chunk_set:
+                return key
+        return None
+
+    def _check_version(self, index_version: str) -> None:
+        if self._index_version != index_version:
+            if self._index_version is not None and self._entries:
+                self.invalidations += 1
+            self._clear()
+            self._index_version = index_version
+
+    def _expire(self) -> None:
+        if self._ttl is None:
+            return
+        cutoff = self._clock() - self._ttl
+        expired = [key for key, entry in self._entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._matrix = None
+        self._matrix_ids = []
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
-import json
+import asyncio
 from pathlib import Path
-from typing import Dict, List, Mapping, Sequence
+from typing import Any, AsyncIterator, Dict, List, Mapping, Sequence
 
-from ..clients import OpenAIClient
+from ..clients import AsyncOpenAIClient, OpenAIClient
 from ..models import DimensionScore, EmployeeInformation, JobInformation
+from ..response_cache import ResponseCache
+from ..streaming import single_chunk
+from .json_stream import JsonFieldStream
+from .prompts import JsonTemplate, PromptRegistry, PromptTemplate
 
 
 class CareerNavigatorService:
     """Service that provides career navigation advice using AI."""
 
+    CACHE_ENDPOINT = "career_navigator"
+
     DIMENSION_WEIGHTS: Dict[str, float] = {
         "Functional Alignment": 0.30,
         "Skill Match": 0.30,
@@ -27,24 +33,12 @@ class CareerNavigatorService:
         ("long_term_advice", "【Long-Term Advice】"),
     )
 
-    def __init__(self, client: OpenAIClient, prompt_path: Path):
-        self._client = client
-        self._prompt_path = prompt_path
-
-    def analyse(
-        self,
-        job_information: JobInformation,
-        employee_information: EmployeeInformation,
-    ) -> tuple[float, List[DimensionScore], str]:
-        """Analyse job fit and provide recommendations."""
-        system_prompt = self._prompt_path.read_text(encoding="utf-8")
-
-        request_payload = {
-            "job_information": job_information.model_dump(exclude_none=True),
-            "employee_information": employee_information.model_dump(exclude_none=True),
+    # Constant part of every request payload, JSON-encoded once.
+    REQUEST_TEMPLATE = JsonTemplate(
+        {
             "dimensions": [
                 {"dimension": name, "weight": weight}
-                for name, weight in self.DIMENSION_WEIGHTS.items()
+                for name, weight in DIMENSION_WEIGHTS.items()
             ],
             "response_schema": {
                 "type": "object",
@@ -91,20 +85,141 @@ class CareerNavigatorService:
                 "Base the overall fit percentage on the weighted dimensions. If information is missing, make a reasonable inference and explain it.",
             ],
         }
+    )
 
-        response = self._client.create_chat_completion(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": json.dumps(request_payload, ensure_ascii=False),
-                },
-            ],
-            temperature=0.25,
+    def __init__(
+        self,
+        client: OpenAIClient,
+        prompt_path: Path,
+        async_client: AsyncOpenAIClient | None = None,
+        response_cache: ResponseCache | None = None,
+        prompts: PromptRegistry | None = None,
+    ):
+        self._client = client
+        self._async_client = async_client
+        self._prompt_path = prompt_path
+        self._response_cache = (
+            response_cache if response_cache is not None else ResponseCache.disabled()
         )
+        self._prompts = prompts or PromptRegistry(prompt_path.parent)
+
+    def analyse(
+        self,
+        job_information: JobInformation,
+        employee_information: EmployeeInformation,
+    ) -> tuple[float, List[DimensionScore], str]:
+        """Analyse job fit and provide recommendations."""
+        template = self._prompt()
+        messages = self._build_messages(template, job_information, employee_information)
+        cache_key = self._cache_key(job_information, employee_information, template.version)
+        response = self._response_cache.get(self.CACHE_ENDPOINT, cache_key)
+        if response is None:
+            response = self._client.create_chat_completion(messages=messages, temperature=0.25)
+            self._response_cache.remember(
+                self.CACHE_ENDPOINT, cache_key, response, validate=self._client.to_json
+            )
 
         return self._parse_response(response)
 
+    async def analyse_async(
+        self,
+        job_information: JobInformation,
+        employee_information: EmployeeInformation,
+    ) -> tuple[float, List[DimensionScore], str]:
+        """Asyncio variant of :meth:`analyse`."""
+        if self._async_client is None:
+            return await asyncio.to_thread(self.analyse, job_information, employee_information)
+
+        template = self._prompt()
+        messages = self._build_messages(template, job_information, employee_information)
+        cache_key = self._cache_key(job_information, employee_information, template.version)
+        response = await self._response_cache.get_async(self.CACHE_ENDPOINT, cache_key)
+        if response is None:
+            response = await self._async_client.create_chat_completion(
+                messages=messages,
+                temperature=0.25,
+            )
+            await self._response_cache.remember_async(
+                self.CACHE_ENDPOINT, cache_key, response, validate=self._client.to_json
+            )
+
+        return self._parse_response(response)
+
+    async def stream_analyse_async(
+        self,
+        job_information: JobInformation,
+        employee_information: EmployeeInformation,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Yield ``("section", {...})`` as each narrative section completes, then
+        ``("result", (fit_percentage, dimension_scores, narrative))`` once the reply is parsed."""
+        if self._async_client is None:
+            result = await asyncio.to_thread(self.analyse, job_information, employee_information)
+            yield "result", result
+            return
+
+        template = self._prompt()
+        messages = self._build_messages(template, job_information, employee_information)
+        cache_key = self._cache_key(job_information, employee_information, template.version)
+        cached = await self._response_cache.get_async(self.CACHE_ENDPOINT, cache_key)
+        deltas = (
+            self._async_client.stream_chat_completion(messages=messages, temperature=0.25)
+            if cached is None
+            else single_chunk(cached)
+        )
+
+        parser = JsonFieldStream(path=("sections",))
+        parts: List[str] = []
+        async for delta in deltas:
+            parts.append(delta)
+            for key, value in parser.feed(delta):
+                section = self._render_section(key, value)
+                if section is not None:
+                    yield "section", section
+
+        response = "".join(parts)
+        if cached is None:
+            await self._response_cache.remember_async(
+                self.CACHE_ENDPOINT, cache_key, response, validate=self._client.to_json
+            )
+        yield "result", self._parse_response(response)
+
+    def _cache_key(
+        self,
+        job_information: JobInformation,
+        employee_information: EmployeeInformation,
+        prompt_version: str,
+    ) -> str | None:
+        if not self._response_cache.enabled:
+            return None
+        payload = {
+            "model": self._client.chat_model,
+            "job_information": job_information.model_dump(exclude_none=True),
+            "employee_information": employee_information.model_dump(exclude_none=True),
+        }
+        return ResponseCache.make_key(self.CACHE_ENDPOINT, payload, prompt_version)
+
+    def _prompt(self) -> PromptTemplate:
+        return self._prompts.get(self._prompt_path.name)
+
+    def _build_messages(
+        self,
+        template: PromptTemplate,
+        job_information: JobInformation,
+        employee_information: EmployeeInformation,
+    ) -> List[dict]:
+        request_payload = {
+            "job_information": job_information.model_dump(exclude_none=True),
+            "employee_information": employee_information.model_dump(exclude_none=True),
+        }
+
+        return [
+            {"role": "system", "content": template.text},
+            {
+                "role": "user",
+                "content": self.REQUEST_TEMPLATE.render(request_payload),
+            },
+        ]
+
     def _parse_response(self, raw_response: str) -> tuple[float, List[DimensionScore], str]:
         """Parse the LLM response into structured data with fallbacks."""
         narrative = raw_response.strip()
@@ -159,6 +274,19 @@ class CareerNavigatorService:
 
         return "\n\n".join(parts).strip()
 
+    def _render_section(self, key: str, value: object) -> Dict[str, str] | None:
+        """Render one streamed section the same way :meth:`_format_sections` would."""
+        text = str(value or "").strip()
+        if not text:
+            return None
+        for canonical, label in self.SECTION_ORDER:
+            aliases = {canonical, canonical.replace("_", "")}
+            if canonical == "fit_percentage":
+                aliases.add("fit")
+            if key in aliases:
+                return {"key": canonical, "label": label, "content": f"**{label}**\n{text}"}
+        return None
+
     def _build_dimension_scores(
         self,
         payload: object,
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+from ..cache import TTLCache
+from ..clients import AsyncOpenAIClient, OpenAIClient
+from ..tokens import CHARS_PER_TOKEN, MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+
+
+@dataclass
+class ChatHistoryMessage:
+    role: str
+    content: str
+
+
+@dataclass
+class _Compaction:
+    """Split of an over-budget history into a summarised prefix and verbatim tail."""
+
+    older: List[ChatHistoryMessage]
+    recent: List[ChatHistoryMessage]
+    # Hash of every prefix of ``older``; ``prefix_keys[i]`` covers ``older[: i + 1]``.
+    prefix_keys: List[str]
+    summary: str | None = None
+    # Messages of ``older`` already covered by ``summary``.
+    summarized: int = 0
+
+
+def message_tokens(message: ChatHistoryMessage) -> int:
+    return MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.content)
+
+
+def summary_message(summary: str) -> ChatHistoryMessage:
+    """The history entry that stands in for the turns ``summary`` covers."""
+    return ChatHistoryMessage(role="system", content=f"Summary of the earlier conversation:\n{summary}")
+
+
+class HistoryManager:
+    """Keeps chat history within a token budget.
+
+    The newest messages are sent verbatim; older ones are folded into a rolling
+    summary. Summaries are cached by a hash of the messages they cover, so later
+    turns reuse one while the messages after it still fit, and only then extend
+    it with the messages that have aged out since.
+    """
+
+    SUMMARY_PROMPT = (
+        "You maintain a running summary of a conversation between a PSA employee and "
+        "PSA Connect, the internal assistant. Merge the new messages into the summary. "
+        "Keep names, numbers, decisions, open questions and the employee's stated goals; "
+        "drop greetings and repetition. Reply with the summary only, in plain prose."
+    )
+
+    def __init__(
+        self,
+        client: OpenAIClient | None,
+        async_client: AsyncOpenAIClient | None = None,
+        *,
+        token_budget: int = 1500,
+        recent_messages: int = 6,
+        summary_tokens: int = 300,
+        cache_size: int = 512,
+        cache_ttl: float | None = 3600.0,
+    ):
+        self._client = client
+        self._async_client = async_client
+        # 0 or less forwards history unchanged.
+        self._token_budget = token_budget
+        self._recent_messages = max(1, recent_messages)
+        self._summary_tokens = max(0, min(summary_tokens, token_budget // 2))
+        self._summaries: TTLCache[str, str] = TTLCache(cache_size, ttl=cache_ttl)
+        self._stats = {
+            "requests": 0,
+            "compacted": 0,
+            "summaries_generated": 0,
+            "summaries_reused": 0,
+            "summaries_extended": 0,
+            "summary_failures": 0,
+            "messages_summarized": 0,
+            "tokens_in": 0,
+            "tokens_out": 0,
+        }
+
+    @property
+    def token_budget(self) -> int:
+        return self._token_budget
+
+    def compact(self, history: Sequence[ChatHistoryMessage] | None) -> List[ChatHistoryMessage]:
+        """Return ``history`` fitted to the budget, summarising old turns if needed."""
+        compaction = self._plan(history)
+        if compaction is None:
+            return list(history or [])
+        if self._summary_tokens > 0 and compaction.summarized < len(compaction.older):
+            try:
+                self._store_summary(
+                    compaction,
+                    self._client.create_chat_completion(
+                        self._summary_messages(compaction),
+                        temperature=0.0,
+                        max_tokens=self._summary_tokens,
+                    ),
+                )
+            except Exception as e:
+                self._summary_failed(e)
+        return self._finish(compaction)
+
+    async def compact_async(
+        self, history: Sequence[ChatHistoryMessage] | None
+    ) -> List[ChatHistoryMessage]:
+        """Asyncio variant of :meth:`compact`."""
+        if self._async_client is None:
+            return await asyncio.to_thread(self.compact, history)
+        compaction = self._plan(history)
+        if compaction is None:
+            return list(history or [])
+        if self._summary_tokens > 0 and compaction.summarized < len(compaction.older):
+            try:
+                self._store_summary(
+                    compaction,
+                    await self._async_client.create_chat_completion(
+                        self._summary_messages(compaction),
+                        temperature=0.0,
+                        max_tokens=self._summary_tokens,
+                    ),
+                )
+            except Exception as e:
+                self._summary_failed(e)
+        return self._finish(compaction)
+
+    def cached_summary(self, history: Sequence[ChatHistoryMessage]) -> Tuple[int, str | None]:
+        """Longest cached summary of a prefix of ``history`` and how many messages it covers."""
+        messages = list(history)
+        return self._cached_summary(_prefix_keys(messages), len(messages))
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **self._stats,
+            "token_budget": self._token_budget,
+            "summary_cache_size": len(self._summaries),
+        }
+
+    def _plan(self, history: Sequence[ChatHistoryMessage] | None) -> _Compaction | None:
+        """Pick the verbatim tail and find the longest already summarised prefix."""
+        messages = list(history or [])
+        if not messages:
+            return None
+        self._stats["requests"] += 1
+        total = sum(message_tokens(message) for message in messages)
+        self._stats["tokens_in"] += total
+        if self._token_budget <= 0 or total <= self._token_budget:
+            self._stats["tokens_out"] += total
+            return None
+
+        # Room for the verbatim tail once the summary message is accounted for.
+        available = self._token_budget - self._summary_tokens - MESSAGE_OVERHEAD_TOKENS
+        keys = _prefix_keys(messages)
+        covered, summary = self._cached_summary(keys, len(messages) - 1)
+        if summary is not None and sum(message_tokens(m) for m in messages[covered:]) <= available:
+            # Everything since the last summary still fits: no new summary this turn.
+            self._stats["summaries_reused"] += 1
+            return _Compaction(messages[:covered], messages[covered:], keys[:covered], summary, covered)
+
+        recent: List[ChatHistoryMessage] = []
+        used = 0
+        for message in reversed(messages):
+            cost = message_tokens(message)
+            if len(recent) >= self._recent_messages or used + cost > available:
+                break
+            recent.append(message)
+            used += cost
+        if not recent:
+            # The newest message alone is over budget: keep its beginning.
+            newest = messages[-1]
+            chars = max(0, available - MESSAGE_OVERHEAD_TOKENS) * CHARS_PER_TOKEN
+            recent.append(ChatHistoryMessage(role=newest.role, content=newest.content[:chars]))
+        recent.reverse()
+        split = len(messages) - len(recent)
+
+        covered, summary = self._cached_summary(keys, min(covered, split))
+        if covered == split:
+            self._stats["summaries_reused"] += 1
+        elif covered:
+            self._stats["summaries_extended"] += 1
+        return _Compaction(messages[:split], recent, keys[:split], summary, covered)
+
+    def _cached_summary(self, keys: Sequence[str], longest: int) -> Tuple[int, str | None]:
+        """Longest cached summary covering at most ``longest`` leading messages."""
+        for covered in range(longest, 0, -1):
+            summary = self._summaries.get(keys[covered - 1])
+            if summary is not None:
+                return covered, summary
+        return 0, None
+
+    def _summary_messages(self, compaction: _Compaction) -> List[dict]:
+        pending = compaction.older[compaction.summarized :]
+        transcript = "\n".join(f"{message.role}: {message.content}" for message in pending)
+        previous = compaction.summary or "(none yet)"
+        return [
+            {"role": "system", "content": self.SUMMARY_PROMPT},
+            {
+                "role": "user",
+                "content": f"Summary so far:\n{previous}\n\nNew messages:\n{transcript}",
+            },
+        ]
+
+    def _store_summary(self, compaction: _Compaction, summary: str) -> None:
+        summary = summary.strip()[: self._summary_tokens * CHARS_PER_TOKEN]
+        self._summaries.set(compaction.prefix_keys[-1], summary)
+        self._stats["summaries_generated"] += 1
+        self._stats["messages_summarized"] += len(compaction.older) - compaction.summarized
+        compaction.summary = summary
+        compaction.summarized = len(compaction.older)
+
+    def _summary_failed(self, error: Exception) -> None:
+        # An older summary, if any, still covers part of the prefix; the rest is dropped.
+        print(f"Error summarising chat history: {error}")
+        self._stats["summary_failures"] += 1
+
+    def _finish(self, compaction: _Compaction) -> List[ChatHistoryMessage]:
+        messages: List[ChatHistoryMessage] = []
+        if compaction.summary:
+            messages.append(summary_message(compaction.summary))
+        messages.extend(compaction.recent)
+        self._stats["compacted"] += 1
+        self._stats["tokens_out"] += sum(message_tokens(message) for message in messages)
+        return messages
+
+
+def _prefix_keys(messages: Sequence[ChatHistoryMessage]) -> List[str]:
+    """Running hash of the conversation after each message."""
+    digest = hashlib.blake2b(digest_size=16)
+    keys: List[str] = []
+    for message in messages:
+        for part in (message.role, message.content):
+            encoded = part.encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+        keys.append(digest.copy().hexdigest())
+    return keys
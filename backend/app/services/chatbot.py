@@ -1,16 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from dataclasses import dataclass
-from typing import List, Sequence
+from typing import Any, AsyncIterator, Dict, List, Sequence
 
-from ..clients import OpenAIClient
+import numpy as np
+
+from ..clients import AsyncOpenAIClient, OpenAIClient
+from ..streaming import single_chunk
+from ..tokens import estimate_tokens
+from .answer_cache import SemanticAnswerCache
+from .chat_history import ChatHistoryMessage, HistoryManager
+from .context_packing import merge_overlapping, pack_context
 from .rag import RAGService, RetrievedChunk
 
 
 @dataclass
-class ChatHistoryMessage:
-    role: str
-    content: str
+class _CacheLookup:
+    cacheable: bool
+    chunk_ids: List[str]
+    index_version: str
+    answer: str | None = None
 
 
 class ChatbotService:
@@ -23,13 +34,208 @@ class ChatbotService:
         "Keep responses concise, factual, and friendly."
     )
 
-    def __init__(self, client: OpenAIClient, rag_service: RAGService):
+    def __init__(
+        self,
+        client: OpenAIClient,
+        rag_service: RAGService,
+        answer_cache: SemanticAnswerCache | None = None,
+        async_client: AsyncOpenAIClient | None = None,
+        context_token_budget: int = 0,
+        history_manager: HistoryManager | None = None,
+    ):
         self._client = client
+        self._async_client = async_client
         self._rag = rag_service
+        self._answer_cache = answer_cache
+        self._history = history_manager
+        # Estimated tokens of retrieved context per prompt; 0 sends everything retrieved.
+        self._context_token_budget = context_token_budget
+        self._context = {
+            "prompts": 0,
+            "chunks_retrieved": 0,
+            "chunks_sent": 0,
+            "tokens_sent": 0,
+            "tokens_saved": 0,
+        }
 
     def answer(self, query: str, history: Sequence[ChatHistoryMessage] | None = None) -> tuple[str, List[RetrievedChunk]]:
-        retrieved = self._rag.retrieve(query)
-        context = "\n\n".join(f"- {chunk.content}" for chunk in retrieved if chunk.content.strip())
+        query_vector = self._embed_query(query)
+        # Falls back to lexical retrieval when the query could not be embedded.
+        retrieved = self._rag.retrieve(query, query_vector=query_vector, embed=False)
+
+        lookup = self._lookup_cached(query_vector, retrieved, history)
+        if lookup.answer is not None:
+            return lookup.answer, retrieved
+
+        history = self._history.compact(history) if self._history is not None else history
+        messages = self._build_messages(query, retrieved, history)
+
+        started = time.perf_counter()
+        answer = self._client.create_chat_completion(messages, temperature=0.1)
+        self._store_cached(lookup, query, query_vector, answer, time.perf_counter() - started)
+        return answer, retrieved
+
+    async def answer_async(
+        self,
+        query: str,
+        history: Sequence[ChatHistoryMessage] | None = None,
+    ) -> tuple[str, List[RetrievedChunk]]:
+        """Asyncio variant of :meth:`answer`."""
+        if self._async_client is None:
+            return await asyncio.to_thread(self.answer, query, history)
+
+        query_vector = await self._embed_query_async(query)
+        # Falls back to lexical retrieval when the query could not be embedded.
+        retrieved = await self._rag.retrieve_async(query, query_vector=query_vector, embed=False)
+
+        lookup = self._lookup_cached(query_vector, retrieved, history)
+        if lookup.answer is not None:
+            return lookup.answer, retrieved
+
+        history = await self._compact_history_async(history)
+        messages = self._build_messages(query, retrieved, history)
+
+        started = time.perf_counter()
+        answer = await self._async_client.create_chat_completion(messages, temperature=0.1)
+        self._store_cached(lookup, query, query_vector, answer, time.perf_counter() - started)
+        return answer, retrieved
+
+    async def stream_answer_async(
+        self,
+        query: str,
+        history: Sequence[ChatHistoryMessage] | None = None,
+    ) -> tuple[List[RetrievedChunk], AsyncIterator[str]]:
+        """Retrieve context, then return it with an iterator over the answer's text deltas.
+
+        Retrieval finishes before this returns, so callers can fail the request
+        normally; only the completion itself is streamed.
+        """
+        if self._async_client is None:
+            answer, retrieved = await asyncio.to_thread(self.answer, query, history)
+            return retrieved, single_chunk(answer)
+
+        query_vector = await self._embed_query_async(query)
+        # Falls back to lexical retrieval when the query could not be embedded.
+        retrieved = await self._rag.retrieve_async(query, query_vector=query_vector, embed=False)
+
+        lookup = self._lookup_cached(query_vector, retrieved, history)
+        if lookup.answer is not None:
+            return retrieved, single_chunk(lookup.answer)
+
+        history = await self._compact_history_async(history)
+        messages = self._build_messages(query, retrieved, history)
+        stream = self._async_client.stream_chat_completion(messages, temperature=0.1)
+
+        async def deltas() -> AsyncIterator[str]:
+            started = time.perf_counter()
+            parts: List[str] = []
+            async for delta in stream:
+                parts.append(delta)
+                yield delta
+            self._store_cached(
+                lookup, query, query_vector, "".join(parts), time.perf_counter() - started
+            )
+
+        return retrieved, deltas()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "answer_cache": (
+                self._answer_cache.stats() if self._answer_cache is not None else None
+            ),
+            "context": dict(self._context),
+            "history": self._history.stats() if self._history is not None else None,
+        }
+
+    async def _compact_history_async(
+        self, history: Sequence[ChatHistoryMessage] | None
+    ) -> Sequence[ChatHistoryMessage] | None:
+        if self._history is None:
+            return history
+        return await self._history.compact_async(history)
+
+    def _embed_query(self, query: str) -> np.ndarray | None:
+        if not self._rag.uses_query_embeddings:
+            return None
+        try:
+            return self._rag.embed_query(query)
+        except Exception as e:
+            print(f"Error embedding query: {e}")
+            return None
+
+    async def _embed_query_async(self, query: str) -> np.ndarray | None:
+        if not self._rag.uses_query_embeddings:
+            return None
+        try:
+            return await self._rag.embed_query_async(query)
+        except Exception as e:
+            print(f"Error embedding query: {e}")
+            return None
+
+    def _lookup_cached(
+        self,
+        query_vector: np.ndarray | None,
+        retrieved: Sequence[RetrievedChunk],
+        history: Sequence[ChatHistoryMessage] | None,
+    ) -> "_CacheLookup":
+        # Only stand-alone questions are cacheable; history changes the answer.
+        cacheable = (
+            not history
+            and query_vector is not None
+            and self._answer_cache is not None
+            and self._answer_cache.enabled
+        )
+        lookup = _CacheLookup(
+            cacheable=cacheable,
+            chunk_ids=[chunk.chunk_id or chunk.content for chunk in retrieved],
+            index_version=self._rag.index_version,
+        )
+        if cacheable:
+            cached = self._answer_cache.lookup(query_vector, lookup.chunk_ids, lookup.index_version)
+            if cached is not None:
+                lookup.answer = cached.answer
+        return lookup
+
+    def _store_cached(
+        self,
+        lookup: "_CacheLookup",
+        query: str,
+        query_vector: np.ndarray | None,
+        answer: str,
+        latency: float,
+    ) -> None:
+        if not lookup.cacheable or self._answer_cache is None or query_vector is None:
+            return
+        self._answer_cache.store(
+            query=query,
+            vector=query_vector,
+            chunk_ids=lookup.chunk_ids,
+            answer=answer,
+            latency=latency,
+            index_version=lookup.index_version,
+        )
+
+    def _pack_context(self, retrieved: Sequence[RetrievedChunk]) -> List[RetrievedChunk]:
+        """Merge overlapping neighbours, then keep what fits the context token budget."""
+        packed = pack_context(merge_overlapping(retrieved), self._context_token_budget)
+        sent = sum(estimate_tokens(chunk.content) for chunk in packed)
+        self._context["prompts"] += 1
+        self._context["chunks_retrieved"] += len(retrieved)
+        self._context["chunks_sent"] += len(packed)
+        self._context["tokens_sent"] += sent
+        self._context["tokens_saved"] += max(
+            0, sum(estimate_tokens(chunk.content) for chunk in retrieved) - sent
+        )
+        return packed
+
+    def _build_messages(
+        self,
+        query: str,
+        retrieved: Sequence[RetrievedChunk],
+        history: Sequence[ChatHistoryMessage] | None,
+    ) -> List[dict]:
+        packed = self._pack_context(retrieved)
+        context = "\n\n".join(f"- {chunk.content}" for chunk in packed if chunk.content.strip())
 
         messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
 
@@ -50,6 +256,4 @@ class ChatbotService:
                 f"Question: {query}"
             )
         messages.append({"role": "user", "content": user_message})
-
-        answer = self._client.create_chat_completion(messages, temperature=0.1)
-        return answer, retrieved
+        return messages
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
-import json
+import asyncio
 from pathlib import Path
 
-from ..clients import OpenAIClient
+from ..clients import AsyncOpenAIClient, OpenAIClient
+from ..response_cache import ResponseCache
+from .prompts import JsonTemplate, PromptRegistry, PromptTemplate
 
 
 class CommunityPolishService:
     """Service that polishes community posts using AI."""
 
+    CACHE_ENDPOINT = "community_polish"
+
     _TONE_OPTIONS = {
         "professional": "Professional",
         "friendly": "Friendly",
@@ -16,47 +20,110 @@ class CommunityPolishService:
         "humorous": "Humorous",
     }
 
-    def __init__(self, client: OpenAIClient, prompt_path: Path):
+    # Constant part of every request payload, JSON-encoded once.
+    REQUEST_TEMPLATE = JsonTemplate(
+        {
+            "response": {
+                "format": "json",
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "polished_content": {
+                            "type": "string",
+                            "description": "The final polished content ready for posting.",
+                        }
+                    },
+                    "required": ["polished_content"],
+                },
+                "instructions": [
+                    "Only return the polished content text in the polished_content property.",
+                    "Do not include explanations or the original content.",
+                ],
+            },
+        }
+    )
+
+    def __init__(
+        self,
+        client: OpenAIClient,
+        prompt_path: Path,
+        async_client: AsyncOpenAIClient | None = None,
+        response_cache: ResponseCache | None = None,
+        prompts: PromptRegistry | None = None,
+    ):
         self._client = client
+        self._async_client = async_client
         self._prompt_path = prompt_path
+        self._response_cache = (
+            response_cache if response_cache is not None else ResponseCache.disabled()
+        )
+        self._prompts = prompts or PromptRegistry(prompt_path.parent)
 
     def polish(self, content: str, tone: str) -> str:
         """Polish the content according to the specified tone."""
+        template = self._prompts.get(self._prompt_path.name)
+        system_prompt, user_prompt = self._build_prompts(template, content, tone)
+        cache_key = self._cache_key(content, tone, template.version)
+        response = self._response_cache.get(self.CACHE_ENDPOINT, cache_key)
+        if response is None:
+            response = self._client.structured_completion(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+            )
+            self._response_cache.remember(
+                self.CACHE_ENDPOINT, cache_key, response, validate=self._client.to_json
+            )
+        return self._parse_response(response)
+
+    async def polish_async(self, content: str, tone: str) -> str:
+        """Asyncio variant of :meth:`polish`."""
+        if self._async_client is None:
+            return await asyncio.to_thread(self.polish, content, tone)
+
+        template = self._prompts.get(self._prompt_path.name)
+        system_prompt, user_prompt = self._build_prompts(template, content, tone)
+        cache_key = self._cache_key(content, tone, template.version)
+        response = await self._response_cache.get_async(self.CACHE_ENDPOINT, cache_key)
+        if response is None:
+            response = await self._async_client.structured_completion(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+            )
+            await self._response_cache.remember_async(
+                self.CACHE_ENDPOINT, cache_key, response, validate=self._client.to_json
+            )
+        return self._parse_response(response)
+
+    def _cache_key(self, content: str, tone: str, prompt_version: str) -> str | None:
+        if not self._response_cache.enabled:
+            return None
+        payload = {
+            "model": self._client.chat_model,
+            "content": content,
+            "tone": self._normalise_tone(tone),
+        }
+        return ResponseCache.make_key(self.CACHE_ENDPOINT, payload, prompt_version)
+
+    def _build_prompts(
+        self,
+        template: PromptTemplate,
+        content: str,
+        tone: str,
+    ) -> tuple[str, str]:
         resolved_tone = self._normalise_tone(tone)
         if not content.strip():
             raise ValueError("Content cannot be empty.")
 
-        system_prompt = self._prompt_path.read_text(encoding="utf-8")
-        user_prompt = json.dumps(
+        user_prompt = self.REQUEST_TEMPLATE.render(
             {
                 "content": content.strip(),
                 "tone_style": resolved_tone,
-                "response": {
-                    "format": "json",
-                    "schema": {
-                        "type": "object",
-                        "properties": {
-                            "polished_content": {
-                                "type": "string",
-                                "description": "The final polished content ready for posting.",
-                            }
-                        },
-                        "required": ["polished_content"],
-                    },
-                    "instructions": [
-                        "Only return the polished content text in the polished_content property.",
-                        "Do not include explanations or the original content.",
-                    ],
-                },
-            },
-            ensure_ascii=False,
+            }
         )
 
-        response = self._client.structured_completion(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-        )
+        return template.text, user_prompt
 
+    def _parse_response(self, response: str) -> str:
         try:
             result = self._client.to_json(response)
         except ValueError:
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from ..tokens import CHARS_PER_TOKEN, estimate_tokens
+
+if TYPE_CHECKING:
+    from .rag import RetrievedChunk
+
+
+def mmr_select(
+    relevance: np.ndarray,
+    vectors: np.ndarray,
+    limit: int,
+    diversity_weight: float,
+) -> np.ndarray:
+    """Maximal marginal relevance: pick ``limit`` positions, best first.
+
+    Each step takes the candidate maximising
+    ``weight * relevance - (1 - weight) * max_similarity_to_already_picked``, so a
+    near-duplicate of a chosen chunk loses to a slightly less relevant new one.
+    ``diversity_weight`` of 1.0 keeps the relevance order.
+    """
+    count = int(relevance.shape[0])
+    if limit >= count:
+        return np.arange(count)
+    if limit <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    chosen = [int(np.argmax(relevance))]
+    redundancy = vectors @ vectors[chosen[0]]
+    available = np.ones(count, dtype=bool)
+    available[chosen[0]] = False
+    while len(chosen) < limit:
+        scores = diversity_weight * relevance - (1 - diversity_weight) * redundancy
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        chosen.append(pick)
+        available[pick] = False
+        np.maximum(redundancy, vectors @ vectors[pick], out=redundancy)
+    return np.array(chosen, dtype=np.int64)
+
+
+def merge_overlapping(chunks: Sequence["RetrievedChunk"]) -> List["RetrievedChunk"]:
+    """Join chunks of the same source whose character ranges overlap.
+
+    Offsets index the normalised document, so the overlap is cut exactly. The
+    merged chunk takes the place and best similarity of its highest-ranked part.
+    """
+    ranked: List[Tuple[int, "RetrievedChunk"]] = []
+    by_source: Dict[str, List[Tuple[int, "RetrievedChunk"]]] = {}
+    for rank, chunk in enumerate(chunks):
+        if chunk.source is None or chunk.offset is None:
+            ranked.append((rank, chunk))
+        else:
+            by_source.setdefault(chunk.source, []).append((rank, chunk))
+
+    for members in by_source.values():
+        members.sort(key=lambda item: item[1].offset)
+        rank, current = members[0]
+        for next_rank, following in members[1:]:
+            end = current.offset + len(current.content)
+            if following.offset >= end:
+                ranked.append((rank, current))
+                rank, current = next_rank, following
+                continue
+            tail = following.content[end - following.offset :]
+            current = replace(
+                current,
+                content=current.content + tail,
+                similarity=max(current.similarity, following.similarity),
+                chunk_id=current.chunk_id if rank <= next_rank else following.chunk_id,
+            )
+            rank = min(rank, next_rank)
+        ranked.append((rank, current))
+
+    ranked.sort(key=lambda item: item[0])
+    return [chunk for _, chunk in ranked]
+
+
+def pack_context(chunks: Sequence["RetrievedChunk"], token_budget: int) -> List["RetrievedChunk"]:
+    """Keep chunks in rank order while their estimated tokens fit ``token_budget``.
+
+    The best chunk is always sent, cut at a word boundary if it alone is over
+    budget; a later chunk that does not fit is skipped so a smaller, lower-ranked
+    one can still be used. ``token_budget`` of 0 or less disables the limit.
+    """
+    if token_budget <= 0:
+        return list(chunks)
+    packed: List["RetrievedChunk"] = []
+    used = 0
+    for chunk in chunks:
+        cost = estimate_tokens(chunk.content)
+        if used + cost > token_budget:
+            if packed:
+                continue
+            text = chunk.content[: token_budget * CHARS_PER_TOKEN]
+            chunk = replace(chunk, content=text.rsplit(" ", 1)[0] if " " in text else text)
+            cost = estimate_tokens(chunk.content)
+        packed.append(chunk)
+        used += cost
+    return packed
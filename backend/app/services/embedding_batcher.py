@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from ..clients import OpenAIClient
+from ..resilience import CircuitOpenError
+from ..tokens import estimate_tokens
+
+
+@dataclass
+class _Batch:
+    keys: List[str]
+    texts: List[str]
+    attempts: int = 0
+
+
+@dataclass
+class EmbeddingReport:
+    """Outcome of one :meth:`EmbeddingBatcher.run`."""
+
+    embedded: int = 0
+    failed: int = 0
+    batches: int = 0
+    retried_batches: int = 0
+    failed_batches: int = 0
+    checkpoints: int = 0
+    # Set when the embedding circuit opened and the remaining batches were skipped.
+    aborted: bool = False
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+class EmbeddingBatcher:
+    """Embeds a stream of ``(key, text)`` items in concurrent, size-bounded batches.
+
+    Batches close at ``max_items`` inputs or ``max_tokens`` estimated tokens,
+    whichever comes first. Up to ``concurrency`` requests run at once (the
+    client's deployment limiter still applies), a failed batch is re-queued on
+    its own up to ``max_attempts`` times, and ``on_checkpoint`` is called every
+    ``checkpoint_interval`` seconds so finished work survives a crash.
+    """
+
+    # Keep a handful of batches planned ahead so workers never wait on the reader.
+    LOOKAHEAD = 2
+
+    def __init__(
+        self,
+        client: OpenAIClient,
+        *,
+        max_items: int = 64,
+        max_tokens: int = 32_000,
+        concurrency: int = 4,
+        max_attempts: int = 2,
+        checkpoint_interval: float = 30.0,
+    ):
+        self._client = client
+        self._max_items = max(1, max_items)
+        self._max_tokens = max(1, max_tokens)
+        self._concurrency = max(1, concurrency)
+        self._max_attempts = max(1, max_attempts)
+        self._checkpoint_interval = checkpoint_interval
+
+    def plan(self, items: Iterable[Tuple[str, str]]) -> Iterator[_Batch]:
+        """Group items into batches bounded by item count and estimated tokens."""
+        keys: List[str] = []
+        texts: List[str] = []
+        tokens = 0
+        for key, text in items:
+            cost = estimate_tokens(text)
+            if keys and (len(keys) >= self._max_items or tokens + cost > self._max_tokens):
+                yield _Batch(keys, texts)
+                keys, texts, tokens = [], [], 0
+            keys.append(key)
+            texts.append(text)
+            tokens += cost
+        if keys:
+            yield _Batch(keys, texts)
+
+    def run(
+        self,
+        items: Iterable[Tuple[str, str]],
+        *,
+        on_batch: Callable[[Dict[str, Sequence[float]]], None],
+        on_checkpoint: Callable[[], None] | None = None,
+    ) -> EmbeddingReport:
+        """Embed every item, handing each finished batch to ``on_batch``.
+
+        ``items`` is always consumed to the end, even after the run aborts, so a
+        generator with side effects (such as recording chunks) completes. Callbacks
+        run on the calling thread.
+        """
+        report = EmbeddingReport()
+        started = time.perf_counter()
+        last_checkpoint = started
+        in_flight: Dict[Future, _Batch] = {}
+        retry: Deque[_Batch] = deque()
+
+        def submit(batch: _Batch) -> None:
+            batch.attempts += 1
+            in_flight[pool.submit(self._client.create_embedding, batch.texts)] = batch
+
+        def collect() -> None:
+            nonlocal last_checkpoint
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                try:
+                    vectors = future.result()
+                except CircuitOpenError as error:
+                    report.aborted = True
+                    report.failed += len(batch.keys)
+                    report.errors.append(str(error))
+                except Exception as error:
+                    print(f"Embedding batch of {len(batch.keys)} failed (attempt {batch.attempts}): {error}")
+                    if batch.attempts < self._max_attempts and not report.aborted:
+                        report.retried_batches += 1
+                        retry.append(batch)
+                    else:
+                        report.failed_batches += 1
+                        report.failed += len(batch.keys)
+                        report.errors.append(str(error))
+                else:
+                    on_batch(dict(zip(batch.keys, vectors)))
+                    report.embedded += len(batch.keys)
+            if on_checkpoint is not None and time.perf_counter() - last_checkpoint >= self._checkpoint_interval:
+                on_checkpoint()
+                report.checkpoints += 1
+                last_checkpoint = time.perf_counter()
+
+        def fill(limit: int) -> None:
+            while retry and len(in_flight) < limit and not report.aborted:
+                submit(retry.popleft())
+
+        with ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="embed") as pool:
+            for batch in self.plan(items):
+                report.batches += 1
+                if report.aborted:
+                    report.failed += len(batch.keys)
+                    continue
+                while len(in_flight) >= self._concurrency * self.LOOKAHEAD:
+                    collect()
+                fill(self._concurrency * self.LOOKAHEAD - 1)
+                submit(batch)
+
+            while in_flight or (retry and not report.aborted):
+                fill(self._concurrency)
+                collect()
+
+        for batch in retry:
+            report.failed += len(batch.keys)
+        report.seconds = time.perf_counter() - started
+        return report
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Sequence
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """Disk-backed embedding cache keyed by the hash of each chunk's text.
+
+    Vectors live in a ``.npy`` matrix that is memory-mapped on load, with a small
+    JSON header recording the embedding model, chunking parameters and the chunk
+    hash of every row. A header that does not match the current model or chunking
+    parameters invalidates the whole store.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        model: str,
+        chunk_size: int,
+        chunk_overlap: int,
+    ):
+        self._matrix_path = path.with_name(f"{path.name}.npy")
+        self._header_path = path.with_name(f"{path.name}.json")
+        self._header = {
+            "version": self.FORMAT_VERSION,
+            "model": model,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+        }
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._matrix: np.ndarray | None = None
+        self._pending: Dict[str, np.ndarray] = {}
+        self._loaded = False
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors for the hashes that are present."""
+        with self._lock:
+            self._load()
+            found: Dict[str, np.ndarray] = {}
+            for key in hashes:
+                if key in self._pending:
+                    found[key] = self._pending[key]
+                elif key in self._rows and self._matrix is not None:
+                    found[key] = self._matrix[self._rows[key]]
+            return found
+
+    def put_many(self, vectors: Mapping[str, Sequence[float]]) -> None:
+        """Stage new vectors; they are written to disk by :meth:`save`."""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._pending[key] = np.asarray(vector, dtype=np.float32)
+
+    def save(self, keep: Iterable[str] | None = None) -> None:
+        """Persist staged vectors, optionally dropping rows not listed in ``keep``."""
+        with self._lock:
+            self._load()
+            keys = list(keep) if keep is not None else [*self._rows, *self._pending]
+            keys = list(dict.fromkeys(key for key in keys if key in self._pending or key in self._rows))
+            if not self._pending and keys == list(self._rows):
+                return
+
+            rows = [
+                self._pending[key] if key in self._pending else self._matrix[self._rows[key]]  # type: ignore[index]
+                for key in keys
+            ]
+            matrix = np.vstack(rows).astype(np.float32, copy=False) if rows else np.empty((0, 0), dtype=np.float32)
+            header = {**self._header, "hashes": keys}
+
+            self._matrix_path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_atomic(self._matrix_path, lambda handle: np.save(handle, matrix))
+            self._write_atomic(
+                self._header_path,
+                lambda handle: handle.write(json.dumps(header).encode("utf-8")),
+            )
+
+            self._pending.clear()
+            self._loaded = False
+            self._load()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        self._rows = {}
+        self._matrix = None
+
+        if not self._header_path.exists() or not self._matrix_path.exists():
+            return
+        try:
+            header = json.loads(self._header_path.read_text(encoding="utf-8"))
+            if any(header.get(key) != value for key, value in self._header.items()):
+                print(f"Ignoring stale embedding store at {self._matrix_path}")
+                return
+            matrix = np.load(self._matrix_path, mmap_mode="r")
+            hashes = header.get("hashes") or []
+            if matrix.ndim != 2 or matrix.shape[0] != len(hashes):
+                print(f"Ignoring inconsistent embedding store at {self._matrix_path}")
+                return
+        except (OSError, ValueError) as error:
+            print(f"Failed to read embedding store at {self._matrix_path}: {error}")
+            return
+
+        self._matrix = matrix
+        self._rows = {key: row for row, key in enumerate(hashes)}
+
+    @staticmethod
+    def _write_atomic(path: Path, write) -> None:
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with temp_path.open("wb") as handle:
+            write(handle)
+        os.replace(temp_path, path)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class SourceDocument:
+    """A normalised piece of a knowledge base file, read lazily."""
+
+    source: str
+    text: str
+    # Character offset of ``text`` within the normalised document it came from.
+    offset: int = 0
+
+
+@dataclass(frozen=True)
+class DocumentChunk:
+    """A chunk of a source document together with where it came from."""
+
+    content: str
+    source: str
+    offset: int
+
+
+FileSignature = Tuple[Tuple[str, int, int], ...]
+
+
+class CorpusIngestor:
+    """Streams the chatbot corpus from text/markdown files and structured CSVs.
+
+    Text files are read in paragraph-aligned segments and every CSV row becomes its
+    own document, so no file is held in memory in full while chunking.
+    """
+
+    TEXT_SUFFIXES = frozenset({".txt", ".md"})
+    SEGMENT_CHARS = 1 << 20
+
+    def __init__(
+        self,
+        *,
+        source_path: Path,
+        normaliser: Callable[[str], str],
+        chunker: Callable[[str], Iterable[Tuple[int, str]]],
+        structured_paths: Sequence[Path] = (),
+    ):
+        self._source_path = source_path
+        self._normaliser = normaliser
+        self._chunker = chunker
+        self._structured_paths = list(structured_paths)
+
+    def files(self) -> List[Path]:
+        """Return every file that currently makes up the corpus, in a stable order."""
+        if self._source_path.is_dir():
+            text_files = sorted(
+                path
+                for path in self._source_path.rglob("*")
+                if path.is_file() and path.suffix.lower() in self.TEXT_SUFFIXES
+            )
+        else:
+            text_files = [self._source_path]
+        return [*text_files, *(path for path in self._structured_paths if path.exists())]
+
+    def signature(self) -> FileSignature:
+        """Cheap change detector built from each file's path, mtime and size."""
+        entries = []
+        for path in self.files():
+            stat = path.stat()
+            entries.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def content_hash(self) -> str:
+        """Hash of every corpus file's name and bytes, read in blocks."""
+        digest = hashlib.sha256()
+        for path in self.files():
+            digest.update(str(path).encode("utf-8"))
+            with path.open("rb") as handle:
+                for block in iter(lambda: handle.read(1 << 16), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def iter_documents(self) -> Iterator[SourceDocument]:
+        for path in self.files():
+            if path.suffix.lower() == ".csv":
+                yield from self._iter_csv(path)
+            else:
+                yield from self._iter_text(path)
+
+    def iter_chunks(self) -> Iterator[DocumentChunk]:
+        for document in self.iter_documents():
+            for start, chunk in self._chunker(document.text):
+                yield DocumentChunk(
+                    content=chunk,
+                    source=document.source,
+                    offset=document.offset + start,
+                )
+
+    def _label(self, path: Path) -> str:
+        if self._source_path.is_dir() and path.is_relative_to(self._source_path):
+            return path.relative_to(self._source_path).as_posix()
+        return path.name
+
+    def _iter_text(self, path: Path) -> Iterator[SourceDocument]:
+        label = self._label(path)
+        offset = 0
+        buffer: List[str] = []
+        size = 0
+
+        def flush() -> SourceDocument | None:
+            nonlocal offset
+            text = self._normaliser("".join(buffer))
+            buffer.clear()
+            if not text:
+                return None
+            document = SourceDocument(source=label, text=text, offset=offset)
+            # Segments are joined by a paragraph break in the logical document.
+            offset += len(text) + 2
+            return document
+
+        with path.open(encoding="utf-8") as handle:
+            for line in handle:
+                buffer.append(line)
+                size += len(line)
+                # Only cut on a blank line so paragraphs are never split across segments.
+                if size >= self.SEGMENT_CHARS and not line.strip():
+                    size = 0
+                    document = flush()
+                    if document is not None:
+                        yield document
+        document = flush()
+        if document is not None:
+            yield document
+
+    def _iter_csv(self, path: Path) -> Iterator[SourceDocument]:
+        with path.open(encoding="utf-8-sig", newline="") as handle:
+            reader = csv.DictReader(handle)
+            for index, row in enumerate(reader, start=1):
+                lines = [
+                    f"{str(key).strip()}: {str(value).strip()}"
+                    for key, value in row.items()
+                    if key and value and str(value).strip()
+                ]
+                text = self._normaliser("\n".join(lines))
+                if text:
+                    yield SourceDocument(source=f"{path.name}#row{index}", text=text)
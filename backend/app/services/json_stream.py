@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+
+@dataclass
+class _Frame:
+    kind: str  # "object" or "array"
+    key: Optional[str]  # key this container was opened under in its parent
+    expecting_key: bool = True
+    current_key: Optional[str] = None
+
+
+@dataclass
+class JsonFieldStream:
+    """Incrementally scans streamed JSON and reports scalar fields as soon as they close.
+
+    Only fields whose parent object sits at ``path`` (a sequence of keys from the
+    root, e.g. ``("sections",)``) are reported. Text before the first ``{`` such
+    as a markdown code fence is ignored.
+    """
+
+    path: Sequence[str]
+    _stack: List[_Frame] = field(default_factory=list)
+    _in_string: bool = False
+    _escaped: bool = False
+    _buffer: List[str] = field(default_factory=list)
+    _scalar: List[str] = field(default_factory=list)
+    _done: bool = False
+
+    def feed(self, text: str) -> List[Tuple[str, object]]:
+        """Consume the next fragment and return ``(key, value)`` pairs completed by it."""
+        completed: List[Tuple[str, object]] = []
+        for char in text:
+            if self._done:
+                break
+            if self._in_string:
+                self._consume_string_char(char, completed)
+            else:
+                self._consume_structural_char(char, completed)
+        return completed
+
+    def _consume_string_char(self, char: str, completed: List[Tuple[str, object]]) -> None:
+        if self._escaped:
+            self._buffer.append(char)
+            self._escaped = False
+            return
+        if char == "\\":
+            self._buffer.append(char)
+            self._escaped = True
+            return
+        if char != '"':
+            self._buffer.append(char)
+            return
+
+        self._in_string = False
+        raw = "".join(self._buffer)
+        self._buffer.clear()
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            value = raw
+        frame = self._stack[-1] if self._stack else None
+        if frame is None:
+            return
+        if frame.kind == "object" and frame.expecting_key:
+            frame.current_key = value
+        else:
+            self._emit(value, completed)
+
+    def _consume_structural_char(self, char: str, completed: List[Tuple[str, object]]) -> None:
+        if not self._stack:
+            if char == "{":
+                self._stack.append(_Frame(kind="object", key=None))
+            return
+
+        frame = self._stack[-1]
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            key = frame.current_key if frame.kind == "object" else None
+            self._stack.append(_Frame(kind="object" if char == "{" else "array", key=key))
+        elif char in "}]":
+            self._flush_scalar(completed)
+            self._stack.pop()
+            if not self._stack:
+                self._done = True
+        elif char == ":":
+            frame.expecting_key = False
+        elif char == ",":
+            self._flush_scalar(completed)
+            if frame.kind == "object":
+                frame.expecting_key = True
+                frame.current_key = None
+        elif not char.isspace() and not (frame.kind == "object" and frame.expecting_key):
+            self._scalar.append(char)
+
+    def _flush_scalar(self, completed: List[Tuple[str, object]]) -> None:
+        if not self._scalar:
+            return
+        raw = "".join(self._scalar)
+        self._scalar.clear()
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        self._emit(value, completed)
+
+    def _emit(self, value: object, completed: List[Tuple[str, object]]) -> None:
+        frame = self._stack[-1]
+        if frame.kind != "object" or frame.current_key is None:
+            return
+        keys = [item.key for item in self._stack[1:]]
+        if keys == list(self.path):
+            completed.append((frame.current_key, value))
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import threading
+
+from .rag import RAGService
+
+
+class KnowledgeBaseWatcher:
+    """Background thread that polls the knowledge base and re-indexes it on change."""
+
+    def __init__(self, rag_service: RAGService, interval: float = 30.0):
+        self._rag = rag_service
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="knowledge-base-watcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            # Until the first request builds the index there is nothing to refresh.
+            if self._rag.snapshot is None:
+                continue
+            try:
+                self._rag.refresh()
+            except Exception as error:
+                print(f"Knowledge base refresh failed: {error}")
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
-import json
+import asyncio
 from pathlib import Path
-from typing import List, Mapping, Sequence
+from typing import Any, AsyncIterator, Dict, List, Mapping, Sequence
 
-from ..clients import OpenAIClient
+from ..clients import AsyncOpenAIClient, OpenAIClient
 from ..models import CourseInformation, EmployeeProfile
+from ..response_cache import ResponseCache
+from ..streaming import single_chunk
+from .json_stream import JsonFieldStream
+from .prompts import JsonTemplate, PromptRegistry, PromptTemplate
 
 
 class LearningHubService:
     """Service that provides learning recommendations using AI."""
 
+    CACHE_ENDPOINT = "learning_hub"
+
     SECTION_ORDER: Sequence[tuple[str, str]] = (
         ("course_fit_percentage", "【Course Fit Percentage】"),
         ("strengths", "【Your Strengths】"),
@@ -18,21 +24,9 @@ class LearningHubService:
         ("advice", "【Advice】"),
     )
 
-    def __init__(self, client: OpenAIClient, prompt_path: Path):
-        self._client = client
-        self._prompt_path = prompt_path
-
-    def recommend(
-        self,
-        course_information: CourseInformation,
-        employee_profile: EmployeeProfile,
-    ) -> str:
-        """Provide course recommendations based on employee profile."""
-        system_prompt = self._prompt_path.read_text(encoding="utf-8")
-
-        request_payload = {
-            "course_information": course_information.model_dump(exclude_none=True),
-            "employee_profile": employee_profile.model_dump(exclude_none=True),
+    # Constant part of every request payload, JSON-encoded once.
+    REQUEST_TEMPLATE = JsonTemplate(
+        {
             "response_schema": {
                 "type": "object",
                 "properties": {
@@ -64,20 +58,141 @@ class LearningHubService:
                 "If information is missing, infer sensibly from similar PSA roles and note assumptions.",
             ],
         }
+    )
 
-        response = self._client.create_chat_completion(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": json.dumps(request_payload, ensure_ascii=False),
-                },
-            ],
-            temperature=0.3,
+    def __init__(
+        self,
+        client: OpenAIClient,
+        prompt_path: Path,
+        async_client: AsyncOpenAIClient | None = None,
+        response_cache: ResponseCache | None = None,
+        prompts: PromptRegistry | None = None,
+    ):
+        self._client = client
+        self._async_client = async_client
+        self._prompt_path = prompt_path
+        self._response_cache = (
+            response_cache if response_cache is not None else ResponseCache.disabled()
         )
+        self._prompts = prompts or PromptRegistry(prompt_path.parent)
+
+    def recommend(
+        self,
+        course_information: CourseInformation,
+        employee_profile: EmployeeProfile,
+    ) -> str:
+        """Provide course recommendations based on employee profile."""
+        template = self._prompt()
+        messages = self._build_messages(template, course_information, employee_profile)
+        cache_key = self._cache_key(course_information, employee_profile, template.version)
+        response = self._response_cache.get(self.CACHE_ENDPOINT, cache_key)
+        if response is None:
+            response = self._client.create_chat_completion(messages=messages, temperature=0.3)
+            self._response_cache.remember(
+                self.CACHE_ENDPOINT, cache_key, response, validate=self._client.to_json
+            )
 
         return self._parse_response(response)
 
+    async def recommend_async(
+        self,
+        course_information: CourseInformation,
+        employee_profile: EmployeeProfile,
+    ) -> str:
+        """Asyncio variant of :meth:`recommend`."""
+        if self._async_client is None:
+            return await asyncio.to_thread(self.recommend, course_information, employee_profile)
+
+        template = self._prompt()
+        messages = self._build_messages(template, course_information, employee_profile)
+        cache_key = self._cache_key(course_information, employee_profile, template.version)
+        response = await self._response_cache.get_async(self.CACHE_ENDPOINT, cache_key)
+        if response is None:
+            response = await self._async_client.create_chat_completion(
+                messages=messages,
+                temperature=0.3,
+            )
+            await self._response_cache.remember_async(
+                self.CACHE_ENDPOINT, cache_key, response, validate=self._client.to_json
+            )
+
+        return self._parse_response(response)
+
+    async def stream_recommend_async(
+        self,
+        course_information: CourseInformation,
+        employee_profile: EmployeeProfile,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Yield ``("section", {...})`` as each section completes, then
+        ``("result", recommendation)`` once the reply is parsed."""
+        if self._async_client is None:
+            result = await asyncio.to_thread(self.recommend, course_information, employee_profile)
+            yield "result", result
+            return
+
+        template = self._prompt()
+        messages = self._build_messages(template, course_information, employee_profile)
+        cache_key = self._cache_key(course_information, employee_profile, template.version)
+        cached = await self._response_cache.get_async(self.CACHE_ENDPOINT, cache_key)
+        deltas = (
+            self._async_client.stream_chat_completion(messages=messages, temperature=0.3)
+            if cached is None
+            else single_chunk(cached)
+        )
+
+        parser = JsonFieldStream(path=("sections",))
+        parts: List[str] = []
+        async for delta in deltas:
+            parts.append(delta)
+            for key, value in parser.feed(delta):
+                section = self._render_section(key, value)
+                if section is not None:
+                    yield "section", section
+
+        response = "".join(parts)
+        if cached is None:
+            await self._response_cache.remember_async(
+                self.CACHE_ENDPOINT, cache_key, response, validate=self._client.to_json
+            )
+        yield "result", self._parse_response(response)
+
+    def _cache_key(
+        self,
+        course_information: CourseInformation,
+        employee_profile: EmployeeProfile,
+        prompt_version: str,
+    ) -> str | None:
+        if not self._response_cache.enabled:
+            return None
+        payload = {
+            "model": self._client.chat_model,
+            "course_information": course_information.model_dump(exclude_none=True),
+            "employee_profile": employee_profile.model_dump(exclude_none=True),
+        }
+        return ResponseCache.make_key(self.CACHE_ENDPOINT, payload, prompt_version)
+
+    def _prompt(self) -> PromptTemplate:
+        return self._prompts.get(self._prompt_path.name)
+
+    def _build_messages(
+        self,
+        template: PromptTemplate,
+        course_information: CourseInformation,
+        employee_profile: EmployeeProfile,
+    ) -> List[dict]:
+        request_payload = {
+            "course_information": course_information.model_dump(exclude_none=True),
+            "employee_profile": employee_profile.model_dump(exclude_none=True),
+        }
+
+        return [
+            {"role": "system", "content": template.text},
+            {
+                "role": "user",
+                "content": self.REQUEST_TEMPLATE.render(request_payload),
+            },
+        ]
+
     def _parse_response(self, raw_response: str) -> str:
         narrative = raw_response.strip()
         try:
@@ -106,3 +221,13 @@ class LearningHubService:
                 continue
             parts.append(f"**{label}**\n{text}")
         return "\n\n".join(parts).strip()
+
+    def _render_section(self, key: str, value: object) -> Dict[str, str] | None:
+        """Render one streamed section the same way :meth:`_format_sections` would."""
+        text = str(value or "").strip()
+        if not text:
+            return None
+        for canonical, label in self.SECTION_ORDER:
+            if key == canonical or (canonical == "course_fit_percentage" and key == "fit_percentage"):
+                return {"key": canonical, "label": label, "content": f"**{label}**\n{text}"}
+        return None
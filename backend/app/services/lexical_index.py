@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import re
+from array import array
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .vector_index import top_k
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded word tokens; acronyms and names survive as exact terms."""
+    return _TOKEN.findall(text.casefold())
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index held in flat NumPy arrays.
+
+    Postings are stored term by term (CSR layout): ``offsets[t]:offsets[t + 1]``
+    slices ``doc_ids`` and ``term_freqs`` for term ``t``. Row ids match the rows
+    of the vector index built from the same chunks.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        *,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self._vocabulary = vocabulary
+        self._offsets = offsets
+        self._doc_ids = doc_ids
+        self._term_freqs = term_freqs
+        self._count = int(doc_lengths.shape[0])
+        self._k1 = k1
+        document_freqs = np.diff(offsets).astype(np.float32)
+        self._idf = np.log1p((self._count - document_freqs + 0.5) / (document_freqs + 0.5))
+        average = float(doc_lengths.mean()) if self._count else 1.0
+        # Per-document part of the BM25 denominator, computed once.
+        self._norms = (k1 * (1 - b + b * doc_lengths / max(average, 1e-9))).astype(np.float32)
+
+    @classmethod
+    def empty(cls) -> "BM25Index":
+        return BM25IndexBuilder().build()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def terms(self) -> int:
+        return len(self._vocabulary)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self._offsets, self._doc_ids, self._term_freqs, self._idf, self._norms)
+        return sum(part.nbytes for part in arrays)
+
+    def search(self, query: str, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return up to ``limit`` ``(row_ids, scores)`` with a positive BM25 score, best first."""
+        term_ids = {self._vocabulary[term] for term in tokenize(query) if term in self._vocabulary}
+        if not term_ids or self._count == 0 or limit <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = np.zeros(self._count, dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs = self._doc_ids[start:end]
+            freqs = self._term_freqs[start:end]
+            scores[docs] += self._idf[term_id] * freqs * (self._k1 + 1) / (freqs + self._norms[docs])
+
+        row_ids = top_k(scores, limit)
+        row_ids = row_ids[scores[row_ids] > 0]
+        return row_ids, scores[row_ids]
+
+
+class BM25IndexBuilder:
+    """Accumulates postings one document at a time while the corpus is chunked."""
+
+    def __init__(self) -> None:
+        self._vocabulary: Dict[str, int] = {}
+        self._terms = array("I")
+        self._docs = array("I")
+        self._freqs = array("I")
+        self._lengths = array("I")
+
+    def add(self, text: str) -> None:
+        tokens = tokenize(text)
+        doc_id = len(self._lengths)
+        for term, freq in Counter(tokens).items():
+            self._terms.append(self._vocabulary.setdefault(term, len(self._vocabulary)))
+            self._docs.append(doc_id)
+            self._freqs.append(freq)
+        self._lengths.append(len(tokens))
+
+    def build(self, **options: float) -> BM25Index:
+        """Freeze the postings into a searchable index."""
+        terms = np.frombuffer(self._terms, dtype=np.uint32).astype(np.int64)
+        docs = np.frombuffer(self._docs, dtype=np.uint32).astype(np.int64)
+        freqs = np.frombuffer(self._freqs, dtype=np.uint32).astype(np.float32)
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float32)
+
+        order = np.argsort(terms, kind="stable")
+        counts = np.bincount(terms, minlength=len(self._vocabulary))
+        offsets = np.zeros(len(self._vocabulary) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return BM25Index(
+            dict(self._vocabulary),
+            offsets,
+            docs[order].astype(np.int32),
+            freqs[order],
+            lengths,
+            **options,
+        )
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[np.ndarray], *, k: float = 60.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fuse best-first row id lists: each row scores ``sum(1 / (k + rank))``."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row_id in enumerate(ranking.tolist(), start=1):
+            fused[row_id] = fused.get(row_id, 0.0) + 1.0 / (k + rank)
+    if not fused:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return (
+        np.array([row_id for row_id, _ in ordered], dtype=np.int64),
+        np.array([score for _, score in ordered], dtype=np.float32),
+    )
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A prompt file's text together with the revision it was read at."""
+
+    name: str
+    text: str
+    # Content hash; changes whenever the file's text does.
+    version: str
+    mtime_ns: int
+    size: int
+
+
+class PromptRegistry:
+    """Loads prompt files once and reloads one only after it changes on disk.
+
+    Each file is ``stat``-ed at most every ``check_interval`` seconds, so the
+    hot path is a dictionary lookup rather than a read.
+    """
+
+    def __init__(
+        self,
+        prompt_dir: Path,
+        *,
+        check_interval: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._prompt_dir = prompt_dir
+        self._check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._checked_at: Dict[str, float] = {}
+        self.reloads = 0
+
+    def preload(self) -> None:
+        """Read every markdown prompt up front so the first request does no I/O."""
+        if not self._prompt_dir.is_dir():
+            return
+        for path in sorted(self._prompt_dir.glob("*.md")):
+            self.get(path.name)
+
+    def get(self, name: str) -> PromptTemplate:
+        now = self._clock()
+        template = self._templates.get(name)
+        if template is not None and now - self._checked_at.get(name, 0.0) < self._check_interval:
+            return template
+
+        with self._lock:
+            template = self._templates.get(name)
+            path = self._prompt_dir / name
+            stat = path.stat()
+            self._checked_at[name] = now
+            if (
+                template is not None
+                and template.mtime_ns == stat.st_mtime_ns
+                and template.size == stat.st_size
+            ):
+                return template
+
+            text = path.read_text(encoding="utf-8")
+            if template is not None:
+                self.reloads += 1
+                print(f"Reloaded prompt {name}")
+            template = PromptTemplate(
+                name=name,
+                text=text,
+                version=hashlib.sha256(text.encode("utf-8")).hexdigest()[:16],
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+            )
+            self._templates[name] = template
+            return template
+
+    def versions(self) -> Dict[str, str]:
+        return {name: template.version for name, template in self._templates.items()}
+
+
+class JsonTemplate:
+    """A JSON object whose constant members are encoded once.
+
+    :meth:`render` encodes only the per-request members and splices them in
+    front of the pre-encoded constant ones, producing the same text as
+    ``json.dumps({**dynamic, **static}, ensure_ascii=False)``.
+    """
+
+    def __init__(self, static: Mapping[str, Any]):
+        encoded = json.dumps(dict(static), ensure_ascii=False)
+        # Keep the members without the surrounding braces.
+        self._static_members = encoded[1:-1]
+
+    def render(self, dynamic: Mapping[str, Any]) -> str:
+        members = [
+            f"{json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)}"
+            for key, value in dynamic.items()
+        ]
+        if self._static_members:
+            members.append(self._static_members)
+        return "{" + ", ".join(members) + "}"
@@ -1,22 +1,82 @@
 from __future__ import annotations
 
-import math
-from dataclasses import dataclass
+import asyncio
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 import re
-from typing import List, Sequence
+from typing import Dict, Iterator, List, Sequence, Tuple
 
-from ..clients import OpenAIClient
+import numpy as np
+
+from ..cache import TTLCache
+from ..clients import AsyncOpenAIClient, OpenAIClient
+from ..resilience import deadline
+from ..singleflight import AsyncSingleFlight
+from .embedding_batcher import EmbeddingBatcher, EmbeddingReport
+from .context_packing import mmr_select
+from .embedding_store import EmbeddingStore
+from .ingestion import CorpusIngestor, DocumentChunk, FileSignature
+from .lexical_index import BM25Index, BM25IndexBuilder, reciprocal_rank_fusion
+from .vector_index import FlatIndex, VectorIndex, build_index
 
 
 @dataclass
 class RetrievedChunk:
     content: str
     similarity: float
+    source: str | None = None
+    offset: int | None = None
+    chunk_id: str | None = None
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """An immutable view of the knowledge base index.
+
+    Retrieval reads a single snapshot reference, so a rebuilt index can be swapped
+    in while earlier requests finish against the one they started with.
+    """
+
+    signature: FileSignature
+    content_hash: str
+    # Every chunk of the corpus, whether or not it has an embedding.
+    chunks: List[DocumentChunk] = field(default_factory=list)
+    chunk_hashes: List[str] = field(default_factory=list)
+    # Search structure over row-normalised vectors of the embedded chunks only.
+    index: VectorIndex = field(
+        default_factory=lambda: FlatIndex(np.empty((0, 0), dtype=np.float32))
+    )
+    # ``chunks`` row of each ``index`` row, ascending.
+    vector_rows: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    # BM25 over every chunk, so lexical retrieval works without any embeddings.
+    lexical: BM25Index = field(default_factory=BM25Index.empty)
+    # Chunks that could not be embedded when the snapshot was built.
+    missing: int = 0
+
+    def vectors(self, row_ids: np.ndarray) -> np.ndarray:
+        """Stored vectors of chunks ``row_ids``; zero rows for chunks without an embedding."""
+        positions = np.searchsorted(self.vector_rows, row_ids)
+        positions = np.minimum(positions, len(self.vector_rows) - 1)
+        embedded = self.vector_rows[positions] == row_ids
+        found = self.index.reconstruct(positions[embedded])
+        vectors = np.zeros((len(row_ids), found.shape[1]), dtype=np.float32)
+        vectors[embedded] = found
+        return vectors
 
 
 class RAGService:
-    """Simple retrieval augmented generation helper for the PSA knowledge base."""
+    """Simple retrieval augmented generation helper for the PSA knowledge base.
+
+    ``retrieval_mode`` is ``hybrid`` (vector and BM25 rankings merged by reciprocal
+    rank fusion), ``vector`` or ``lexical``. Whenever no query embedding is
+    available, retrieval falls back to BM25 alone. With ``mmr_lambda`` below 1.0 a
+    wider pool of ``mmr_candidates`` is ranked and re-ranked by maximal marginal
+    relevance, so overlapping near-duplicate chunks do not crowd out the top-k.
+    """
+
+    RETRIEVAL_MODES = ("hybrid", "vector", "lexical")
 
     def __init__(
         self,
@@ -26,14 +86,111 @@ class RAGService:
         chunk_size: int = 700,
         chunk_overlap: int = 150,
         top_k: int = 4,
+        store: EmbeddingStore | None = None,
+        structured_paths: Sequence[Path] = (),
+        embed_batch_size: int = 64,
+        embed_batch_tokens: int = 32_000,
+        embed_concurrency: int = 4,
+        embed_checkpoint_interval: float = 30.0,
+        index_type: str = "auto",
+        ann_threshold: int = 50_000,
+        ivf_nlist: int | None = None,
+        ivf_nprobe: int = 0,
+        index_dtype: str = "float32",
+        query_cache: TTLCache[Tuple[str, str], np.ndarray] | None = None,
+        async_client: AsyncOpenAIClient | None = None,
+        retrieval_mode: str = "hybrid",
+        rrf_k: float = 60.0,
+        hybrid_candidates: int = 20,
+        query_embed_timeout: float = 0.0,
+        mmr_lambda: float = 1.0,
+        mmr_candidates: int = 12,
     ):
+        retrieval_mode = (retrieval_mode or "hybrid").lower()
+        if retrieval_mode not in self.RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported retrieval mode: {retrieval_mode}")
         self._client = client
+        self._async_client = async_client
         self._source_path = source_path
         self._chunk_size = chunk_size
         self._chunk_overlap = chunk_overlap
         self._top_k = top_k
-        self._documents: List[str] = []
-        self._embeddings: List[List[float]] | None = None
+        self._store = store
+        self._batcher = EmbeddingBatcher(
+            client,
+            max_items=embed_batch_size,
+            max_tokens=embed_batch_tokens,
+            concurrency=embed_concurrency,
+            checkpoint_interval=embed_checkpoint_interval,
+        )
+        self._last_build: EmbeddingReport | None = None
+        self._index_options = {
+            "kind": index_type,
+            "ann_threshold": ann_threshold,
+            "nlist": ivf_nlist,
+            "nprobe": ivf_nprobe,
+            "dtype": index_dtype,
+        }
+        self._ingestor = CorpusIngestor(
+            source_path=source_path,
+            normaliser=self._normalise_text,
+            chunker=self._chunk_spans,
+            structured_paths=structured_paths,
+        )
+        self._query_cache = query_cache
+        self._retrieval_mode = retrieval_mode
+        self._rrf_k = rrf_k
+        self._hybrid_candidates = max(1, hybrid_candidates)
+        self._query_embed_timeout = query_embed_timeout
+        self._mmr_lambda = min(1.0, max(0.0, mmr_lambda))
+        self._mmr_candidates = mmr_candidates
+        self._retrievals = {"hybrid": 0, "vector": 0, "lexical": 0, "lexical_fallback": 0}
+        self._snapshot: IndexSnapshot | None = None
+        # Serialises index builds; retrieval never takes it once a snapshot exists.
+        self._build_lock = threading.Lock()
+        # Concurrent first requests await one build thread instead of each parking a worker on the lock.
+        self._first_build = AsyncSingleFlight()
+
+    @property
+    def snapshot(self) -> IndexSnapshot | None:
+        return self._snapshot
+
+    @property
+    def uses_query_embeddings(self) -> bool:
+        """False in ``lexical`` mode, where retrieval never calls the embedding API."""
+        return self._retrieval_mode != "lexical"
+
+    @property
+    def index_version(self) -> str:
+        """Identifies the knowledge base content the live index was built from."""
+        snapshot = self._snapshot
+        return snapshot.content_hash if snapshot is not None else ""
+
+    def metrics(self) -> Dict[str, object]:
+        snapshot = self._snapshot
+        return {
+            "indexed_chunks": len(snapshot.chunks) if snapshot else 0,
+            "embedded_chunks": len(snapshot.index) if snapshot else 0,
+            "lexical_terms": snapshot.lexical.terms if snapshot else 0,
+            "retrieval_mode": self._retrieval_mode,
+            "retrievals": dict(self._retrievals),
+            "pending_chunks": snapshot.missing if snapshot else 0,
+            "last_build": (
+                {
+                    "embedded": self._last_build.embedded,
+                    "failed": self._last_build.failed,
+                    "batches": self._last_build.batches,
+                    "retried_batches": self._last_build.retried_batches,
+                    "aborted": self._last_build.aborted,
+                    "seconds": round(self._last_build.seconds, 3),
+                }
+                if self._last_build is not None
+                else None
+            ),
+            "query_embedding_cache": (
+                self._query_cache.stats() if self._query_cache is not None else None
+            ),
+        }
 
     def _normalise_text(self, text: str) -> str:
         """Collapse whitespace so chunking works on consistent spacing."""
@@ -44,14 +201,16 @@ class RAGService:
 
     def _chunk_text(self, text: str) -> List[str]:
         """Split the corpus into overlapping chunks of approximately chunk_size characters."""
-        normalised = self._normalise_text(text)
+        return [chunk for _, chunk in self._chunk_spans(self._normalise_text(text))]
+
+    def _chunk_spans(self, normalised: str) -> Iterator[Tuple[int, str]]:
+        """Yield ``(offset, chunk)`` pairs for text that is already normalised."""
         if not normalised:
-            return []
+            return
 
         size = max(200, self._chunk_size)
         overlap = max(0, min(self._chunk_overlap, size - 1))
 
-        chunks: List[str] = []
         start = 0
         length = len(normalised)
 
@@ -70,9 +229,9 @@ class RAGService:
                     end = start + boundary + 1
                     chunk = normalised[start:end]
 
-            chunk = chunk.strip()
-            if chunk:
-                chunks.append(chunk)
+            stripped = chunk.strip()
+            if stripped:
+                yield start + (len(chunk) - len(chunk.lstrip())), stripped
 
             if end >= length:
                 break
@@ -82,64 +241,339 @@ class RAGService:
                 next_start = end
             start = next_start
 
-        return chunks
+    def _ensure_embeddings(self) -> IndexSnapshot:
+        """确保所有文档块都有对应的嵌入向量"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
 
-    def _load_documents(self) -> List[str]:
-        """Load and chunk the knowledge base source file."""
-        if self._documents:
-            return self._documents
+        with self._build_lock:
+            if self._snapshot is None:
+                # The first build outlives whichever request triggered it; don't inherit its deadline.
+                with deadline(None):
+                    self._snapshot = self._build_snapshot(previous=None)
+            return self._snapshot
 
-        text = self._source_path.read_text(encoding="utf-8")
-        self._documents = self._chunk_text(text)
-        return self._documents
+    def refresh(self, *, force: bool = False) -> bool:
+        """Re-index the knowledge base if the source changed since the last build.
 
-    def _ensure_embeddings(self) -> None:
-        """确保所有文档块都有对应的嵌入向量"""
-        if self._embeddings is not None:
-            return
-        
-        documents = self._load_documents()
+        Only chunks whose text is new are embedded; the finished index replaces the
+        current one in a single assignment. Returns True when a new index was swapped in.
+        """
+        with self._build_lock:
+            previous = self._snapshot
+            if previous is None:
+                self._snapshot = self._build_snapshot(previous=None)
+                return True
+
+            signature = self._ingestor.signature()
+            if not force and not previous.missing and signature == previous.signature:
+                return False
+
+            content_hash = self._ingestor.content_hash()
+            if not force and not previous.missing and content_hash == previous.content_hash:
+                # Touched but unchanged; remember the new mtime and keep the index.
+                self._snapshot = replace(previous, signature=signature, content_hash=content_hash)
+                return False
+
+            snapshot = self._build_snapshot(previous=previous)
+            self._snapshot = snapshot
+            print(
+                f"Re-indexed knowledge base: {len(snapshot.chunks)} chunks "
+                f"({snapshot.missing} pending)"
+            )
+            return True
+
+    def _build_snapshot(self, *, previous: IndexSnapshot | None) -> IndexSnapshot:
+        """Stream the corpus into a new snapshot, embedding unknown chunks in batches."""
+        signature = self._ingestor.signature()
+        content_hash = self._ingestor.content_hash()
+
+        # Known vectors are reused from the store or the live index before calling the API.
+        known: Dict[str, int] = {}
+        if previous is not None:
+            known.update(
+                (previous.chunk_hashes[row], position)
+                for position, row in enumerate(previous.vector_rows.tolist())
+            )
+        # Lexical mode never searches vectors, so it indexes the text without embedding it.
+        embed = self.uses_query_embeddings
+
+        chunks: List[DocumentChunk] = []
+        hashes: List[str] = []
+        rows: Dict[str, np.ndarray] = {}
+        requested: set[str] = set()
+        lexical = BM25IndexBuilder()
+
+        def pending() -> Iterator[Tuple[str, str]]:
+            """Record every chunk and yield only those that still need an embedding."""
+            for chunk in self._ingestor.iter_chunks():
+                key = EmbeddingStore.hash_text(chunk.content)
+                chunks.append(chunk)
+                hashes.append(key)
+                lexical.add(chunk.content)
+                if not embed or key in rows or key in requested:
+                    continue
+                if self._store is not None:
+                    stored = self._store.get_many([key])
+                    if key in stored:
+                        rows[key] = stored[key]
+                        continue
+                # Without a store, decode the live index's (possibly quantised) copy.
+                if key in known and previous is not None:
+                    rows[key] = previous.index.reconstruct(np.array([known[key]]))[0]
+                    continue
+                # 只为新增或修改过的文档块获取嵌入向量
+                requested.add(key)
+                yield key, chunk.content
+
+        def on_batch(fresh: Dict[str, Sequence[float]]) -> None:
+            rows.update((key, np.asarray(vector, dtype=np.float32)) for key, vector in fresh.items())
+            if self._store is not None:
+                self._store.put_many(fresh)
+
+        def checkpoint() -> None:
+            # Persist finished batches so a crash mid-build resumes from here.
+            try:
+                self._store.save()  # type: ignore[union-attr]
+            except OSError as e:
+                print(f"Error checkpointing embedding store: {e}")
+
+        report = self._batcher.run(
+            pending(),
+            on_batch=on_batch,
+            on_checkpoint=checkpoint if self._store is not None else None,
+        )
+        self._last_build = report
+        if report.embedded or report.failed:
+            print(
+                f"Embedded {report.embedded} chunks in {report.batches} batches "
+                f"({report.failed} failed) in {report.seconds:.1f}s"
+            )
+
+        if self._store is not None and embed:
+            try:
+                self._store.save(keep=hashes)
+            except OSError as e:
+                print(f"Error saving embedding store: {e}")
+
+        available = [row for row, key in enumerate(hashes) if key in rows]
+        return IndexSnapshot(
+            signature=signature,
+            content_hash=content_hash,
+            chunks=chunks,
+            chunk_hashes=hashes,
+            index=build_index(
+                self._normalise_rows([rows[hashes[row]] for row in available]),
+                **self._index_options,
+            ),
+            vector_rows=np.array(available, dtype=np.int64),
+            lexical=lexical.build(),
+            missing=len(chunks) - len(available) if embed else 0,
+        )
+
+    @staticmethod
+    def _normalise_rows(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        """Stack vectors into a float32 matrix with unit-length rows."""
+        matrix = np.array(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.size == 0:
+            return np.empty((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Zero vectors keep a zero row so they score 0.0, as before.
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    @staticmethod
+    def _normalise_query(query: str) -> str:
+        """Canonical cache key form: case-folded, single-spaced, no trailing punctuation."""
+        return re.sub(r"\s+", " ", query.casefold()).strip().rstrip("?!.。？！ ")
+
+    def _query_cache_key(self, query: str) -> Tuple[str, str]:
+        return (self._client.embedding_model, self._normalise_query(query))
+
+    def _cached_query_vector(self, key: Tuple[str, str]) -> np.ndarray | None:
+        if self._query_cache is None:
+            return None
+        return self._query_cache.get(key)
+
+    def _remember_query_vector(
+        self, key: Tuple[str, str], embedding: Sequence[float]
+    ) -> np.ndarray | None:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0:
+            return None
+        vector = vector / norm
+        # Cached vectors are shared between requests, so make them read-only.
+        vector.setflags(write=False)
+        if self._query_cache is not None:
+            self._query_cache.set(key, vector)
+        return vector
+
+    def embed_query(self, query: str) -> np.ndarray | None:
+        """Return the unit-length embedding of ``query``, served from the cache when possible."""
+        key = self._query_cache_key(query)
+        cached = self._cached_query_vector(key)
+        if cached is not None:
+            return cached
+        # 获取查询的嵌入向量
+        with self._query_embed_deadline():
+            embedding = self._client.create_embedding([query])[0]
+        return self._remember_query_vector(key, embedding)
+
+    async def embed_query_async(self, query: str) -> np.ndarray | None:
+        if self._async_client is None:
+            return await asyncio.to_thread(self.embed_query, query)
+        key = self._query_cache_key(query)
+        cached = self._cached_query_vector(key)
+        if cached is not None:
+            return cached
+        with self._query_embed_deadline():
+            embeddings = await self._async_client.create_embedding([query])
+        return self._remember_query_vector(key, embeddings[0])
+
+    def _query_embed_deadline(self):
+        """Budget for one query embedding, so a slow API degrades to lexical retrieval."""
+        if self._query_embed_timeout > 0:
+            return deadline(self._query_embed_timeout)
+        return nullcontext()
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int | None = None,
+        *,
+        query_vector: np.ndarray | None = None,
+        embed: bool = True,
+    ) -> List[RetrievedChunk]:
+        """检索与查询最相关的文档块
+
+        Without ``query_vector`` the query is embedded here unless ``embed`` is
+        False; if that fails, or is skipped, BM25 ranking is used on its own.
+        """
+        snapshot = self._ensure_embeddings()
+        if len(snapshot.index) == 0 and len(snapshot.lexical) == 0:
+            print("Knowledge base index is empty")
+            return []
+
+        query_embedding = query_vector
+        # With no vectors to search, a query embedding would go unused.
+        if query_embedding is None and embed and self.uses_query_embeddings and len(snapshot.index):
+            try:
+                query_embedding = self.embed_query(query)
+            except Exception as e:
+                print(f"Error embedding query, using lexical retrieval: {e}")
         try:
-            # 批量获取嵌入向量
-            self._embeddings = self._client.create_embedding(documents)
-            print(f"Successfully created embeddings for {len(documents)} chunks")
+            return self._search(snapshot, query, query_embedding, top_k)
         except Exception as e:
-            print(f"Error creating embeddings: {e}")
-            self._embeddings = []
-
-    def _cosine_similarity(self, a: Sequence[float], b: Sequence[float]) -> float:
-        """计算两个向量的余弦相似度"""
-        dot_product = sum(x * y for x, y in zip(a, b))
-        norm_a = math.sqrt(sum(x * x for x in a))
-        norm_b = math.sqrt(sum(y * y for y in b))
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return dot_product / (norm_a * norm_b)
-
-    def retrieve(self, query: str, top_k: int | None = None) -> List[RetrievedChunk]:
-        """检索与查询最相关的文档块"""
-        self._ensure_embeddings()
-        if not self._embeddings:
-            print("No embeddings available")
+            print(f"Error during retrieval: {e}")
             return []
 
+    async def retrieve_async(
+        self,
+        query: str,
+        top_k: int | None = None,
+        *,
+        query_vector: np.ndarray | None = None,
+        embed: bool = True,
+    ) -> List[RetrievedChunk]:
+        """Asyncio variant of :meth:`retrieve`; the first index build runs in a worker thread."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await self._first_build.do(
+                "build", lambda: asyncio.to_thread(self._ensure_embeddings)
+            )
+        if len(snapshot.index) == 0 and len(snapshot.lexical) == 0:
+            print("Knowledge base index is empty")
+            return []
+
+        query_embedding = query_vector
+        # With no vectors to search, a query embedding would go unused.
+        if query_embedding is None and embed and self.uses_query_embeddings and len(snapshot.index):
+            try:
+                query_embedding = await self.embed_query_async(query)
+            except Exception as e:
+                print(f"Error embedding query, using lexical retrieval: {e}")
         try:
-            # 获取查询的嵌入向量
-            query_embedding = self._client.create_embedding([query])[0]
-            
-            # 计算相似度并排序
-            rankings: List[RetrievedChunk] = []
-            for chunk, embedding in zip(self._load_documents(), self._embeddings):
-                score = self._cosine_similarity(query_embedding, embedding)
-                rankings.append(RetrievedChunk(content=chunk, similarity=score))
-
-            # 按相似度排序
-            rankings.sort(key=lambda item: item.similarity, reverse=True)
-            
-            # 返回top_k个结果
-            limit = top_k or self._top_k
-            return rankings[:limit]
-            
+            return self._search(snapshot, query, query_embedding, top_k)
         except Exception as e:
             print(f"Error during retrieval: {e}")
             return []
+
+    def _search(
+        self,
+        snapshot: IndexSnapshot,
+        query: str,
+        query_embedding: np.ndarray | None,
+        top_k: int | None,
+    ) -> List[RetrievedChunk]:
+        # 返回top_k个结果
+        limit = top_k or self._top_k
+        if limit <= 0:
+            return []
+
+        # Rank a wider pool when MMR will pick a diverse ``limit`` from it.
+        depth = max(limit, self._mmr_candidates) if self._mmr_lambda < 1.0 else limit
+        if self._retrieval_mode == "lexical" or query_embedding is None or len(snapshot.index) == 0:
+            self._retrievals["lexical" if self._retrieval_mode == "lexical" else "lexical_fallback"] += 1
+            row_ids, scores = snapshot.lexical.search(query, depth)
+            # BM25 scores are unbounded; report them relative to the best match.
+            similarities = relevance = scores / scores[0] if len(scores) else scores
+        elif self._retrieval_mode == "vector" or len(snapshot.lexical) == 0:
+            self._retrievals["vector"] += 1
+            positions, similarities = snapshot.index.search(query_embedding, depth)
+            row_ids, relevance = snapshot.vector_rows[positions], similarities
+        else:
+            self._retrievals["hybrid"] += 1
+            row_ids, relevance, similarities = self._hybrid_search(
+                snapshot, query, query_embedding, depth
+            )
+
+        if len(row_ids) > limit:
+            if len(snapshot.index):
+                picked = mmr_select(relevance, snapshot.vectors(row_ids), limit, self._mmr_lambda)
+            else:
+                # No vectors to tell near-duplicates apart: keep the best ``limit``.
+                picked = np.arange(limit)
+            row_ids, similarities = row_ids[picked], similarities[picked]
+
+        results: List[RetrievedChunk] = []
+        for row_id, score in zip(row_ids.tolist(), similarities.tolist()):
+            chunk = snapshot.chunks[row_id]
+            results.append(
+                RetrievedChunk(
+                    content=chunk.content,
+                    similarity=float(score),
+                    source=chunk.source,
+                    offset=chunk.offset,
+                    chunk_id=snapshot.chunk_hashes[row_id],
+                )
+            )
+        return results
+
+    def _hybrid_search(
+        self,
+        snapshot: IndexSnapshot,
+        query: str,
+        query_embedding: np.ndarray,
+        limit: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Fuse the vector and BM25 rankings.
+
+        Returns row ids, fused scores scaled to the best hit, and cosine similarities.
+        """
+        depth = max(limit, self._hybrid_candidates)
+        positions, vector_scores = snapshot.index.search(query_embedding, depth)
+        vector_ids = snapshot.vector_rows[positions]
+        lexical_ids, _ = snapshot.lexical.search(query, depth)
+        row_ids, fused = reciprocal_rank_fusion([vector_ids, lexical_ids], k=self._rrf_k)
+        row_ids, fused = row_ids[:limit], fused[:limit]
+
+        similarities = dict(zip(vector_ids.tolist(), vector_scores.tolist()))
+        lexical_only = [row_id for row_id in row_ids.tolist() if row_id not in similarities]
+        if lexical_only:
+            vectors = snapshot.vectors(np.array(lexical_only))
+            similarities.update(zip(lexical_only, (vectors @ query_embedding).tolist()))
+        cosine = np.array([similarities[row_id] for row_id in row_ids.tolist()], dtype=np.float32)
+        return row_ids, fused / fused[0] if len(fused) else fused, cosine
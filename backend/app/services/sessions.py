@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Protocol, Sequence
+
+from ..cache import TTLCache
+from .chat_history import ChatHistoryMessage, HistoryManager, summary_message
+from .rag import RetrievedChunk
+
+
+@dataclass
+class ChatSession:
+    """Server-side state of one chatbot conversation."""
+
+    session_id: str
+    # Messages not yet folded into ``summary``, oldest first.
+    turns: List[ChatHistoryMessage] = field(default_factory=list)
+    summary: str | None = None
+    # Chunks retrieved for the latest answer.
+    chunk_ids: List[str] = field(default_factory=list)
+    updated_at: float = 0.0
+
+    def history(self) -> List[ChatHistoryMessage]:
+        """History to send with the next question: the summary, then the verbatim turns."""
+        prefix = [summary_message(self.summary)] if self.summary else []
+        return prefix + list(self.turns)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> "ChatSession":
+        payload: Dict[str, Any] = json.loads(text)
+        payload["turns"] = [ChatHistoryMessage(**turn) for turn in payload.get("turns") or []]
+        return cls(**payload)
+
+
+class SessionStore(Protocol):
+    """Storage behind :class:`ChatSessions`."""
+
+    def get(self, session_id: str) -> ChatSession | None: ...
+
+    def save(self, session: ChatSession) -> None: ...
+
+    def delete(self, session_id: str) -> None: ...
+
+    def stats(self) -> Dict[str, float]: ...
+
+
+class MemorySessionStore:
+    """Per-process LRU store; sessions expire ``ttl`` seconds after their last use."""
+
+    def __init__(self, max_entries: int = 10_000, ttl: float | None = None):
+        self._cache: TTLCache[str, str] = TTLCache(max_entries, ttl=ttl)
+
+    def get(self, session_id: str) -> ChatSession | None:
+        # Stored serialised so concurrent requests never share a mutable session.
+        text = self._cache.get(session_id)
+        return ChatSession.from_json(text) if text is not None else None
+
+    def save(self, session: ChatSession) -> None:
+        self._cache.set(session.session_id, session.to_json())
+
+    def delete(self, session_id: str) -> None:
+        self._cache.pop(session_id)
+
+    def stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+
+class SQLiteSessionStore:
+    """On-disk store shared by every worker process on the host.
+
+    Rows expire ``ttl`` seconds after their last write; once the table grows
+    past ``max_entries`` the least recently used sessions are deleted.
+    """
+
+    # Trim the table every this many writes instead of on each one.
+    PRUNE_EVERY = 64
+
+    def __init__(self, path: Path, *, max_entries: int = 100_000, ttl: float | None = None):
+        self._path = path
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl if ttl and ttl > 0 else None
+        self._lock = threading.Lock()
+        self._writes = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path), check_same_thread=False, timeout=5.0)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS chat_sessions ("
+                " session_id TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS chat_sessions_updated ON chat_sessions (updated_at)"
+            )
+
+    def get(self, session_id: str) -> ChatSession | None:
+        try:
+            with self._lock, self._connection:
+                row = self._connection.execute(
+                    "SELECT value, expires_at FROM chat_sessions WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()
+                if row is None:
+                    return None
+                value, expires_at = row
+                if expires_at is not None and expires_at < time.time():
+                    self._connection.execute(
+                        "DELETE FROM chat_sessions WHERE session_id = ?", (session_id,)
+                    )
+                    return None
+        except sqlite3.Error as error:
+            print(f"Session store read failed: {error}")
+            return None
+        return ChatSession.from_json(value)
+
+    def save(self, session: ChatSession) -> None:
+        now = time.time()
+        expires_at = now + self._ttl if self._ttl else None
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO chat_sessions (session_id, value, expires_at, updated_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (session.session_id, session.to_json(), expires_at, now),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune(now)
+        except sqlite3.Error as error:
+            print(f"Session store write failed: {error}")
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            (size,) = self._connection.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()
+        return {
+            "size": size,
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl or 0,
+        }
+
+    def _prune(self, now: float) -> None:
+        self._connection.execute(
+            "DELETE FROM chat_sessions WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+        )
+        self._connection.execute(
+            "DELETE FROM chat_sessions WHERE session_id IN ("
+            " SELECT session_id FROM chat_sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+
+class ChatSessions:
+    """Opens, updates and persists chatbot conversations.
+
+    A session holds only what the next prompt needs: once the history manager
+    has summarised older turns, the session keeps that summary and drops the
+    turns it covers, so stored state stays about the size of the history budget.
+    """
+
+    # Hard cap on verbatim turns kept when history compaction is disabled.
+    MAX_MESSAGES = 200
+
+    def __init__(self, store: SessionStore, history_manager: HistoryManager | None = None):
+        self._store = store
+        self._history = history_manager
+        self._lock = threading.Lock()
+        self._counters = {"created": 0, "resumed": 0, "expired": 0, "turns_recorded": 0}
+
+    def open(
+        self,
+        session_id: str | None,
+        seed: Sequence[ChatHistoryMessage] | None = None,
+    ) -> ChatSession:
+        """Load ``session_id``, or start a new session seeded with ``seed`` if it is unknown."""
+        if session_id:
+            session = self._store.get(session_id)
+            if session is not None:
+                self._count("resumed")
+                return session
+            self._count("expired")
+        self._count("created")
+        return ChatSession(session_id=secrets.token_urlsafe(16), turns=list(seed or []))
+
+    def record(
+        self,
+        session: ChatSession,
+        query: str,
+        answer: str,
+        retrieved: Sequence[RetrievedChunk],
+    ) -> None:
+        """Append a question and its answer, folding in any summary made for this turn."""
+        if self._history is not None:
+            covered, summary = self._history.cached_summary(session.history())
+            if summary is not None:
+                session.turns = session.history()[covered:]
+                session.summary = summary
+        session.turns.append(ChatHistoryMessage(role="user", content=query))
+        session.turns.append(ChatHistoryMessage(role="assistant", content=answer))
+        session.turns = session.turns[-self.MAX_MESSAGES :]
+        session.chunk_ids = [chunk.chunk_id or "" for chunk in retrieved]
+        session.updated_at = time.time()
+        self._store.save(session)
+        self._count("turns_recorded")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        return {**counters, "store": self._store.stats()}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
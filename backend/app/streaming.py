@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Dict
+
+# Stop proxies (nginx, Render) from buffering the stream into one response.
+EVENT_STREAM_HEADERS: Dict[str, str] = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events frame with a JSON payload."""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def single_chunk(text: str) -> AsyncIterator[str]:
+    """Present an already complete reply as a one-chunk stream."""
+    yield text
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import math
+from typing import Iterable, Mapping
+
+# Rough English average for OpenAI tokenisers; good enough for budgeting and rate limits.
+CHARS_PER_TOKEN = 4
+# Per-message framing overhead added by the chat format.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of ``text`` without loading a tokenizer."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(messages: Iterable[Mapping[str, object]]) -> int:
+    """Approximate prompt tokens of a chat ``messages`` list."""
+    total = 0
+    for message in messages:
+        total += MESSAGE_OVERHEAD_TOKENS + estimate_tokens(str(message.get("content") or ""))
+    return total
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import importlib.util
+
+import httpx
+
+from .config import Settings
+from .fake_openai import FakeOpenAIOptions, FakeOpenAITransport
+
+# Read timeout covers slow completions; connecting should fail fast.
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional ``h2`` package (``pip install httpx[http2]``)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _limits(settings: Settings) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.openai_max_connections,
+        max_keepalive_connections=settings.openai_max_keepalive,
+        keepalive_expiry=settings.openai_keepalive_expiry,
+    )
+
+
+def _fake_transport(settings: Settings) -> FakeOpenAITransport | None:
+    if not settings.uses_fake_openai:
+        return None
+    return FakeOpenAITransport(FakeOpenAIOptions.from_settings(settings))
+
+
+def create_http_client(settings: Settings) -> httpx.Client:
+    """Pooled keep-alive client shared by the sync chat and embedding SDK clients."""
+    fake = _fake_transport(settings)
+    if fake is not None:
+        return httpx.Client(timeout=DEFAULT_TIMEOUT, transport=fake)
+    return httpx.Client(
+        timeout=DEFAULT_TIMEOUT,
+        limits=_limits(settings),
+        http2=settings.openai_http2 and http2_available(),
+    )
+
+
+def create_async_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Pooled keep-alive client shared by the asyncio chat and embedding SDK clients."""
+    fake = _fake_transport(settings)
+    if fake is not None:
+        return httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, transport=fake)
+    return httpx.AsyncClient(
+        timeout=DEFAULT_TIMEOUT,
+        limits=_limits(settings),
+        http2=settings.openai_http2 and http2_available(),
+    )
+
+
+def request_timeout(budget: float | None) -> httpx.Timeout:
+    """Default timeout, shortened so a single attempt cannot outlive ``budget`` seconds."""
+    if budget is None:
+        return DEFAULT_TIMEOUT
+    budget = max(budget, 0.001)
+    return httpx.Timeout(min(DEFAULT_TIMEOUT.read, budget), connect=min(DEFAULT_TIMEOUT.connect, budget))
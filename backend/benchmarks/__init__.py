@@ -0,0 +1 @@
+# Benchmarks for the PSA AI backend
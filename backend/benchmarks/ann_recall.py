@@ -0,0 +1,99 @@
+"""Recall, latency and memory of the vector indexes against exact float32 search.
+
+Run from ``backend/``::
+
+    python -m benchmarks.ann_recall --rows 200000 --nprobe 1 4 8 16 32 --dtype float32 float16 int8
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List, Sequence, Set
+
+import numpy as np
+
+from app.services.vector_index import FlatIndex, IVFIndex, QuantizedVectors, VectorIndex
+
+
+def synthetic_vectors(rows: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centres[labels] + 0.6 * rng.standard_normal((rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def python_list_bytes(rows: int, dim: int) -> int:
+    """Approximate heap of the old ``List[List[float]]`` layout (24 B float + 8 B pointer)."""
+    return rows * (56 + dim * (24 + 8))
+
+
+def measure(
+    index: VectorIndex,
+    queries: np.ndarray,
+    exact: Sequence[Set[int]],
+    top_k: int,
+    **search_options,
+) -> tuple[float, float]:
+    hits = 0
+    started = time.perf_counter()
+    for query, truth in zip(queries, exact):
+        ids, _ = index.search(query, top_k, **search_options)
+        hits += len(truth.intersection(ids.tolist()))
+    elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    return hits / (len(queries) * top_k), elapsed_ms
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--dtype", nargs="+", default=["float32"], choices=QuantizedVectors.DTYPES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    vectors = synthetic_vectors(args.rows, args.dim, args.clusters, args.seed)
+    queries = synthetic_vectors(args.queries, args.dim, args.clusters, args.seed + 1)
+
+    truth_index = FlatIndex(vectors)
+    exact = [set(truth_index.search(query, args.top_k)[0].tolist()) for query in queries]
+    baseline_bytes = python_list_bytes(args.rows, args.dim)
+    print(
+        f"rows={args.rows} dim={args.dim} top_k={args.top_k} "
+        f"python-list heap ~{baseline_bytes / 2**20:.1f} MiB"
+    )
+    print(
+        f"{'index':<20}{'recall':>8}{'ms/query':>10}{'MiB':>10}{'vs list':>9}{'build s':>9}"
+    )
+
+    def report(label: str, index: VectorIndex, build_seconds: float, **options) -> None:
+        recall, elapsed_ms = measure(index, queries, exact, args.top_k, **options)
+        mib = index.nbytes / 2**20
+        ratio = baseline_bytes / max(1, index.nbytes)
+        print(
+            f"{label:<20}{recall:>8.3f}{elapsed_ms:>10.3f}{mib:>10.1f}"
+            f"{ratio:>8.0f}x{build_seconds:>9.2f}"
+        )
+
+    for dtype in args.dtype:
+        started = time.perf_counter()
+        flat = FlatIndex(vectors, dtype=dtype)
+        report(f"flat/{dtype}", flat, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        ivf = IVFIndex(vectors, nlist=args.nlist or None, dtype=dtype)
+        build_seconds = time.perf_counter() - started
+        for nprobe in args.nprobe:
+            report(f"ivf{ivf.nlist}/{nprobe}/{dtype}", ivf, build_seconds, nprobe=nprobe)
+
+
+if __name__ == "__main__":
+    main()
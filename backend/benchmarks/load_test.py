@@ -0,0 +1,491 @@
+"""Throughput, latency, event-loop lag and memory of every API route under load.
+
+By default the app runs in this process against the fake OpenAI backend
+(``OPENAI_BACKEND=fake``), so the numbers isolate the service's own overhead
+from model latency. Run from ``backend/``::
+
+    python -m benchmarks.load_test --concurrency 1 8 32 --requests 200 --output load.json
+    python -m benchmarks.load_test --routes chatbot career_stream --compare load.json
+    python -m benchmarks.load_test --url http://localhost:8000 --routes jobs courses
+
+Against ``--url`` the event-loop lag and memory columns describe this load
+generator rather than the server.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+QUESTIONS = [
+    "What is PSA's core business in Singapore?",
+    "Which wellness events are running this month?",
+    "How do I grow from operations into a data analytics role?",
+    "What courses help with leadership and stakeholder management?",
+    "Tell me about PSA's history and global network.",
+]
+
+EMPLOYEE = {
+    "current_role": "Operations Executive",
+    "skills": ["Terminal operations", "Excel", "Stakeholder communication"],
+    "competencies": ["Problem solving", "Teamwork"],
+    "interests": ["Data analytics", "Automation"],
+    "experience": "Four years coordinating vessel berthing and yard planning.",
+}
+
+# Metrics where a higher value is better; every other compared metric is a latency.
+HIGHER_IS_BETTER = {"throughput_rps"}
+COMPARED_METRICS = ["throughput_rps", "latency_p50_ms", "latency_p95_ms", "latency_p99_ms"]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One route and how to build the ``n``-th request body for it."""
+
+    name: str
+    method: str
+    path: str
+    payload: Callable[[str], Dict[str, Any]] | None = None
+    stream: bool = False
+
+
+def _chatbot(tag: str) -> Dict[str, Any]:
+    return {"query": f"{QUESTIONS[zlib.crc32(tag.encode()) % len(QUESTIONS)]} ({tag})"}
+
+
+def _polish(tag: str) -> Dict[str, Any]:
+    return {
+        "content": f"hi all, we wrapped up the yard automation pilot {tag} thanks for the help",
+        "tone": "Friendly",
+    }
+
+
+def _career(tag: str) -> Dict[str, Any]:
+    return {
+        "job_information": {
+            "title": f"Data Analyst {tag}",
+            "description": "Build dashboards on terminal throughput and berth productivity.",
+        },
+        "employee_information": EMPLOYEE,
+    }
+
+
+def _learning(tag: str) -> Dict[str, Any]:
+    return {
+        "course_information": {
+            "title": f"Applied Analytics for Port Operations {tag}",
+            "description": "Hands-on SQL, Python and dashboarding with terminal data.",
+        },
+        "employee_profile": EMPLOYEE,
+    }
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("chatbot", "POST", "/api/chatbot", _chatbot),
+    Scenario("chatbot_stream", "POST", "/api/chatbot/stream", _chatbot, stream=True),
+    Scenario("polish", "POST", "/api/community/polish", _polish),
+    Scenario("career", "POST", "/api/career/navigator", _career),
+    Scenario("career_stream", "POST", "/api/career/navigator/stream", _career, stream=True),
+    Scenario("learning", "POST", "/api/learning/recommendation", _learning),
+    Scenario("learning_stream", "POST", "/api/learning/recommendation/stream", _learning, stream=True),
+    Scenario("recommended_questions", "GET", "/api/chatbot/recommended-questions"),
+    Scenario("community_board", "GET", "/api/community/psa-events"),
+    Scenario("courses", "GET", "/api/learning/courses"),
+    Scenario("jobs", "GET", "/api/career/jobs"),
+    Scenario("wellness", "GET", "/api/wellness/events"),
+    Scenario("employee", "GET", "/api/employees/EMP-20001"),
+    Scenario("metrics", "GET", "/api/metrics"),
+    Scenario("healthz", "GET", "/healthz"),
+]
+
+
+class AsgiDriver:
+    """Calls an ASGI app directly, timing the first body chunk as it is sent.
+
+    httpx's ``ASGITransport`` buffers whole responses, which would hide the
+    time to first byte of the streaming routes.
+    """
+
+    def __init__(self, app: Any):
+        self._app = app
+
+    async def request(self, method: str, path: str, body: bytes | None) -> Tuple[int, float | None]:
+        path, _, query = path.partition("?")
+        payload = body or b""
+        headers = [(b"host", b"benchmark"), (b"content-length", str(len(payload)).encode())]
+        if body is not None:
+            headers.append((b"content-type", b"application/json"))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": ("benchmark", 80),
+        }
+        started = time.perf_counter()
+        finished = asyncio.Event()
+        sent_body = False
+        status = 0
+        first_byte: float | None = None
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal sent_body
+            if not sent_body:
+                sent_body = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            # Streaming responses listen for a disconnect; only report one once done.
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status, first_byte
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                if first_byte is None and message.get("body"):
+                    first_byte = time.perf_counter() - started
+                if not message.get("more_body", False):
+                    finished.set()
+
+        try:
+            await self._app(scope, receive, send)
+        finally:
+            finished.set()
+        return status, first_byte
+
+
+class HttpDriver:
+    """Sends requests to a running server over HTTP."""
+
+    def __init__(self, base_url: str, timeout: float):
+        self._client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+
+    async def request(self, method: str, path: str, body: bytes | None) -> Tuple[int, float | None]:
+        started = time.perf_counter()
+        headers = {"content-type": "application/json"} if body is not None else None
+        first_byte: float | None = None
+        async with self._client.stream(method, path, content=body, headers=headers) as response:
+            async for chunk in response.aiter_raw():
+                if first_byte is None and chunk:
+                    first_byte = time.perf_counter() - started
+            return response.status_code, first_byte
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def rss_mib() -> float | None:
+    """Resident set size of this process, where ``/proc`` is available."""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class LoopMonitor:
+    """Samples event-loop lag (how late a short sleep wakes up) and peak RSS."""
+
+    def __init__(self, interval: float = 0.01):
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+        self.lags: List[float] = []
+        self.peak_rss: float | None = None
+
+    def start(self) -> None:
+        self.lags = []
+        self.peak_rss = rss_mib()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        ticks = 0
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            self.lags.append(max(0.0, time.perf_counter() - started - self._interval))
+            ticks += 1
+            if ticks % 10 == 0:
+                rss = rss_mib()
+                if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+                    self.peak_rss = rss
+
+
+def _percentiles(values: Sequence[float], prefix: str) -> Dict[str, float | None]:
+    if not values:
+        return {f"{prefix}_{name}_ms": None for name in ("mean", "p50", "p95", "p99", "max")}
+    array = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        f"{prefix}_mean_ms": round(float(array.mean()), 3),
+        f"{prefix}_p50_ms": round(float(p50), 3),
+        f"{prefix}_p95_ms": round(float(p95), 3),
+        f"{prefix}_p99_ms": round(float(p99), 3),
+        f"{prefix}_max_ms": round(float(array.max()), 3),
+    }
+
+
+def _request_tag(index: int, distinct: int) -> str:
+    """Label making the ``index``-th body unique, or one of ``distinct`` repeating bodies."""
+    return f"#{index % distinct if distinct > 0 else index}"
+
+
+async def run_scenario(
+    driver: AsgiDriver | HttpDriver,
+    scenario: Scenario,
+    *,
+    concurrency: int,
+    requests: int,
+    distinct: int,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """Issue ``requests`` calls to one route from ``concurrency`` workers."""
+    latencies: List[float] = []
+    first_bytes: List[float] = []
+    statuses: Counter[str] = Counter()
+    counter = itertools.count()
+    monitor = LoopMonitor()
+
+    async def worker() -> None:
+        while (index := next(counter)) < requests:
+            body = None
+            if scenario.payload is not None:
+                tag = _request_tag(offset + index, distinct)
+                body = json.dumps(scenario.payload(tag)).encode("utf-8")
+            started = time.perf_counter()
+            try:
+                status, first_byte = await driver.request(scenario.method, scenario.path, body)
+                statuses[str(status)] += 1
+            except Exception as error:
+                first_byte = None
+                statuses[type(error).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+            if first_byte is not None:
+                first_bytes.append(first_byte)
+
+    rss_start = rss_mib()
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+    rss_end = rss_mib()
+
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    result: Dict[str, Any] = {
+        "route": scenario.name,
+        "method": scenario.method,
+        "path": scenario.path,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "statuses": dict(statuses),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+        **_percentiles(latencies, "latency"),
+        **_percentiles(first_bytes if scenario.stream else [], "ttfb"),
+        **_percentiles(monitor.lags, "loop_lag"),
+        "rss_start_mib": round(rss_start, 1) if rss_start is not None else None,
+        "rss_peak_mib": round(monitor.peak_rss, 1) if monitor.peak_rss is not None else None,
+        "rss_end_mib": round(rss_end, 1) if rss_end is not None else None,
+    }
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def compare(
+    results: Sequence[Dict[str, Any]],
+    baseline: Dict[str, Any],
+    threshold: float,
+) -> List[str]:
+    """Print per-metric changes against ``baseline`` and return the regressions."""
+    previous = {(row["route"], row["concurrency"]): row for row in baseline.get("results", [])}
+    regressions: List[str] = []
+    print(f"\nagainst {baseline.get('meta', {}).get('commit') or 'baseline'} (threshold {threshold:.0%})")
+    print(f"{'route':<24}{'conc':>5}" + "".join(f"{metric:>18}" for metric in COMPARED_METRICS))
+    for row in results:
+        before = previous.get((row["route"], row["concurrency"]))
+        if before is None:
+            continue
+        cells = []
+        for metric in COMPARED_METRICS:
+            old, new = before.get(metric), row.get(metric)
+            if not old or new is None:
+                cells.append(f"{'-':>18}")
+                continue
+            change = (new - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "!" if worse > threshold else " "
+            if worse > threshold:
+                regressions.append(f"{row['route']}@{row['concurrency']} {metric} {change:+.1%}")
+            cells.append(f"{change:>+16.1%}{flag:>2}")
+        print(f"{row['route']:<24}{row['concurrency']:>5}" + "".join(cells))
+    return regressions
+
+
+def _print_row(row: Dict[str, Any]) -> None:
+    def cell(value: float | None, width: int, digits: int = 1) -> str:
+        return f"{'-':>{width}}" if value is None else f"{value:>{width}.{digits}f}"
+
+    print(
+        f"{row['route']:<24}{row['concurrency']:>5}{row['errors']:>7}"
+        f"{cell(row['throughput_rps'], 10)}{cell(row['latency_p50_ms'], 9)}"
+        f"{cell(row['latency_p95_ms'], 9)}{cell(row['latency_p99_ms'], 9)}"
+        f"{cell(row['ttfb_p50_ms'], 9)}{cell(row['loop_lag_p99_ms'], 9)}"
+        f"{cell(row['rss_peak_mib'], 9)}"
+    )
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    selected = [scenario for scenario in SCENARIOS if not args.routes or scenario.name in args.routes]
+    unknown = set(args.routes or []) - {scenario.name for scenario in SCENARIOS}
+    if unknown:
+        raise SystemExit(f"Unknown routes: {', '.join(sorted(unknown))}")
+
+    results: List[Dict[str, Any]] = []
+    print(
+        f"{'route':<24}{'conc':>5}{'errors':>7}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'ttfb50':>9}{'lag p99':>9}{'rss MiB':>9}"
+    )
+
+    async def drive(driver: AsgiDriver | HttpDriver) -> None:
+        offset = 0
+        for scenario in selected:
+            # Warm-up builds the knowledge base index and fills connection pools.
+            await run_scenario(
+                driver, scenario, concurrency=1, requests=args.warmup, distinct=args.distinct, offset=offset
+            )
+            offset += args.warmup
+            for concurrency in args.concurrency:
+                row = await run_scenario(
+                    driver,
+                    scenario,
+                    concurrency=concurrency,
+                    requests=args.requests,
+                    distinct=args.distinct,
+                    offset=offset,
+                )
+                offset += args.requests
+                results.append(row)
+                _print_row(row)
+
+    if args.url:
+        driver = HttpDriver(args.url, timeout=args.timeout)
+        try:
+            await drive(driver)
+        finally:
+            await driver.aclose()
+    else:
+        from app.main import app
+
+        async with app.router.lifespan_context(app):
+            await drive(AsgiDriver(app))
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "target": args.url or "in-process",
+            "backend": os.getenv("OPENAI_BACKEND", "azure") if not args.url else None,
+            "fake_latency_ms": os.getenv("OPENAI_FAKE_LATENCY_MS"),
+            "fake_token_ms": os.getenv("OPENAI_FAKE_TOKEN_MS"),
+            "requests": args.requests,
+            "distinct": args.distinct,
+        },
+        "results": results,
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", nargs="+", help=f"subset of: {' '.join(s.name for s in SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per route and concurrency")
+    parser.add_argument("--warmup", type=int, default=3, help="sequential requests per route before measuring")
+    parser.add_argument(
+        "--distinct",
+        type=int,
+        default=0,
+        help="cycle through this many request bodies per route (0 = every body unique, defeating caches)",
+    )
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--backend", choices=["fake", "azure"], default="fake")
+    parser.add_argument("--fake-latency-ms", type=float, default=50.0)
+    parser.add_argument("--fake-token-ms", type=float, default=1.0)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="earlier --output file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        # Must be set before the app (and its settings) are imported.
+        os.environ["OPENAI_BACKEND"] = args.backend
+        os.environ["OPENAI_FAKE_LATENCY_MS"] = str(args.fake_latency_ms)
+        os.environ["OPENAI_FAKE_TOKEN_MS"] = str(args.fake_token_ms)
+
+    report = asyncio.run(run(args))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nwrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(report["results"], baseline, args.threshold)
+        if regressions:
+            print("\nregressions:\n  " + "\n  ".join(regressions))
+            if args.fail_on_regression:
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
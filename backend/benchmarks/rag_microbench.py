@@ -0,0 +1,338 @@
+"""Scaling of knowledge base ingestion, index builds and retrieval with corpus size.
+
+Writes a synthetic corpus of each requested size, streams it through the same
+``CorpusIngestor`` path ``RAGService`` uses, then builds every index backend over
+random clustered embeddings plus the BM25 index, and times hybrid
+``RAGService.retrieve``. Run from ``backend/``::
+
+    python -m benchmarks.rag_microbench --sizes 1MB 10MB 100MB 1GB --max-vectors 100000
+    python -m benchmarks.rag_microbench --sizes 10MB --index flat ivf --dtype float32 int8
+
+Embedding ``n`` chunks of a 1 GB corpus would not fit in memory, so index stages
+use at most ``--max-vectors`` rows and say so in the ``rows`` column.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from app.services.embedding_store import EmbeddingStore
+from app.services.ingestion import CorpusIngestor, DocumentChunk
+from app.services.lexical_index import BM25Index, BM25IndexBuilder
+from app.services.rag import IndexSnapshot, RAGService
+from app.services.vector_index import QuantizedVectors, build_index
+from benchmarks.ann_recall import synthetic_vectors
+
+_SIZE = re.compile(r"^(\d+(?:\.\d+)?)\s*([KMG]?B?)$", re.IGNORECASE)
+_UNITS = {"": 1, "B": 1, "K": 2**10, "KB": 2**10, "M": 2**20, "MB": 2**20, "G": 2**30, "GB": 2**30}
+
+
+def parse_size(text: str) -> int:
+    match = _SIZE.match(text.strip())
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Invalid size: {text!r} (expected e.g. 10MB or 1GB)")
+    number, unit = match.groups()
+    return int(float(number) * _UNITS[unit.upper()])
+
+
+def write_corpus(path: Path, size: int, seed: int) -> None:
+    """Write about ``size`` bytes of prose-like paragraphs with untidy whitespace."""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    vocabulary = ["".join(rng.choice(letters, size=rng.integers(2, 11))) for _ in range(5000)]
+
+    paragraphs = []
+    for _ in range(2048):
+        sentences = []
+        for _ in range(rng.integers(2, 9)):
+            words = rng.choice(vocabulary, size=rng.integers(6, 24))
+            sentences.append(" ".join(words).capitalize() + rng.choice([".", ".", "?", "!"]))
+        # Double spaces, tabs and CRLF line breaks exercise the whitespace normaliser.
+        separator = rng.choice([" ", "  ", " \t", "\r\n"])
+        paragraphs.append(separator.join(sentences) + rng.choice(["\n\n", "\n\n\n\n"]))
+
+    written = 0
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        while written < size:
+            block = "".join(paragraphs[index] for index in rng.integers(0, len(paragraphs), 256))
+            handle.write(block)
+            written += len(block)
+
+
+class _Timed:
+    """Accumulates the time spent inside a function or the generator it returns."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def call(self, fn):
+        def wrapper(*args):
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self.seconds += time.perf_counter() - started
+
+        return wrapper
+
+    def generator(self, fn):
+        def wrapper(*args) -> Iterator[Any]:
+            iterator = iter(fn(*args))
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    self.seconds += time.perf_counter() - started
+                    return
+                self.seconds += time.perf_counter() - started
+                yield item
+
+        return wrapper
+
+
+def bench_ingestion(
+    service: RAGService, path: Path, keep: int
+) -> Tuple[Dict[str, float], List[DocumentChunk], List[str], BM25Index]:
+    """Stream ``path`` through normalise, chunk, hash and BM25; keep the first ``keep`` chunks."""
+    normalise = _Timed()
+    chunking = _Timed()
+    ingestor = CorpusIngestor(
+        source_path=path,
+        normaliser=normalise.call(service._normalise_text),
+        chunker=chunking.generator(service._chunk_spans),
+    )
+    kept: List[DocumentChunk] = []
+    hashes: List[str] = []
+    count = 0
+    text_bytes = 0
+    hash_seconds = 0.0
+    lexical = BM25IndexBuilder()
+    lexical_seconds = 0.0
+    started = time.perf_counter()
+    for chunk in ingestor.iter_chunks():
+        count += 1
+        text_bytes += sys.getsizeof(chunk.content)
+        before = time.perf_counter()
+        key = EmbeddingStore.hash_text(chunk.content)
+        hash_seconds += time.perf_counter() - before
+        if len(kept) < keep:
+            kept.append(chunk)
+            hashes.append(key)
+            before = time.perf_counter()
+            lexical.add(chunk.content)
+            lexical_seconds += time.perf_counter() - before
+    total = time.perf_counter() - started
+    before = time.perf_counter()
+    lexical_index = lexical.build()
+    lexical_seconds += time.perf_counter() - before
+
+    mib = path.stat().st_size / 2**20
+    metadata = sys.getsizeof(kept[0]) + sys.getsizeof(hashes[0]) + 16 if kept else 0
+    return (
+        {
+            "corpus_mib": round(mib, 1),
+            "chunks": count,
+            "normalise_mib_s": round(mib / normalise.seconds, 1) if normalise.seconds else None,
+            "chunk_mib_s": round(mib / chunking.seconds, 1) if chunking.seconds else None,
+            "chunks_per_s": round(count / chunking.seconds) if chunking.seconds else None,
+            "hash_chunks_per_s": round(count / hash_seconds) if hash_seconds else None,
+            "ingest_mib_s": round(mib / total, 1) if total else None,
+            "ingest_seconds": round(total, 2),
+            # BM25 covers the same (capped) chunks as the vector indexes.
+            "bm25_seconds": round(lexical_seconds, 2),
+            "bm25_bytes_per_chunk": round(lexical_index.nbytes / max(1, len(kept))),
+            # Python object sizes of a chunk's text and of its DocumentChunk, hash and list slots.
+            "text_bytes_per_chunk": round(text_bytes / max(1, count)),
+            "meta_bytes_per_chunk": metadata,
+        },
+        kept,
+        hashes,
+        lexical_index,
+    )
+
+
+def bench_retrieval(
+    service: RAGService,
+    chunks: List[DocumentChunk],
+    hashes: List[str],
+    lexical: BM25Index,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    query_texts: List[str],
+    *,
+    kind: str,
+    dtype: str,
+    top_k: int,
+    nprobe: int,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    index = build_index(vectors, kind=kind, nprobe=nprobe, dtype=dtype, ann_threshold=len(vectors) + 1)
+    build_seconds = time.perf_counter() - started
+    service._snapshot = IndexSnapshot(
+        signature=(),
+        content_hash="benchmark",
+        chunks=chunks,
+        chunk_hashes=hashes,
+        index=index,
+        vector_rows=np.arange(len(chunks), dtype=np.int64),
+        lexical=lexical,
+    )
+
+    search_times = []
+    lexical_times = []
+    retrieve_times = []
+    for query, text in zip(queries, query_texts):
+        before = time.perf_counter()
+        index.search(query, top_k)
+        search_times.append(time.perf_counter() - before)
+        before = time.perf_counter()
+        lexical.search(text, top_k)
+        lexical_times.append(time.perf_counter() - before)
+        before = time.perf_counter()
+        service.retrieve(text, top_k, query_vector=query)
+        retrieve_times.append(time.perf_counter() - before)
+
+    search_ms = np.asarray(search_times) * 1000
+    retrieve_ms = np.asarray(retrieve_times) * 1000
+    return {
+        "index": kind,
+        "dtype": dtype,
+        "rows": len(vectors),
+        "build_seconds": round(build_seconds, 3),
+        "vector_bytes_per_chunk": round(index.nbytes / max(1, len(vectors))),
+        "search_p50_ms": round(float(np.percentile(search_ms, 50)), 3),
+        "bm25_p50_ms": round(float(np.percentile(np.asarray(lexical_times) * 1000, 50)), 3),
+        "retrieve_p50_ms": round(float(np.percentile(retrieve_ms, 50)), 3),
+        "retrieve_p99_ms": round(float(np.percentile(retrieve_ms, 99)), 3),
+    }
+
+
+def run_size(size: int, args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    path = workdir / f"corpus-{size}.txt"
+    started = time.perf_counter()
+    write_corpus(path, size, args.seed)
+    generated = time.perf_counter() - started
+
+    service = RAGService(
+        client=None,  # type: ignore[arg-type]  # retrieval is given query vectors directly
+        source_path=path,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+    )
+    ingestion, chunks, hashes, lexical = bench_ingestion(service, path, args.max_vectors)
+    ingestion["generate_seconds"] = round(generated, 2)
+    if not args.keep:
+        path.unlink()
+
+    rows = len(chunks)
+    vectors = synthetic_vectors(rows, args.dim, min(args.clusters, max(1, rows)), args.seed)
+    queries = synthetic_vectors(args.queries, args.dim, min(args.clusters, max(1, rows)), args.seed + 1)
+    # Keyword queries are a few words lifted from random chunks.
+    rng = np.random.default_rng(args.seed)
+    query_texts = [
+        " ".join(chunks[row].content.split()[:5]) if chunks else ""
+        for row in rng.integers(0, max(1, rows), args.queries)
+    ]
+    retrieval = [
+        bench_retrieval(
+            service,
+            chunks,
+            hashes,
+            lexical,
+            vectors,
+            queries,
+            query_texts,
+            kind=kind,
+            dtype=dtype,
+            top_k=args.top_k,
+            nprobe=args.nprobe,
+        )
+        for kind in args.index
+        for dtype in args.dtype
+    ]
+    return {"size_bytes": size, "ingestion": ingestion, "retrieval": retrieval}
+
+
+def _print_ingestion(rows: Iterable[Dict[str, Any]]) -> None:
+    print(
+        f"{'corpus MiB':>11}{'chunks':>10}{'norm MiB/s':>11}{'chunk MiB/s':>12}"
+        f"{'chunks/s':>10}{'hash/s':>10}{'ingest s':>10}{'text B':>8}{'meta B':>8}"
+        f"{'bm25 s':>8}{'bm25 B':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row['corpus_mib']:>11.1f}{row['chunks']:>10}{row['normalise_mib_s'] or 0:>11.1f}"
+            f"{row['chunk_mib_s'] or 0:>12.1f}{row['chunks_per_s'] or 0:>10}"
+            f"{row['hash_chunks_per_s'] or 0:>10}{row['ingest_seconds']:>10.2f}"
+            f"{row['text_bytes_per_chunk']:>8}{row['meta_bytes_per_chunk']:>8}"
+            f"{row['bm25_seconds']:>8.2f}{row['bm25_bytes_per_chunk']:>8}"
+        )
+
+
+def _print_retrieval(results: Iterable[Dict[str, Any]]) -> None:
+    print(
+        f"{'corpus MiB':>11}{'index':>8}{'dtype':>9}{'rows':>9}{'build s':>9}"
+        f"{'vec B':>7}{'search50':>10}{'bm25 50':>9}{'retr50':>9}{'retr99':>9}"
+    )
+    for result in results:
+        mib = result["ingestion"]["corpus_mib"]
+        for row in result["retrieval"]:
+            print(
+                f"{mib:>11.1f}{row['index']:>8}{row['dtype']:>9}{row['rows']:>9}"
+                f"{row['build_seconds']:>9.2f}{row['vector_bytes_per_chunk']:>7}"
+                f"{row['search_p50_ms']:>10.3f}{row['bm25_p50_ms']:>9.3f}"
+                f"{row['retrieve_p50_ms']:>9.3f}{row['retrieve_p99_ms']:>9.3f}"
+            )
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[parse_size(s) for s in ("1MB", "10MB", "100MB")])
+    parser.add_argument("--chunk-size", type=int, default=700)
+    parser.add_argument("--chunk-overlap", type=int, default=150)
+    parser.add_argument("--max-vectors", type=int, default=100_000, help="cap on rows indexed per corpus")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--index", nargs="+", default=["flat", "ivf"], choices=["flat", "ivf"])
+    parser.add_argument("--dtype", nargs="+", default=["float32", "float16", "int8"], choices=QuantizedVectors.DTYPES)
+    parser.add_argument("--nprobe", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=Path, help="where corpora are written (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="keep generated corpora")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as scratch:
+        workdir = args.workdir or Path(scratch)
+        workdir.mkdir(parents=True, exist_ok=True)
+        for size in args.sizes:
+            result = run_size(size, args, workdir)
+            results.append(result)
+            print(f"corpus {size / 2**20:.1f} MiB done in {result['ingestion']['ingest_seconds']:.1f}s")
+
+    print()
+    _print_ingestion(result["ingestion"] for result in results)
+    print()
+    _print_retrieval(results)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()}, "results": results}, indent=2), encoding="utf-8")
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.admission import ServiceOverloadedError, ServicePool
+from app.resilience import deadline, remaining_budget
+
+
+def test_requests_beyond_workers_and_queue_are_rejected():
+    pool = ServicePool("chatbot", workers=2, max_queue=1)
+
+    async def request(hold: asyncio.Event) -> str:
+        async with pool.admit():
+            await hold.wait()
+        return "ok"
+
+    async def main() -> None:
+        hold = asyncio.Event()
+        running = [asyncio.ensure_future(request(hold)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert (pool.in_flight, pool.waiting) == (2, 1)
+
+        with pytest.raises(ServiceOverloadedError) as raised:
+            await request(hold)
+        assert raised.value.retry_after >= 1.0
+
+        hold.set()
+        assert await asyncio.gather(*running) == ["ok"] * 3
+
+    asyncio.run(main())
+    stats = pool.stats()
+    assert (stats["admitted"], stats["rejected"], stats["peak_waiting"]) == (3, 1, 1)
+    assert (stats["in_flight"], stats["waiting"]) == (0, 0)
+    pool.shutdown()
+
+
+def test_idle_pool_never_counts_requests_as_queued():
+    pool = ServicePool("career", workers=2, max_queue=0)
+
+    async def main() -> None:
+        for _ in range(3):
+            async with pool.admit():
+                pass
+
+    asyncio.run(main())
+    assert pool.stats()["peak_waiting"] == 0
+    pool.shutdown()
+
+
+def test_cancelled_request_releases_its_slot():
+    pool = ServicePool("learning", workers=1, max_queue=0)
+
+    async def main() -> None:
+        async def hold() -> None:
+            async with pool.admit():
+                await asyncio.sleep(10)
+
+        task = asyncio.ensure_future(hold())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        async with pool.admit():
+            pass
+
+    asyncio.run(main())
+    assert pool.in_flight == 0
+    pool.shutdown()
+
+
+def test_run_keeps_the_callers_deadline():
+    pool = ServicePool("community", workers=1)
+
+    async def main() -> float | None:
+        with deadline(30.0):
+            return await pool.run(remaining_budget)
+
+    budget = asyncio.run(main())
+    assert budget is not None and 0 < budget <= 30.0
+    pool.shutdown()
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from app.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache: TTLCache[str, int] = TTLCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_their_ttl():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(8, ttl=10.0, clock=clock)
+    cache.set("a", 1)
+    clock.now = 9.0
+    assert cache.get("a") == 1
+    clock.now = 10.5
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+    assert len(cache) == 0
+
+
+def test_zero_size_cache_stores_nothing():
+    cache: TTLCache[str, int] = TTLCache(0)
+    cache.set("a", 1)
+    assert cache.get("a", -1) == -1
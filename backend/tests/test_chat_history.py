@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List
+
+from app.services.chat_history import ChatHistoryMessage, HistoryManager
+
+
+class FakeChatClient:
+    def __init__(self, *, fail: bool = False):
+        self.fail = fail
+        self.prompts: List[list] = []
+
+    def create_chat_completion(self, messages, temperature=0.2, max_tokens=None) -> str:
+        self.prompts.append(messages)
+        if self.fail:
+            raise RuntimeError("chat deployment unavailable")
+        return f"summary {len(self.prompts)}"
+
+
+def _turns(count: int, start: int = 0) -> List[ChatHistoryMessage]:
+    # About 100 tokens per message.
+    roles = ("user", "assistant")
+    return [
+        ChatHistoryMessage(role=roles[i % 2], content=f"{i:03d} " + "x" * 396)
+        for i in range(start, start + count)
+    ]
+
+
+def _manager(client: FakeChatClient) -> HistoryManager:
+    return HistoryManager(client, token_budget=600, recent_messages=2, summary_tokens=100)
+
+
+def test_history_within_budget_is_unchanged():
+    client = FakeChatClient()
+    history = _turns(4)
+    assert _manager(client).compact(history) == history
+    assert client.prompts == []
+
+
+def test_older_turns_are_folded_into_a_summary_that_later_turns_reuse():
+    client = FakeChatClient()
+    manager = _manager(client)
+    history = _turns(10)
+
+    compacted = manager.compact(history)
+    assert compacted[0].role == "system" and "summary 1" in compacted[0].content
+    assert compacted[1:] == history[-2:]
+    assert len(client.prompts) == 1
+
+    # Two more turns still fit after the cached summary: no new summary call.
+    history += _turns(2, start=10)
+    compacted = manager.compact(history)
+    assert "summary 1" in compacted[0].content
+    assert compacted[1:] == history[-4:]
+    assert len(client.prompts) == 1
+    assert manager.stats()["summaries_reused"] == 1
+
+    covered, summary = manager.cached_summary(history)
+    assert (covered, summary) == (8, "summary 1")
+
+
+def test_summary_failure_keeps_the_recent_turns():
+    client = FakeChatClient(fail=True)
+    manager = _manager(client)
+    history = _turns(10)
+
+    assert manager.compact(history) == history[-2:]
+    assert manager.stats()["summary_failures"] == 1
+
+
+def test_async_compaction_without_an_async_client_matches_sync():
+    history = _turns(10)
+    expected = _manager(FakeChatClient()).compact(history)
+    assert asyncio.run(_manager(FakeChatClient()).compact_async(history)) == expected
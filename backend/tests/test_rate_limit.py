@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.rate_limit import ConcurrencySlots, DeploymentLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_queues_callers_once_the_budget_is_spent():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)
+
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(30) == pytest.approx(30.0)
+    assert bucket.reserve(30) == pytest.approx(60.0)
+    clock.now = 60.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert TokenBucket(0).reserve(10**6) == 0.0
+
+
+def test_sync_and_async_callers_share_one_concurrency_cap():
+    limiter = DeploymentLimiter("chat", max_concurrency=2)
+    peak = 0
+    lock = threading.Lock()
+
+    def hold(seconds: float) -> None:
+        nonlocal peak
+        with lock:
+            peak = max(peak, limiter.in_flight)
+        time.sleep(seconds)
+
+    def sync_call() -> None:
+        with limiter.acquire():
+            hold(0.02)
+
+    async def async_call() -> None:
+        async with limiter.acquire_async():
+            hold(0.0)
+            await asyncio.sleep(0.02)
+
+    async def main() -> None:
+        threads = [threading.Thread(target=sync_call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        await asyncio.gather(*(async_call() for _ in range(6)))
+        for thread in threads:
+            thread.join()
+
+    asyncio.run(main())
+    assert peak <= 2
+    assert limiter.stats()["acquired"] == 12
+    assert limiter.in_flight == 0
+
+
+def test_async_waiter_gets_the_slot_a_thread_releases():
+    slots = ConcurrencySlots(1)
+    slots.acquire()
+
+    async def main() -> None:
+        waiter = asyncio.ensure_future(slots.acquire_async())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        threading.Thread(target=slots.release).start()
+        await asyncio.wait_for(waiter, timeout=1.0)
+
+    asyncio.run(main())
+    slots.release()
+
+
+def test_cancelled_async_waiter_does_not_leak_a_slot():
+    slots = ConcurrencySlots(1)
+    slots.acquire()
+
+    async def main() -> None:
+        waiter = asyncio.ensure_future(slots.acquire_async())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        slots.release()
+        await asyncio.wait_for(slots.acquire_async(), timeout=1.0)
+
+    asyncio.run(main())
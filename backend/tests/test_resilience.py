@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+from app.clients import OpenAIClient
+from app.config import get_settings
+from app.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    ResilientCaller,
+    RetryPolicy,
+    deadline,
+    remaining_budget,
+)
+
+REQUEST = httpx.Request("POST", "https://example.invalid/openai")
+
+
+def _status_error(status: int, headers: dict | None = None) -> APIStatusError:
+    response = httpx.Response(status, headers=headers or {}, request=REQUEST)
+    return APIStatusError("failed", response=response, body=None)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_openai(monkeypatch, tmp_path):
+    """Settings for the in-process fake OpenAI backend with slow, deterministic replies."""
+    monkeypatch.setenv("OPENAI_BACKEND", "fake")
+    monkeypatch.setenv("OPENAI_FAKE_LATENCY_MS", "3000")
+    monkeypatch.setenv("OPENAI_FAKE_LATENCY_SIGMA", "0")
+    monkeypatch.setenv("OPENAI_RETRY_BASE_DELAY", "0.01")
+    monkeypatch.setenv("CHATBOT_EMBEDDING_STORE", str(tmp_path / "kb.embeddings"))
+    monkeypatch.setenv("CHATBOT_WATCH_INTERVAL", "0")
+    return get_settings()
+
+
+def test_breaker_opens_after_threshold_and_recovers_through_one_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker("chat", failure_threshold=2, recovery_time=10.0, clock=clock)
+
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.retry_after == pytest.approx(10.0)
+
+    clock.now = 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    # Only one probe is let through while half-open.
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["trips"] == 1
+
+
+def test_failed_probe_reopens_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker("chat", failure_threshold=1, recovery_time=5.0, clock=clock)
+    breaker.record_failure()
+    clock.now = 5.0
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_retry_policy_honours_retry_after_and_caps_backoff():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.5, max_delay=2.0)
+    assert policy.backoff(1, _status_error(429, {"retry-after-ms": "250"})) == pytest.approx(0.25)
+    assert policy.backoff(1, _status_error(503, {"retry-after": "3"})) == pytest.approx(3.0)
+    for attempt in range(1, 8):
+        assert 0.0 <= policy.backoff(attempt, _status_error(500)) <= 2.0
+
+
+def test_caller_retries_transient_errors_only():
+    caller = ResilientCaller(CircuitBreaker("chat"), RetryPolicy(max_attempts=3, base_delay=0.0))
+    attempts = []
+
+    def flaky(budget):
+        attempts.append(budget)
+        if len(attempts) < 3:
+            raise _status_error(503)
+        return "ok"
+
+    assert caller.call(flaky) == "ok"
+    assert attempts == [None, None, None]
+
+    attempts.clear()
+
+    def bad_request(budget):
+        attempts.append(budget)
+        raise _status_error(400)
+
+    with pytest.raises(APIStatusError):
+        caller.call(bad_request)
+    assert len(attempts) == 1
+
+
+def test_deadlines_nest_and_can_be_lifted():
+    assert remaining_budget() is None
+    with deadline(10.0):
+        with deadline(60.0):
+            assert remaining_budget() <= 10.0
+        with deadline(None):
+            assert remaining_budget() is None
+        assert remaining_budget() is not None
+    assert remaining_budget() is None
+
+
+def test_caller_raises_deadline_exceeded_when_no_time_is_left_to_retry():
+    caller = ResilientCaller(CircuitBreaker("chat"), RetryPolicy(max_attempts=5, base_delay=0.0))
+
+    def timing_out(budget):
+        time.sleep(budget)
+        raise APITimeoutError(request=REQUEST)
+
+    with deadline(0.05):
+        with pytest.raises(DeadlineExceededError) as raised:
+            caller.call(timing_out)
+    assert isinstance(raised.value.__cause__, APITimeoutError)
+
+    with deadline(0.05):
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(caller.call_async(_async_timing_out))
+
+
+async def _async_timing_out(budget):
+    await asyncio.sleep(budget)
+    raise APITimeoutError(request=REQUEST)
+
+
+def test_caller_keeps_the_original_error_without_a_deadline():
+    caller = ResilientCaller(CircuitBreaker("chat"), RetryPolicy(max_attempts=2, base_delay=0.0))
+
+    def unreachable(budget):
+        raise APIConnectionError(request=REQUEST)
+
+    with pytest.raises(APIConnectionError):
+        caller.call(unreachable)
+
+
+def test_client_reports_a_deadline_timeout_as_deadline_exceeded(fake_openai):
+    client = OpenAIClient(fake_openai)
+    try:
+        started = time.monotonic()
+        with deadline(0.5):
+            with pytest.raises(DeadlineExceededError):
+                client.create_chat_completion([{"role": "user", "content": "hello"}])
+        assert time.monotonic() - started < 2.0
+    finally:
+        client.close()
+
+
+def test_endpoint_returns_504_when_the_deadline_runs_out(fake_openai, monkeypatch):
+    monkeypatch.setenv("COMMUNITY_DEADLINE", "1")
+    from app.main import create_app
+
+    with TestClient(create_app()) as http:
+        response = http.post(
+            "/api/community/polish", json={"content": "Great shift today", "tone": "Friendly"}
+        )
+    assert response.status_code == 504
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from app.response_cache import MemoryResponseStore, ResponseCache, SQLiteResponseStore
+
+
+def _validate_json(text: str) -> dict:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as error:
+        raise ValueError("invalid JSON") from error
+
+
+def test_equivalent_payloads_share_a_key():
+    first = ResponseCache.make_key("career", {"job": " Crane operator ", "notes": ""}, "v1")
+    second = ResponseCache.make_key("career", {"job": "Crane operator"}, "v1")
+    assert first == second
+    assert first != ResponseCache.make_key("career", {"job": "Crane operator"}, "v2")
+
+
+def test_only_well_formed_replies_are_remembered():
+    cache = ResponseCache(MemoryResponseStore(8))
+    cache.remember("career", "bad", "not json", validate=_validate_json)
+    cache.remember("career", "empty", "   ")
+    cache.remember("career", "good", '{"fit": 80}', validate=_validate_json)
+
+    assert cache.get("career", "bad") is None
+    assert cache.get("career", "empty") is None
+    assert cache.get("career", "good") == '{"fit": 80}'
+    assert cache.stats()["endpoints"]["career"] == {
+        "memory_hits": 1,
+        "shared_hits": 0,
+        "misses": 2,
+        "hit_rate": 0.3333,
+    }
+
+
+def test_shared_hits_are_promoted_into_memory(tmp_path):
+    shared = SQLiteResponseStore(tmp_path / "responses.db")
+    ResponseCache(MemoryResponseStore(8), shared).remember("polish", "key", "Polished text")
+
+    # A second worker process sees the reply through the shared tier only.
+    cache = ResponseCache(MemoryResponseStore(8), SQLiteResponseStore(tmp_path / "responses.db"))
+    assert asyncio.run(cache.get_async("polish", "key")) == "Polished text"
+    assert cache.get("polish", "key") == "Polished text"
+
+    counters = cache.stats()["endpoints"]["polish"]
+    assert (counters["shared_hits"], counters["memory_hits"]) == (1, 1)
+    assert cache.stats()["shared"]["size"] == 1
+
+
+def test_remember_async_writes_both_tiers(tmp_path):
+    shared = SQLiteResponseStore(tmp_path / "responses.db")
+    cache = ResponseCache(MemoryResponseStore(8), shared)
+    asyncio.run(cache.remember_async("learning", "key", "Recommended"))
+    assert shared.get("key") == "Recommended"
+    assert cache.get("learning", "key") == "Recommended"
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResponseCache.disabled()
+    assert not cache.enabled
+    cache.remember("career", "key", "reply")
+    assert cache.get("career", "key") is None
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Iterable, List
+
+import numpy as np
+import pytest
+
+from app.services.context_packing import mmr_select
+from app.services.lexical_index import BM25IndexBuilder, reciprocal_rank_fusion
+from app.services.rag import RAGService
+from app.services.vector_index import FlatIndex, IVFIndex, QuantizedVectors, top_k
+
+DOCUMENTS = [
+    "Berth allocation assigns arriving vessels to quay positions at the terminal, "
+    "balancing draft limits, crane availability and the published schedule.",
+    "Annual leave requests are submitted through the HR portal two weeks ahead, "
+    "and managers approve them once team coverage for the period is confirmed.",
+    "Quay cranes move containers between the vessel and the yard trucks, and "
+    "remote operators supervise several cranes from the control centre.",
+    "The learning hub offers courses on data analytics and automation, with "
+    "self-paced modules that staff can complete during working hours.",
+]
+
+
+class FakeEmbeddingClient:
+    """Deterministic bag-of-words embeddings; texts containing ``fail_on`` raise."""
+
+    embedding_model = "fake-embedding"
+
+    def __init__(self, *, fail_on: str | None = None, dim: int = 64):
+        self.fail_on = fail_on
+        self.dim = dim
+        self.calls = 0
+
+    def create_embedding(self, texts: Iterable[str]) -> List[List[float]]:
+        texts = list(texts)
+        self.calls += 1
+        if self.fail_on is not None and any(self.fail_on in text for text in texts):
+            raise RuntimeError("embedding API unavailable")
+        return [self._embed(text) for text in texts]
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.strip(".,?").encode()).hexdigest(), 16) % self.dim] += 1.0
+        return vector.tolist()
+
+
+def _service(tmp_path: Path, client: FakeEmbeddingClient, **options) -> RAGService:
+    source = tmp_path / "kb.txt"
+    source.write_text("\n\n".join(DOCUMENTS), encoding="utf-8")
+    return RAGService(
+        client=client,
+        source_path=source,
+        chunk_size=200,
+        chunk_overlap=0,
+        top_k=2,
+        embed_batch_size=1,
+        embed_concurrency=1,
+        **options,
+    )
+
+
+def test_top_k_returns_best_first():
+    scores = np.array([0.1, 0.9, 0.3, 0.7, 0.5], dtype=np.float32)
+    assert top_k(scores, 3).tolist() == [1, 3, 4]
+    assert top_k(scores, 10).tolist() == [1, 3, 4, 2, 0]
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float32", 1e-6), ("float16", 1e-3), ("int8", 2e-2)])
+def test_quantized_vectors_round_trip(dtype, tolerance):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = vectors[7]
+
+    quantized = QuantizedVectors.encode(vectors, dtype)
+    assert len(quantized) == 50
+    np.testing.assert_allclose(quantized.dot(query), vectors @ query, atol=tolerance)
+    np.testing.assert_allclose(quantized.take(np.array([3, 7])), vectors[[3, 7]], atol=tolerance)
+
+
+def test_flat_and_ivf_find_the_query_row():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(400, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    for index in (FlatIndex(vectors), IVFIndex(vectors, nlist=8, nprobe=8)):
+        ids, scores = index.search(vectors[42], 3)
+        assert ids[0] == 42
+        assert scores[0] == pytest.approx(1.0, abs=1e-5)
+        np.testing.assert_allclose(index.reconstruct(ids[:1])[0], vectors[42], atol=1e-6)
+
+
+def test_bm25_ranks_exact_terms():
+    builder = BM25IndexBuilder()
+    for document in DOCUMENTS:
+        builder.add(document)
+    index = builder.build()
+
+    ids, scores = index.search("quay cranes", 4)
+    assert ids[0] == 2
+    assert np.all(np.diff(scores) <= 0)
+    assert len(index.search("nonexistent", 4)[0]) == 0
+
+
+def test_reciprocal_rank_fusion_prefers_rows_ranked_by_both():
+    ids, scores = reciprocal_rank_fusion([np.array([1, 2, 3]), np.array([3, 1, 4])], k=60)
+    assert ids.tolist()[:2] == [1, 3]
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_mmr_skips_near_duplicates():
+    vectors = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    relevance = np.array([1.0, 0.99, 0.8], dtype=np.float32)
+    assert mmr_select(relevance, vectors, 2, 0.5).tolist() == [0, 2]
+    assert mmr_select(relevance, vectors, 2, 1.0).tolist() == [0, 1]
+
+
+def test_lexical_mode_never_embeds(tmp_path):
+    client = FakeEmbeddingClient()
+    service = _service(tmp_path, client, retrieval_mode="lexical")
+
+    results = service.retrieve("annual leave")
+    assert results and "Annual leave" in results[0].content
+    assert client.calls == 0
+    assert service.snapshot.missing == 0
+
+
+@pytest.mark.parametrize("mode", ["lexical", "hybrid"])
+def test_retrieval_falls_back_to_bm25_without_embeddings(tmp_path, mode):
+    service = _service(tmp_path, FakeEmbeddingClient(fail_on=""), retrieval_mode=mode)
+
+    results = service.retrieve("quay cranes")
+    assert results and "Quay cranes" in results[0].content
+    assert len(service.snapshot.index) == 0
+    assert len(service.snapshot.lexical) == len(DOCUMENTS)
+
+    async_results = asyncio.run(service.retrieve_async("quay cranes"))
+    assert [chunk.chunk_id for chunk in async_results] == [chunk.chunk_id for chunk in results]
+
+
+def test_hybrid_maps_vector_rows_past_unembedded_chunks(tmp_path):
+    # The first chunk fails to embed, so vector rows and chunk rows are offset by one.
+    service = _service(tmp_path, FakeEmbeddingClient(fail_on="Berth"), retrieval_mode="hybrid")
+
+    snapshot = service._ensure_embeddings()
+    assert snapshot.missing == 1
+    assert snapshot.vector_rows.tolist() == [1, 2, 3]
+
+    results = service.retrieve("learning hub courses")
+    assert "learning hub" in results[0].content
+    assert results[0].chunk_id == snapshot.chunk_hashes[3]
+    # The unembedded chunk still reaches the fused ranking through BM25.
+    results = service.retrieve("berth allocation")
+    assert snapshot.chunk_hashes[0] in [chunk.chunk_id for chunk in results]
+
+
+def test_ivf_probes_a_share_of_its_lists_by_default():
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(2000, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    assert IVFIndex(vectors, nlist=900).nprobe == 32
+    assert IVFIndex(vectors, nlist=100).nprobe == IVFIndex.MIN_PROBES
+    assert IVFIndex(vectors, nlist=10).nprobe == 10
+    assert IVFIndex(vectors, nlist=100, nprobe=4).nprobe == 4
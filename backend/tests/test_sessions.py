@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from app.services.chat_history import ChatHistoryMessage
+from app.services.rag import RetrievedChunk
+from app.services.sessions import ChatSessions, MemorySessionStore, SQLiteSessionStore
+
+
+def test_sessions_resume_from_the_shared_store(tmp_path):
+    path = tmp_path / "sessions.db"
+    sessions = ChatSessions(SQLiteSessionStore(path))
+    seed = [ChatHistoryMessage(role="user", content="Hi")]
+    session = sessions.open(None, seed)
+    retrieved = [RetrievedChunk("text", 0.9, chunk_id="c1")]
+    sessions.record(session, "Where is berth 4?", "At Pasir Panjang.", retrieved)
+
+    # Another worker process opens the same conversation.
+    other = ChatSessions(SQLiteSessionStore(path))
+    resumed = other.open(session.session_id)
+    assert [turn.content for turn in resumed.turns] == ["Hi", "Where is berth 4?", "At Pasir Panjang."]
+    assert resumed.chunk_ids == ["c1"]
+    assert other.stats()["resumed"] == 1
+    assert other.stats()["store"]["size"] == 1
+
+
+def test_unknown_sessions_start_fresh():
+    sessions = ChatSessions(MemorySessionStore(ttl=60))
+    session = sessions.open("expired-id")
+    assert session.session_id != "expired-id"
+    assert session.turns == []
+    assert sessions.stats()["expired"] == 1
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.singleflight import AsyncSingleFlight, SingleFlight, request_key
+
+
+def test_request_key_ignores_dict_order():
+    assert request_key("chat", {"a": 1, "b": 2}) == request_key("chat", {"b": 2, "a": 1})
+    assert request_key("chat", {"a": 1}) != request_key("embedding", {"a": 1})
+
+
+def test_concurrent_callers_share_one_execution():
+    flight: SingleFlight[int] = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow() -> int:
+        calls.append(1)
+        release.wait(timeout=5)
+        return 42
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, "key", slow) for _ in range(4)]
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        release.set()
+        assert [future.result() for future in futures] == [42] * 4
+
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 3}
+
+
+def test_followers_receive_the_leaders_error():
+    flight: SingleFlight[int] = SingleFlight()
+    release = threading.Event()
+
+    def failing() -> int:
+        release.wait(timeout=5)
+        raise RuntimeError("upstream failed")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(flight.do, "key", failing) for _ in range(2)]
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.001)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="upstream failed"):
+                future.result()
+
+
+def test_async_waiter_cancellation_leaves_the_shared_call_running():
+    flight: AsyncSingleFlight[str] = AsyncSingleFlight()
+    calls = []
+
+    async def fetch() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main() -> None:
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+        assert first.cancelled()
+
+    asyncio.run(main())
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 1}
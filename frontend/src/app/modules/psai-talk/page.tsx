@@ -14,7 +14,6 @@ import { useSearchParams } from "next/navigation";
 import Markdown from "@/components/Markdown";
 import { IMAGE_PATHS } from "@/lib/constants";
 import {
-  ChatHistoryItem,
   fetchRecommendedQuestions,
   sendChatbotMessage,
 } from "@/lib/api";
@@ -48,7 +47,6 @@ export default function PsaiTalkPage() {
 function PsaiTalkContent() {
   const [messages, setMessages] = useState<Message[]>([]);
   const [draft, setDraft] = useState("");
-  const [history, setHistory] = useState<ChatHistoryItem[]>([]);
   const [isSending, setIsSending] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [suggestions, setSuggestions] = useState<string[]>(FALLBACK_PROMPTS);
@@ -57,14 +55,11 @@ function PsaiTalkContent() {
   const inputBarRef = useRef<HTMLFormElement | null>(null);
   const containerRef = useRef<HTMLDivElement | null>(null);
   const threadRef = useRef<HTMLElement | null>(null);
-  const historyRef = useRef<ChatHistoryItem[]>([]);
+  // Server-side conversation; the backend keeps the history for this id.
+  const sessionIdRef = useRef<string | undefined>(undefined);
 
   const searchParams = useSearchParams();
 
-  useEffect(() => {
-    historyRef.current = history;
-  }, [history]);
-
   useEffect(() => {
     let isMounted = true;
     fetchRecommendedQuestions()
@@ -104,22 +99,17 @@ function PsaiTalkContent() {
     const userMessage: Message = { id: baseId, author: "user", text: trimmed };
     appendMessage(userMessage);
 
-    const payloadHistory = historyRef.current;
     setIsSending(true);
 
     try {
-      const answer = await sendChatbotMessage(trimmed, payloadHistory);
+      const { answer, sessionId } = await sendChatbotMessage(trimmed, sessionIdRef.current);
+      sessionIdRef.current = sessionId ?? sessionIdRef.current;
       const assistantMessage: Message = {
         id: baseId + 1,
         author: "assistant",
         text: answer.trim(),
       };
       appendMessage(assistantMessage);
-      setHistory((prev) => [
-        ...prev,
-        { role: "user", content: trimmed },
-        { role: "assistant", content: answer },
-      ]);
     } catch (err) {
       const fallback =
         "Sara couldn't reach the knowledge base just now. Please try again in a moment.";
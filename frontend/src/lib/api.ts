@@ -40,9 +40,9 @@ async function apiFetch<T>(path: string, method: RequestMethod = "GET", body?: u
   return (await response.json()) as T;
 }
 
-export type ChatHistoryItem = {
-  role: "user" | "assistant" | "system";
-  content: string;
+export type ChatbotReply = {
+  answer: string;
+  sessionId?: string;
 };
 
 export async function fetchRecommendedQuestions(): Promise<string[]> {
@@ -50,10 +50,11 @@ export async function fetchRecommendedQuestions(): Promise<string[]> {
   return data.questions.map((item) => item.question);
 }
 
-export async function sendChatbotMessage(query: string, history: ChatHistoryItem[]): Promise<string> {
-  const payload = { query, history };
-  const data = await apiFetch<{ answer: string }>("/api/chatbot", "POST", payload);
-  return data.answer;
+export async function sendChatbotMessage(query: string, sessionId?: string): Promise<ChatbotReply> {
+  // Only the new question travels; the backend keeps the conversation under `session_id`.
+  const payload = { query, session_id: sessionId };
+  const data = await apiFetch<{ answer: string; session_id?: string | null }>("/api/chatbot", "POST", payload);
+  return { answer: data.answer, sessionId: data.session_id ?? undefined };
 }
 
 export type CommunityPost = {